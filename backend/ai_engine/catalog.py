@@ -0,0 +1,341 @@
+"""Columnar meal catalog with precomputed lookup indexes.
+
+The catalog is loaded once into NumPy columns and treated as an immutable
+snapshot; reloading builds a new snapshot and swaps it in atomically, so
+in-flight requests keep using the one they started with.
+
+Sources (MEAL_CATALOG_SOURCE):
+  file  MEAL_CATALOG_PATH, a .json, .csv or .npz file (default: the bundled
+        ai_engine/data/meals.json)
+  db    the ``meals`` table
+
+Usage: python -m ai_engine.catalog export <out.npz>
+"""
+import csv
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ai_engine.optimizer import MEAL_TYPES, NUTRIENTS, MealTable
+from ai_engine.dietary import allowed_rows, meal_masks
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "meals.json")
+CATALOG_SOURCE = settings.meal_catalog_source
+CATALOG_PATH = settings.meal_catalog_path or DEFAULT_CATALOG_PATH
+# How often (seconds) to check the source for changes; 0 disables hot reload
+RELOAD_INTERVAL = settings.meal_catalog_reload_interval
+
+_TYPE_CODES = {meal_type: code for code, meal_type in enumerate(MEAL_TYPES)}
+
+
+class MealCatalog:
+    """Immutable, array-backed snapshot of every meal.
+
+    Rows are addressed by position. Per meal type, rows are kept sorted by
+    calories and by protein energy ratio so band queries are two binary
+    searches; tag and id lookups go through hash indexes. Allergens and
+    diets are bitmask columns (see ai_engine.dietary).
+    """
+
+    def __init__(self, meal_ids, names, meal_types, nutrients, tags,
+                 allergen_masks=None, diet_masks=None, source: str = ""):
+        self.meal_ids = np.asarray(meal_ids, dtype=np.int64)
+        self.names = list(names)
+        self.meal_types = np.asarray(meal_types, dtype=np.int8)
+        self.nutrients = np.asarray(nutrients, dtype=np.float64).reshape(-1, len(NUTRIENTS))
+        self.tags = [tuple(meal_tags) for meal_tags in tags]
+        if allergen_masks is None or diet_masks is None:
+            masks = [meal_masks((), meal_tags) for meal_tags in self.tags]
+            allergen_masks = [0] * len(masks) if allergen_masks is None else allergen_masks
+            diet_masks = [diet for _, diet in masks] if diet_masks is None else diet_masks
+        self.allergen_masks = np.asarray(allergen_masks, dtype=np.uint32)
+        self.diet_masks = np.asarray(diet_masks, dtype=np.uint32)
+        self.source = source
+        self.loaded_at = time.time()
+        self._build_indexes()
+
+    def _build_indexes(self):
+        calories = self.nutrients[:, 0]
+        self.protein_ratio = np.divide(
+            self.nutrients[:, 1] * 4, calories,
+            out=np.zeros_like(calories), where=calories > 0
+        )
+        self._row_by_id = {int(meal_id): row for row, meal_id in enumerate(self.meal_ids)}
+
+        self._by_type = {}
+        self._calories_by_type = {}
+        self._ratio_order_by_type = {}
+        self._ratios_by_type = {}
+        for code, meal_type in enumerate(MEAL_TYPES):
+            rows = np.flatnonzero(self.meal_types == code)
+            by_calories = rows[np.argsort(calories[rows], kind="stable")]
+            self._by_type[meal_type] = by_calories
+            self._calories_by_type[meal_type] = calories[by_calories]
+            by_ratio = rows[np.argsort(self.protein_ratio[rows], kind="stable")]
+            self._ratio_order_by_type[meal_type] = by_ratio
+            self._ratios_by_type[meal_type] = self.protein_ratio[by_ratio]
+
+        by_tag = defaultdict(list)
+        for row, meal_tags in enumerate(self.tags):
+            for tag in meal_tags:
+                by_tag[tag].append(row)
+        self._by_tag = {tag: np.asarray(rows, dtype=np.int64) for tag, rows in by_tag.items()}
+
+        self._tables = [
+            MealTable(self.nutrients[rows], rows, self.meal)
+            for rows in (self._by_type[meal_type] for meal_type in MEAL_TYPES)
+        ]
+
+    def __len__(self):
+        return len(self.meal_ids)
+
+    def meal(self, row: int) -> Dict:
+        """Materialize one row as the meal dict stored in plans"""
+        calories, protein, carbs, fats = self.nutrients[row].tolist()
+        return {
+            "meal_id": int(self.meal_ids[row]),
+            "name": self.names[row],
+            "calories": calories,
+            "protein": protein,
+            "carbs": carbs,
+            "fats": fats,
+        }
+
+    def get(self, meal_id: int) -> Optional[Dict]:
+        """Meal dict by meal_id, or None"""
+        row = self._row_by_id.get(int(meal_id))
+        return None if row is None else self.meal(row)
+
+    def rows_of_type(self, meal_type: str) -> np.ndarray:
+        """Rows of one meal type, sorted by calories"""
+        return self._by_type.get(meal_type, np.empty(0, dtype=np.int64))
+
+    def calorie_band(self, meal_type: str, low: float, high: float) -> np.ndarray:
+        """Rows of meal_type with low <= calories <= high"""
+        calories = self._calories_by_type.get(meal_type)
+        if calories is None:
+            return np.empty(0, dtype=np.int64)
+        start = np.searchsorted(calories, low, side="left")
+        stop = np.searchsorted(calories, high, side="right")
+        return self._by_type[meal_type][start:stop]
+
+    def protein_ratio_band(self, meal_type: str, low: float, high: float) -> np.ndarray:
+        """Rows of meal_type whose share of calories from protein is in [low, high]"""
+        ratios = self._ratios_by_type.get(meal_type)
+        if ratios is None:
+            return np.empty(0, dtype=np.int64)
+        start = np.searchsorted(ratios, low, side="left")
+        stop = np.searchsorted(ratios, high, side="right")
+        return self._ratio_order_by_type[meal_type][start:stop]
+
+    def rows_with_tag(self, tag: str) -> np.ndarray:
+        """Rows carrying a dietary tag, in row order"""
+        return self._by_tag.get(tag, np.empty(0, dtype=np.int64))
+
+    def tables(self) -> List[MealTable]:
+        """Optimizer tables for every meal type, in MEAL_TYPES order"""
+        return self._tables
+
+    def tables_for(self, avoid_mask: int = 0, diet_mask: int = 0) -> List[MealTable]:
+        """Optimizer tables restricted to meals a profile's masks allow"""
+        if not avoid_mask and not diet_mask:
+            return self._tables
+        allowed = allowed_rows(self.allergen_masks, self.diet_masks, avoid_mask, diet_mask)
+        return [table.subset(allowed[table.rows]) for table in self._tables]
+
+    def stats(self) -> Dict:
+        return {
+            "source": self.source,
+            "meals": len(self),
+            "by_type": {meal_type: len(rows) for meal_type, rows in self._by_type.items()},
+            "tags": len(self._by_tag),
+            "loaded_at": self.loaded_at,
+        }
+
+
+def catalog_from_records(records, source: str = "") -> MealCatalog:
+    """Build a catalog from meal dicts (meal_type, name, nutrients, optional meal_id/tags)"""
+    records = list(records)
+    meal_ids, names, meal_types, nutrients, tags = [], [], [], [], []
+    allergen_masks, diet_masks = [], []
+    for position, record in enumerate(records, start=1):
+        meal_type = record["meal_type"]
+        if meal_type not in _TYPE_CODES:
+            raise ValueError(f"Unknown meal type {meal_type!r} for meal {record.get('name')!r}")
+        meal_ids.append(int(record.get("meal_id") or position))
+        names.append(record["name"])
+        meal_types.append(_TYPE_CODES[meal_type])
+        nutrients.append([float(record.get(key) or 0) for key in NUTRIENTS])
+        record_tags = _as_list(record.get("tags"))
+        tags.append(record_tags)
+        allergen_mask, diet_mask = meal_masks(_as_list(record.get("allergens")), record_tags)
+        allergen_masks.append(allergen_mask)
+        diet_masks.append(diet_mask)
+    return MealCatalog(meal_ids, names, meal_types, nutrients, tags,
+                       allergen_masks, diet_masks, source=source)
+
+
+def _as_list(value):
+    """Normalize a list or a comma/semicolon-separated string of labels"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.replace(";", ",").split(",")
+    return [item.strip().lower() for item in value if item.strip()]
+
+
+def _records_from_json(path):
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        # {"breakfast": [...], "lunch": [...]} layout
+        return [dict(meal, meal_type=meal_type) for meal_type, meals in data.items() for meal in meals]
+    return data
+
+
+def _records_from_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def load_npz(path: str) -> MealCatalog:
+    """Load a catalog written by save_npz"""
+    with np.load(path, allow_pickle=False) as data:
+        tags = [tag_list.split(",") if tag_list else [] for tag_list in data["tags"].tolist()]
+        return MealCatalog(
+            data["meal_id"], data["name"].tolist(), data["meal_type"],
+            data["nutrients"], tags, data["allergen_mask"], data["diet_mask"], source=path
+        )
+
+
+def save_npz(catalog: MealCatalog, path: str):
+    """Write a catalog as a compressed columnar .npz file"""
+    np.savez_compressed(
+        path,
+        meal_id=catalog.meal_ids,
+        name=np.array(catalog.names, dtype=str),
+        meal_type=catalog.meal_types,
+        nutrients=catalog.nutrients,
+        tags=np.array([",".join(meal_tags) for meal_tags in catalog.tags], dtype=str),
+        allergen_mask=catalog.allergen_masks,
+        diet_mask=catalog.diet_masks,
+    )
+
+
+def load_file(path: str) -> MealCatalog:
+    """Load a catalog from a .json, .csv or .npz file"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".npz":
+        return load_npz(path)
+    if extension == ".csv":
+        return catalog_from_records(_records_from_csv(path), source=path)
+    return catalog_from_records(_records_from_json(path), source=path)
+
+
+_DB_QUERY = """
+    SELECT meal_id, name, meal_type, calories, protein, carbs, fats, tags, allergens
+    FROM meals
+    WHERE active = 1
+"""
+_DB_FINGERPRINT_QUERY = "SELECT COUNT(*) AS meal_count, MAX(updated_at) AS updated_at FROM meals"
+
+
+def load_db() -> MealCatalog:
+    """Load a catalog from the meals table"""
+    from database.connection import execute_query
+    rows = execute_query(_DB_QUERY)
+    if rows is None:
+        raise RuntimeError("Could not load meal catalog from database")
+    return catalog_from_records(rows, source="db:meals")
+
+
+def _source_fingerprint():
+    """Cheap value that changes whenever the configured source does"""
+    if CATALOG_SOURCE == "db":
+        from database.connection import execute_query
+        rows = execute_query(_DB_FINGERPRINT_QUERY)
+        return tuple(rows[0].values()) if rows else None
+    return os.stat(CATALOG_PATH).st_mtime_ns
+
+
+def _load_configured() -> MealCatalog:
+    return load_db() if CATALOG_SOURCE == "db" else load_file(CATALOG_PATH)
+
+
+_catalog = None
+_fingerprint = None
+_last_check = 0.0
+_lock = threading.Lock()
+_load_lock = threading.Lock()
+_reloading = False
+
+
+def reload_catalog() -> MealCatalog:
+    """Load the configured source now and swap it in"""
+    global _catalog, _fingerprint, _last_check
+    fingerprint = _source_fingerprint()
+    catalog = _load_configured()
+    with _lock:
+        _catalog, _fingerprint, _last_check = catalog, fingerprint, time.monotonic()
+    logger.info("Loaded meal catalog", extra={"catalog": catalog.stats()})
+    return catalog
+
+
+def _reload_if_changed():
+    global _last_check, _reloading
+    try:
+        if _source_fingerprint() != _fingerprint:
+            reload_catalog()
+        else:
+            _last_check = time.monotonic()
+    except Exception:
+        logger.exception("Meal catalog reload failed; keeping the current snapshot")
+        _last_check = time.monotonic()
+    finally:
+        _reloading = False
+
+
+def get_catalog() -> MealCatalog:
+    """Current catalog snapshot, loading it on first use.
+
+    Every RELOAD_INTERVAL seconds a background thread checks the source and
+    swaps in a fresh snapshot if it changed; callers never wait on a reload.
+    """
+    global _reloading
+    catalog = _catalog
+    if catalog is None:
+        with _load_lock:
+            if _catalog is None:
+                reload_catalog()
+            return _catalog
+    if RELOAD_INTERVAL and time.monotonic() - _last_check > RELOAD_INTERVAL:
+        with _lock:
+            start_reload = not _reloading
+            _reloading = True
+        if start_reload:
+            threading.Thread(target=_reload_if_changed, name="catalog-reload", daemon=True).start()
+    return catalog
+
+
+def main(argv):
+    if len(argv) != 3 or argv[1] != "export":
+        print(__doc__)
+        return 1
+    catalog = _load_configured()
+    save_npz(catalog, argv[2])
+    print(f"Wrote {len(catalog)} meals to {argv[2]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,172 @@
+"""Allergen and diet flags encoded as bitmasks.
+
+Meals carry an allergen mask (what they contain) and a diet mask (which
+diets they satisfy). A profile's free-text allergies and dietary
+preferences are normalized once into an allergen mask to avoid and a diet
+mask to require, so filtering a whole catalog is one vectorized test:
+
+    allowed = (meal_allergens & avoid == 0) & (meal_diets & required == required)
+"""
+import re
+from typing import Iterable, Tuple
+
+import numpy as np
+
+ALLERGENS = ("peanuts", "tree_nuts", "dairy", "eggs", "gluten", "soy", "fish", "shellfish", "sesame")
+DIETS = ("vegetarian", "vegan", "pescatarian")
+
+ALLERGEN_BITS = {name: 1 << bit for bit, name in enumerate(ALLERGENS)}
+DIET_BITS = {name: 1 << bit for bit, name in enumerate(DIETS)}
+
+# A meal suitable for the key diet is also suitable for these
+_DIET_IMPLIES = {
+    "vegan": ("vegetarian", "pescatarian"),
+    "vegetarian": ("pescatarian",),
+}
+
+# Free-text keyword -> allergens it refers to
+_ALLERGEN_KEYWORDS = {
+    "nut": ("peanuts", "tree_nuts"),
+    "nuts": ("peanuts", "tree_nuts"),
+    "peanut": ("peanuts",),
+    "peanuts": ("peanuts",),
+    "tree nut": ("tree_nuts",),
+    "tree nuts": ("tree_nuts",),
+    "almond": ("tree_nuts",),
+    "almonds": ("tree_nuts",),
+    "cashew": ("tree_nuts",),
+    "cashews": ("tree_nuts",),
+    "walnut": ("tree_nuts",),
+    "walnuts": ("tree_nuts",),
+    "pecan": ("tree_nuts",),
+    "pecans": ("tree_nuts",),
+    "hazelnut": ("tree_nuts",),
+    "hazelnuts": ("tree_nuts",),
+    "pistachio": ("tree_nuts",),
+    "pistachios": ("tree_nuts",),
+    "dairy": ("dairy",),
+    "milk": ("dairy",),
+    "lactose": ("dairy",),
+    "cheese": ("dairy",),
+    "egg": ("eggs",),
+    "eggs": ("eggs",),
+    "gluten": ("gluten",),
+    "wheat": ("gluten",),
+    "celiac": ("gluten",),
+    "coeliac": ("gluten",),
+    "soy": ("soy",),
+    "soya": ("soy",),
+    "fish": ("fish",),
+    "seafood": ("fish", "shellfish"),
+    "shellfish": ("shellfish",),
+    "shrimp": ("shellfish",),
+    "prawn": ("shellfish",),
+    "prawns": ("shellfish",),
+    "crab": ("shellfish",),
+    "lobster": ("shellfish",),
+    "sesame": ("sesame",),
+}
+
+# Free-text keyword -> diet it requires
+_DIET_KEYWORDS = {
+    "vegetarian": "vegetarian",
+    "veggie": "vegetarian",
+    "vegan": "vegan",
+    "plant based": "vegan",
+    "plant-based": "vegan",
+    "pescatarian": "pescatarian",
+    "pescetarian": "pescatarian",
+}
+
+
+def _keyword_pattern(keywords: Iterable[str]) -> re.Pattern:
+    # Longest first so "tree nuts" wins over "nuts"
+    alternatives = sorted(keywords, key=len, reverse=True)
+    return re.compile(r"\b(" + "|".join(re.escape(k) for k in alternatives) + r")\b")
+
+_ALLERGEN_RE = _keyword_pattern(_ALLERGEN_KEYWORDS)
+_DIET_RE = _keyword_pattern(_DIET_KEYWORDS)
+# "no dairy", "without eggs", "avoid nuts", "gluten free", "dairy-free", "lactose intolerant"
+_AVOIDANCE_RE = re.compile(
+    r"\b(?:no|non|without|avoid(?:s|ing)?)[\s-]+(?P<before>[a-z]+(?: [a-z]+)?)"
+    r"|\b(?P<after>[a-z]+)[\s-]+(?:free|intolerant|intolerance)\b"
+)
+# Ends with a negation, so the diet word after it isn't required:
+# "non-vegetarian", "not vegan", "not a vegetarian", "no plant-based"
+_NEGATED_RE = re.compile(r"\b(?:no|non|not|without)[\s-]+(?:an? )?$")
+
+
+def _allergens_in(text: str) -> int:
+    mask = 0
+    for match in _ALLERGEN_RE.finditer(text):
+        for allergen in _ALLERGEN_KEYWORDS[match.group(1)]:
+            mask |= ALLERGEN_BITS[allergen]
+    return mask
+
+
+def allergy_mask(allergies: str) -> int:
+    """Allergen bits mentioned anywhere in a free-text allergies field"""
+    return _allergens_in((allergies or "").lower())
+
+
+def preference_masks(dietary_preferences: str) -> Tuple[int, int]:
+    """(allergens to avoid, diets to require) from free-text dietary preferences.
+
+    Diet words ("vegetarian", "plant-based") become required diet bits;
+    allergens only count when phrased as avoidance ("dairy-free", "no eggs"),
+    so a preference like "high protein, loves cheese" avoids nothing.
+    Negated diets ("non-vegetarian", "not vegan") require nothing.
+
+    >>> describe(*preference_masks("Vegetarian, dairy-free"))
+    {'avoid_allergens': ['dairy'], 'diets': ['vegetarian']}
+    >>> describe(*preference_masks("non-vegetarian"))
+    {'avoid_allergens': [], 'diets': []}
+    >>> describe(*preference_masks("non vegetarian, high protein"))
+    {'avoid_allergens': [], 'diets': []}
+    >>> describe(*preference_masks("not vegan but vegetarian"))
+    {'avoid_allergens': [], 'diets': ['vegetarian']}
+    >>> describe(*preference_masks("I'm not a vegetarian, no nuts"))
+    {'avoid_allergens': ['peanuts', 'tree_nuts'], 'diets': []}
+    """
+    text = (dietary_preferences or "").lower()
+    diet_mask = 0
+    for match in _DIET_RE.finditer(text):
+        if _NEGATED_RE.search(text, 0, match.start()):
+            continue
+        diet_mask |= DIET_BITS[_DIET_KEYWORDS[match.group(1)]]
+    avoid_mask = 0
+    for match in _AVOIDANCE_RE.finditer(text):
+        avoid_mask |= _allergens_in(match.group("before") or match.group("after"))
+    return avoid_mask, diet_mask
+
+
+def profile_masks(dietary_preferences: str, allergies: str) -> Tuple[int, int]:
+    """(allergen_mask, diet_mask) for a profile, as stored on user_profiles"""
+    avoid_mask, diet_mask = preference_masks(dietary_preferences)
+    return avoid_mask | allergy_mask(allergies), diet_mask
+
+
+def meal_masks(allergens: Iterable[str], tags: Iterable[str]) -> Tuple[int, int]:
+    """(allergen_mask, diet_mask) for a meal from its allergen list and tags"""
+    allergen_mask = 0
+    for allergen in allergens:
+        allergen_mask |= ALLERGEN_BITS.get(allergen, 0)
+    diet_mask = 0
+    for tag in tags:
+        for diet in (tag,) + _DIET_IMPLIES.get(tag, ()):
+            diet_mask |= DIET_BITS.get(diet, 0)
+    return allergen_mask, diet_mask
+
+
+def allowed_rows(meal_allergens: np.ndarray, meal_diets: np.ndarray,
+                 avoid_mask: int, diet_mask: int) -> np.ndarray:
+    """Boolean mask of meals free of avoid_mask allergens and satisfying every diet"""
+    return ((meal_allergens & avoid_mask) == 0) & ((meal_diets & diet_mask) == diet_mask)
+
+
+def describe(allergen_mask: int, diet_mask: int) -> dict:
+    """Human-readable form of a pair of masks"""
+    return {
+        "avoid_allergens": [name for name, bit in ALLERGEN_BITS.items() if allergen_mask & bit],
+        "diets": [name for name, bit in DIET_BITS.items() if diet_mask & bit],
+    }
@@ -0,0 +1,150 @@
+"""Nutrition targets derived from a user profile.
+
+Free-text goals and activity levels are parsed once into enums (and the
+parse memoized), and targets are memoized by the numeric profile fields
+they depend on. ``profile_fingerprint`` identifies those inputs so targets
+persisted on user_profiles can be reused until the profile changes.
+"""
+import hashlib
+import json
+from decimal import Decimal
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+DEFAULT_AGE = 30
+DEFAULT_WEIGHT = 70
+DEFAULT_HEIGHT = 170
+
+
+class Goal(Enum):
+    LOSE = "lose"
+    GAIN = "gain"
+    MAINTAIN = "maintain"
+
+
+class ActivityLevel(Enum):
+    SEDENTARY = 1.2
+    LIGHTLY_ACTIVE = 1.375
+    MODERATELY_ACTIVE = 1.55
+    VERY_ACTIVE = 1.725
+    EXTRA_ACTIVE = 1.9
+
+
+# Keywords checked in order; the first match wins
+_GOAL_KEYWORDS = (
+    ("lose", Goal.LOSE),
+    ("weight loss", Goal.LOSE),
+    ("gain", Goal.GAIN),
+    ("muscle", Goal.GAIN),
+)
+
+_ACTIVITY_NAMES = {
+    "sedentary": ActivityLevel.SEDENTARY,
+    "lightly_active": ActivityLevel.LIGHTLY_ACTIVE,
+    "moderately_active": ActivityLevel.MODERATELY_ACTIVE,
+    "very_active": ActivityLevel.VERY_ACTIVE,
+    "extra_active": ActivityLevel.EXTRA_ACTIVE,
+    # user_profiles.activity_level ENUM values
+    "low": ActivityLevel.SEDENTARY,
+    "moderate": ActivityLevel.MODERATELY_ACTIVE,
+    "high": ActivityLevel.VERY_ACTIVE,
+}
+
+CALORIE_ADJUSTMENT = {
+    Goal.LOSE: -500,   # 500 calorie deficit
+    Goal.GAIN: 300,    # 300 calorie surplus
+    Goal.MAINTAIN: 0,
+}
+
+# (protein, carbs, fats) share of calories
+MACRO_RATIOS = {
+    Goal.GAIN: (0.30, 0.40, 0.30),
+    Goal.LOSE: (0.35, 0.35, 0.30),
+    Goal.MAINTAIN: (0.25, 0.45, 0.30),
+}
+
+
+@lru_cache(maxsize=1024)
+def parse_goal(goal: Optional[str]) -> Goal:
+    """Map a free-text health goal onto a Goal"""
+    text = (goal or "").lower()
+    for keyword, parsed in _GOAL_KEYWORDS:
+        if keyword in text:
+            return parsed
+    return Goal.MAINTAIN
+
+
+@lru_cache(maxsize=64)
+def parse_activity(activity_level: Optional[str]) -> ActivityLevel:
+    """Map an activity level string onto an ActivityLevel (sedentary if unknown)"""
+    key = (activity_level or "").strip().lower().replace(" ", "_").replace("-", "_")
+    return _ACTIVITY_NAMES.get(key, ActivityLevel.SEDENTARY)
+
+
+def _number(value, default) -> float:
+    if value is None:
+        return float(default)
+    return float(value) if isinstance(value, (Decimal, str)) else value
+
+
+def profile_inputs(profile: Dict[str, Any]) -> Tuple[float, float, float, Goal, ActivityLevel]:
+    """The normalized profile fields nutrition targets depend on"""
+    return (
+        _number(profile.get('age'), DEFAULT_AGE),
+        _number(profile.get('weight'), DEFAULT_WEIGHT),
+        _number(profile.get('height'), DEFAULT_HEIGHT),
+        parse_goal(profile.get('health_goals')),
+        parse_activity(profile.get('activity_level')),
+    )
+
+
+def profile_fingerprint(profile: Dict[str, Any]) -> str:
+    """Short digest of the inputs to nutrition targets"""
+    age, weight, height, goal, activity = profile_inputs(profile)
+    key = f"{age:g}|{weight:g}|{height:g}|{goal.value}|{activity.name}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+@lru_cache(maxsize=4096)
+def _targets(age: float, weight: float, height: float, goal: Goal, activity: ActivityLevel):
+    bmr = (10 * weight) + (6.25 * height) - (5 * age) + 5
+    calories = bmr * activity.value + CALORIE_ADJUSTMENT[goal]
+    protein_ratio, carb_ratio, fat_ratio = MACRO_RATIOS[goal]
+    return (
+        calories,
+        (calories * protein_ratio) / 4,  # 4 cal per gram
+        (calories * carb_ratio) / 4,
+        (calories * fat_ratio) / 9,  # 9 cal per gram
+    )
+
+
+def raw_targets(profile: Dict[str, Any]) -> Tuple[float, float, float, float]:
+    """Unrounded (calories, protein_g, carbs_g, fats_g) for a profile"""
+    return _targets(*profile_inputs(profile))
+
+
+def nutrition_targets(profile: Dict[str, Any]) -> Dict[str, float]:
+    """Daily targets in the shape stored as a plan's nutritional_target"""
+    calories, protein, carbs, fats = raw_targets(profile)
+    return {
+        "daily_calories": round(calories, 0),
+        "protein_g": round(protein, 1),
+        "carbs_g": round(carbs, 1),
+        "fats_g": round(fats, 1),
+    }
+
+
+def profile_targets(profile: Dict[str, Any]) -> Dict[str, float]:
+    """Targets persisted on the profile row, recomputed if missing or out of date.
+
+    Stored targets are only used while the row's targets_fingerprint still
+    matches its inputs, so a row whose age, weight, ... changed without
+    going through PUT /profile doesn't keep serving the old targets.
+    """
+    stored = profile.get('nutrition_targets')
+    if not stored or profile.get('targets_fingerprint') != profile_fingerprint(profile):
+        return nutrition_targets(profile)
+    if isinstance(stored, (str, bytes, bytearray)):
+        stored = json.loads(stored)
+    return stored
@@ -0,0 +1,176 @@
+import numpy as np
+from typing import Callable, Dict, List, Optional, Sequence
+
+MEAL_TYPES = ("breakfast", "lunch", "dinner", "snack")
+NUTRIENTS = ("calories", "protein", "carbs", "fats")
+
+# Typical share of the day's intake eaten at each meal, used to shortlist
+# candidates per slot before the combinations are scored
+SLOT_SHARES = np.array([0.25, 0.35, 0.30, 0.10])
+# How much a relative miss on each nutrient counts towards a day's score
+NUTRIENT_WEIGHTS = np.array([4.0, 1.5, 1.0, 1.0])
+
+# Candidates kept per slot; the full cross product is scored, so the
+# per-day search space is CANDIDATES_PER_SLOT ** 4
+CANDIDATES_PER_SLOT = 12
+# Shortlisting only scores meals within +/-CALORIE_BAND of the slot's calorie
+# target, widened or capped to keep roughly WINDOW_PER_CANDIDATE meals per
+# candidate
+CALORIE_BAND = 0.25
+WINDOW_PER_CANDIDATE = 32
+# Score added per recent use of a meal: at least REPEAT_PENALTY, or a
+# fraction of the best achievable score when the target can't be met
+# closely, so variety still matters for small or ill-fitting catalogs
+REPEAT_PENALTY = 0.05
+REPEAT_PENALTY_RELATIVE = 0.2
+REPEAT_DECAY = 0.5
+# Random noise (as a fraction of the repeat penalty) so regenerating a plan
+# varies between near-ties
+JITTER = 0.05
+
+
+class MealTable:
+    """Meals of one type, sorted by calories, as a (n_meals, 4) nutrient matrix.
+
+    ``rows`` maps each position back to the caller's own row ids and
+    ``lookup`` turns such a row id into a meal dict, so a table can be a
+    cheap view over a columnar catalog without materializing every meal.
+    """
+
+    def __init__(self, nutrients: np.ndarray, rows: np.ndarray, lookup: Callable[[int], Dict]):
+        nutrients = np.asarray(nutrients, dtype=np.float64).reshape(-1, len(NUTRIENTS))
+        rows = np.asarray(rows)
+        calories = nutrients[:, 0]
+        if len(calories) > 1 and np.any(calories[1:] < calories[:-1]):
+            order = np.argsort(calories, kind="stable")
+            nutrients, rows = nutrients[order], rows[order]
+        self.nutrients = nutrients
+        self.calories = nutrients[:, 0]
+        self.rows = rows
+        self.lookup = lookup
+
+    @classmethod
+    def from_meals(cls, meals: Sequence[Dict]) -> "MealTable":
+        meals = list(meals)
+        nutrients = [[float(meal[key]) for key in NUTRIENTS] for meal in meals]
+        return cls(nutrients, np.arange(len(meals)), meals.__getitem__)
+
+    def subset(self, positions: np.ndarray) -> "MealTable":
+        """Table restricted to the given positions (or boolean mask)"""
+        return MealTable(self.nutrients[positions], self.rows[positions], self.lookup)
+
+    def meal(self, position: int) -> Dict:
+        return self.lookup(int(self.rows[position]))
+
+    def __len__(self):
+        return len(self.rows)
+
+
+def combine_tables(tables: Sequence[MealTable]) -> MealTable:
+    """One table holding the meals of every table given"""
+    sources = [(table, position) for table in tables for position in range(len(table))]
+    nutrients = np.vstack([table.nutrients for table in tables])
+    return MealTable(nutrients, np.arange(len(sources)), lambda row: sources[row][0].meal(sources[row][1]))
+
+
+def build_tables(meal_database: Dict[str, Sequence[Dict]]) -> List[MealTable]:
+    """Precompute one MealTable per meal type, in MEAL_TYPES order"""
+    return [MealTable.from_meals(meal_database.get(meal_type, ())) for meal_type in MEAL_TYPES]
+
+
+def _shortlist(table: MealTable, slot_target: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k meals closest to a single slot's share of the target.
+
+    Only a window of meals around the slot's calorie target is scored: it is
+    found by binary search on the calorie-sorted table, so large catalogs
+    cost O(log n) plus the window rather than a full scan.
+    """
+    n = len(table)
+    if k >= n:
+        return np.arange(n)
+    low, high = np.searchsorted(
+        table.calories, [slot_target[0] * (1 - CALORIE_BAND), slot_target[0] * (1 + CALORIE_BAND)]
+    )
+    center = (low + high) // 2
+    half = max(WINDOW_PER_CANDIDATE * k // 2, k)
+    low = max(0, min(low, center - k), center - half)
+    high = min(n, max(high, center + k), center + half)
+    window = np.arange(low, high)
+    error = (((table.nutrients[window] - slot_target) / slot_target) ** 2) @ NUTRIENT_WEIGHTS
+    if k >= len(window):
+        return window
+    return window[np.argpartition(error, k - 1)[:k]]
+
+
+def score_combinations(slot_nutrients: Sequence[np.ndarray], target: np.ndarray) -> np.ndarray:
+    """Score every breakfast x lunch x dinner x snack combination at once.
+
+    Returns an array of shape (n_breakfast, n_lunch, n_dinner, n_snack)
+    holding the weighted squared relative error of each day's totals
+    against target; lower is better.
+    """
+    b, l, d, s = slot_nutrients
+    totals = (
+        b[:, None, None, None, :]
+        + l[None, :, None, None, :]
+        + d[None, None, :, None, :]
+        + s[None, None, None, :, :]
+    )
+    return (((totals - target) / target) ** 2) @ NUTRIENT_WEIGHTS
+
+
+def optimize_days(
+    tables: Sequence[MealTable],
+    target: Sequence[float],
+    days: int,
+    candidates_per_slot: int = CANDIDATES_PER_SLOT,
+    rng: Optional[np.random.Generator] = None,
+) -> List[List[Dict]]:
+    """Pick the best-fitting, varied set of meals for each of ``days`` days.
+
+    The combination scores (plus a little noise) are computed once; each day
+    then only adds a broadcast repeat penalty for recently used meals before
+    taking the argmin, so plan length barely affects cost.
+    Returns one list of meal dicts per day, in MEAL_TYPES order. A meal
+    type with no meals at all (e.g. everything filtered out by dietary
+    restrictions) is filled from the other types' meals instead, so the day
+    still adds up; callers can tell from ``tables`` which types those are.
+    """
+    target = np.maximum(np.asarray(target, dtype=np.float64), 1e-6)
+    available = [table for table in tables if len(table)]
+    if not available:
+        raise ValueError("No meals available to build a plan from")
+    if len(available) < len(tables):
+        stand_in = combine_tables(available)
+        tables = [table if len(table) else stand_in for table in tables]
+    rng = rng if rng is not None else np.random.default_rng()
+
+    shortlists = [
+        _shortlist(table, target * share, candidates_per_slot)
+        for table, share in zip(tables, SLOT_SHARES)
+    ]
+    base_scores = score_combinations(
+        [table.nutrients[idx] for table, idx in zip(tables, shortlists)], target
+    )
+    usage = [np.zeros(len(idx)) for idx in shortlists]
+    penalty = max(REPEAT_PENALTY, REPEAT_PENALTY_RELATIVE * float(base_scores.min()))
+    if JITTER:
+        base_scores = base_scores + rng.random(base_scores.shape) * (JITTER * penalty)
+
+    scores = np.empty_like(base_scores)
+    plan = []
+    for _ in range(days):
+        pb, pl, pd, ps = (penalty * u for u in usage)
+        np.add(base_scores, pb[:, None, None, None], out=scores)
+        scores += pl[None, :, None, None]
+        scores += pd[None, None, :, None]
+        scores += ps[None, None, None, :]
+        picks = np.unravel_index(np.argmin(scores), scores.shape)
+
+        day = []
+        for slot, pick in enumerate(picks):
+            usage[slot] *= REPEAT_DECAY
+            usage[slot][pick] += 1
+            day.append(tables[slot].meal(shortlists[slot][pick]))
+        plan.append(day)
+    return plan
@@ -0,0 +1,68 @@
+"""Per-request auth cost with and without the JWT verification cache.
+
+Run from the backend directory:  python benchmarks/bench_auth.py
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SECRET_KEY', 'benchmark-secret-key')
+os.environ.setdefault('ALGORITHM', 'HS256')
+os.environ.setdefault('ACCESS_TOKEN_EXPIRE_MINUTES', '30')
+
+from datetime import timedelta
+from fastapi.security import HTTPAuthorizationCredentials
+from utils import auth_helper
+from utils import validation
+
+ITERATIONS = int(os.getenv('BENCH_ITERATIONS', 5000))
+
+
+def bench(label, func):
+    func()
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<45} {elapsed / ITERATIONS * 1e6:10.1f} us/request")
+    return elapsed
+
+
+def main():
+    token = auth_helper.create_access_token(
+        {"sub": "bench@example.com", "uid": 1},
+        expires_delta=timedelta(minutes=30)
+    )
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    loop = asyncio.new_event_loop()
+
+    def decode_uncached():
+        auth_helper.token_cache.clear()
+        auth_helper.decode_token_claims(token)
+
+    def decode_cached():
+        auth_helper.decode_token_claims(token)
+
+    def current_user_uncached():
+        auth_helper.token_cache.clear()
+        validation.user_cache.clear()
+        loop.run_until_complete(validation.get_current_user(credentials))
+
+    def current_user_cached():
+        loop.run_until_complete(validation.get_current_user(credentials))
+
+    print(f"=== Auth benchmark ({ITERATIONS} iterations) ===")
+    before = bench("decode_token_claims (verify every request)", decode_uncached)
+    after = bench("decode_token_claims (verification cache)", decode_cached)
+    print(f"speedup: {before / after:.1f}x")
+    before = bench("get_current_user (no caches)", current_user_uncached)
+    after = bench("get_current_user (warm caches)", current_user_cached)
+    print(f"speedup: {before / after:.1f}x")
+    print(f"token cache: {auth_helper.token_cache.stats()}")
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
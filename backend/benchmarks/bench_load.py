@@ -0,0 +1,226 @@
+"""Load test: request mixes against the app in-process, on the SQLite stand-in.
+
+Seeds a fresh stand-in database (users with profiles, current meal plans
+and LOG_DAYS of meal logs each), then for every scenario fires REQUESTS
+requests from CONCURRENCY concurrent clients through the ASGI app and
+prints throughput and p50/p95/p99 per endpoint. Requests go through the
+full stack (middleware, auth, pool, executor threads), but there is no
+network hop and SQLite stands in for MySQL, so compare results between
+builds on the same machine rather than reading them as production numbers.
+
+Run from the backend directory:
+  python benchmarks/bench_load.py [--scenarios read,write] [--concurrency 32]
+      [--requests 2000] [--users 200] [--log-days 730]
+      [--output results.json] [--baseline results.json --max-regression 0.25]
+
+With --baseline, exits 1 if any endpoint's p95 grew by more than
+--max-regression over the baseline file (written earlier with --output).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SECRET_KEY', 'benchmark-secret-key')
+os.environ.setdefault('ALGORITHM', 'HS256')
+os.environ.setdefault('ACCESS_TOKEN_EXPIRE_MINUTES', '30')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+import httpx
+
+from benchmarks import seed as seeding
+from benchmarks.mysql_standin import create_database, install_pool
+from benchmarks.stats import compare, print_table, summarize
+from database.connection import get_pool
+from main import app
+from utils.auth_helper import create_access_token
+
+# Request builders take (rng, user) and return (method, url, json body)
+def _today(rng, user):
+    return "GET", "/tracking/today", None
+
+
+def _progress(rng, user):
+    end = date.today() - timedelta(days=rng.randint(0, 365))
+    return "GET", f"/tracking/progress?start_date={end - timedelta(days=29)}&end_date={end}", None
+
+
+def _analytics(rng, user):
+    end = date.today()
+    return "GET", f"/tracking/analytics?start_date={end - timedelta(days=364)}&end_date={end}&resolution=month", None
+
+
+def _history(rng, user):
+    return "GET", "/tracking/history?limit=50", None
+
+
+def _profile(rng, user):
+    return "GET", "/profile/", None
+
+
+def _current_plan(rng, user):
+    return "GET", "/meal-plan/current", None
+
+
+def _log_meal(rng, user):
+    meal_type = rng.choice(seeding.MEAL_TYPES)
+    calories = rng.randint(*seeding.CALORIES[meal_type])
+    return "POST", "/tracking/log", {
+        "meal_date": date.today().isoformat(), "meal_type": meal_type,
+        "food_items": rng.choice(seeding.FOODS[meal_type]), "calories": calories,
+        "protein": round(calories * 0.07, 1), "carbs": round(calories * 0.11, 1), "fats": round(calories * 0.03, 1),
+    }
+
+
+def _update_profile(rng, user):
+    return "PUT", "/profile/", {"weight": round(rng.uniform(50, 120), 1), "activity_level": rng.choice(seeding.ACTIVITY_LEVELS)}
+
+
+def _generate(rng, user):
+    return "POST", "/meal-plan/generate", {"start_date": date.today().isoformat(), "duration_days": 7}
+
+
+def _login(rng, user):
+    return "POST", "/auth/login", {"email": user["email"], "password": seeding.PASSWORD}
+
+
+def _register(rng, user):
+    return "POST", "/auth/register", {"email": f"new-{rng.getrandbits(64):x}@example.com", "password": seeding.PASSWORD}
+
+
+# scenario -> [(weight, label, builder)]
+SCENARIOS = {
+    "read": [
+        (30, "GET /tracking/today", _today),
+        (20, "GET /meal-plan/current", _current_plan),
+        (15, "GET /profile", _profile),
+        (15, "GET /tracking/history", _history),
+        (15, "GET /tracking/progress", _progress),
+        (5, "GET /tracking/analytics", _analytics),
+    ],
+    "write": [
+        (70, "POST /tracking/log", _log_meal),
+        (20, "PUT /profile", _update_profile),
+        (10, "POST /meal-plan/generate", _generate),
+    ],
+    "auth": [
+        (80, "POST /auth/login", _login),
+        (20, "POST /auth/register", _register),
+    ],
+    "mixed": [
+        (25, "GET /tracking/today", _today),
+        (20, "POST /tracking/log", _log_meal),
+        (15, "GET /meal-plan/current", _current_plan),
+        (10, "GET /profile", _profile),
+        (10, "GET /tracking/progress", _progress),
+        (5, "GET /tracking/history", _history),
+        (5, "POST /meal-plan/generate", _generate),
+        (5, "POST /auth/login", _login),
+        (3, "PUT /profile", _update_profile),
+        (2, "GET /tracking/analytics", _analytics),
+    ],
+}
+
+
+async def run_scenario(client, name, users, tokens, requests, concurrency, rng):
+    mix = SCENARIOS[name]
+    weights = [weight for weight, _, _ in mix]
+    plan = rng.choices(mix, weights=weights, k=requests)
+    samples, errors = defaultdict(list), defaultdict(int)
+    queue = iter(plan)
+
+    async def worker():
+        for _, label, build in queue:
+            user = rng.choice(users)
+            method, url, body = build(rng, user)
+            headers = {"Authorization": f"Bearer {tokens[user['user_id']]}"}
+            start = time.perf_counter()
+            response = await client.request(method, url, json=body, headers=headers)
+            samples[label].append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors[label] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    results = {}
+    for _, label, _ in mix:
+        if samples[label]:
+            results[label] = dict(summarize(samples[label], elapsed), errors=errors[label])
+    overall = [sample for values in samples.values() for sample in values]
+    results["all"] = dict(summarize(overall, elapsed), errors=sum(errors.values()))
+    return results
+
+
+async def run(args):
+    path = create_database()
+    install_pool(path)
+    print(f"Seeding {args.users} users with {args.log_days} days of logs into {path}")
+    started = time.perf_counter()
+    users = seeding.seed(path, users=args.users, log_days=args.log_days)
+    print(f"Seeded in {time.perf_counter() - started:.1f}s")
+
+    tokens = {
+        user["user_id"]: create_access_token(
+            {"sub": user["email"], "uid": user["user_id"]}, expires_delta=timedelta(hours=1)
+        )
+        for user in users
+    }
+    rng = random.Random(args.seed)
+    transport = httpx.ASGITransport(app=app)
+    results = {}
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for name in args.scenarios:
+                # Unmeasured warm-up fills the caches and the connection pool
+                await run_scenario(client, name, users, tokens, min(200, args.requests), args.concurrency, rng)
+                results[name] = await run_scenario(
+                    client, name, users, tokens, args.requests, args.concurrency, rng
+                )
+                print_table(f"{name} ({args.requests} requests, concurrency {args.concurrency})", results[name])
+    get_pool().close_all()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.unlink(path + suffix)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--scenarios", default="read,write,mixed",
+                        help=f"comma-separated, from {', '.join(SCENARIOS)}")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--log-days", type=int, default=730)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    parser.add_argument("--max-regression", type=float, default=0.25)
+    args = parser.parse_args(argv)
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    results = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""Micro-benchmarks for plan generation and the auth helpers.
+
+Times generate_meal_plan for a spread of profiles and plan lengths, and
+password hashing/verification, token creation and token verification
+(cached and uncached), reporting p50/p95/p99 per operation. No database
+is involved.
+
+Run from the backend directory:
+  python benchmarks/bench_micro.py [--iterations 200] [--output micro.json]
+      [--baseline micro.json --max-regression 0.25]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SECRET_KEY', 'benchmark-secret-key')
+os.environ.setdefault('ALGORITHM', 'HS256')
+os.environ.setdefault('ACCESS_TOKEN_EXPIRE_MINUTES', '30')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+from datetime import date, timedelta
+
+from ai_engine.catalog import get_catalog
+from ai_engine.meal_planner import generate_meal_plan
+from benchmarks.stats import compare, print_table, summarize
+from utils import auth_helper
+
+PROFILES = {
+    "no restrictions": {
+        'age': 30, 'weight': 70, 'height': 175, 'health_goals': 'maintain',
+        'activity_level': 'moderate', 'dietary_preferences': '', 'allergies': '',
+    },
+    "vegan, nut allergy": {
+        'age': 45, 'weight': 82, 'height': 180, 'health_goals': 'lose weight',
+        'activity_level': 'low', 'dietary_preferences': 'vegan', 'allergies': 'peanuts, tree nuts',
+    },
+    "high protein": {
+        'age': 25, 'weight': 90, 'height': 188, 'health_goals': 'build muscle',
+        'activity_level': 'high', 'dietary_preferences': '', 'allergies': 'shellfish',
+    },
+}
+PLAN_DAYS = (1, 7, 30)
+
+
+def measure(func, iterations):
+    func()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples, sum(samples))
+
+
+def planner_results(iterations):
+    start = date.today()
+    results = {}
+    for days in PLAN_DAYS:
+        for name, profile in PROFILES.items():
+            results[f"{days}-day plan, {name}"] = measure(
+                lambda: generate_meal_plan(profile, days, start), max(1, iterations // days)
+            )
+    return results
+
+
+def auth_results(iterations):
+    password = "benchmark-password"
+    hashed = auth_helper.get_password_hash(password)
+    token = auth_helper.create_access_token(
+        {"sub": "bench@example.com", "uid": 1}, expires_delta=timedelta(minutes=30)
+    )
+
+    def decode_uncached():
+        auth_helper.token_cache.clear()
+        auth_helper.decode_token_claims(token)
+
+    # bcrypt is deliberately slow; a handful of rounds shows its cost
+    hash_iterations = max(3, iterations // 20)
+    return {
+        f"get_password_hash (rounds={auth_helper.BCRYPT_ROUNDS})": measure(
+            lambda: auth_helper.get_password_hash(password), hash_iterations
+        ),
+        f"verify_password (rounds={auth_helper.BCRYPT_ROUNDS})": measure(
+            lambda: auth_helper.verify_password(password, hashed), hash_iterations
+        ),
+        "create_access_token": measure(
+            lambda: auth_helper.create_access_token({"sub": "bench@example.com", "uid": 1}), iterations * 10
+        ),
+        "decode_token_claims (uncached)": measure(decode_uncached, iterations * 10),
+        "decode_token_claims (cached)": measure(lambda: auth_helper.decode_token_claims(token), iterations * 10),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    parser.add_argument("--max-regression", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    print(f"Catalog: {get_catalog().stats()}")
+    results = {"planner": planner_results(args.iterations), "auth": auth_results(args.iterations)}
+    print_table("generate_meal_plan", results["planner"])
+    print_table("auth helpers", results["auth"])
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
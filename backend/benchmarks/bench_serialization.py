@@ -0,0 +1,122 @@
+"""Cost of serving GET /meal-plan/current for 7, 30 and 90 day plans.
+
+Compares the old path (stdlib json.loads of the whole plan_data blob, then
+jsonable_encoder and starlette's JSONResponse) with the current one (meal
+rows embedded as orjson fragments), first as bare serialization and then
+end to end through the ASGI app. Database calls are replaced with
+in-memory rows, so only encoding and framework overhead is measured.
+
+Run from the backend directory:  python benchmarks/bench_serialization.py
+"""
+import json
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SECRET_KEY', 'benchmark-secret-key')
+os.environ.setdefault('ALGORITHM', 'HS256')
+os.environ.setdefault('ACCESS_TOKEN_EXPIRE_MINUTES', '30')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+from starlette.responses import JSONResponse as StdJSONResponse
+
+from main import app
+from ai_engine.meal_planner import generate_meal_plan
+from database import meal_plan_store
+from routes import meal_plan as meal_plan_routes
+from utils.auth_helper import create_access_token
+from utils.serialization import JSONResponse, json_fragment, loads
+
+ITERATIONS = int(os.getenv('BENCH_ITERATIONS', 500))
+PLAN_DAYS = (7, 30, 90)
+PROFILE = {
+    'age': 30, 'weight': 70, 'height': 175, 'health_goals': 'maintain',
+    'activity_level': 'moderate', 'dietary_preferences': '', 'allergies': '',
+}
+
+
+def bench(label, func):
+    func()
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<45} {elapsed / ITERATIONS * 1e6:10.1f} us/request")
+    return elapsed
+
+
+def plan_rows(days):
+    """(blob-only meal_plans row, normalized meal_plans row, meal_plan_items rows)"""
+    start = date.today()
+    plan = generate_meal_plan(PROFILE, days, start)
+    base = {
+        'plan_id': 1, 'created_at': datetime.now(), 'start_date': start,
+        'end_date': start + timedelta(days=days - 1),
+    }
+    legacy = dict(base, plan_data=json.dumps(plan), normalized=0)
+    header, items = meal_plan_store.split_plan(plan)
+    normalized = dict(base, plan_data=header, normalized=1)
+    item_rows = [
+        {'meal_date': date.fromisoformat(day), 'meal_type': meal_type, 'meal_data': meal_data, 'version': 1}
+        for day, meal_type, _meal_id, meal_data in items
+    ]
+    return legacy, normalized, item_rows
+
+
+def main():
+    token = create_access_token({"sub": "bench@example.com", "uid": 1})
+    headers = {"Authorization": f"Bearer {token}"}
+    client = TestClient(app)
+    current_row = {}
+    items = {}
+
+    async def fake_query_async(query, params=None):
+        return [dict(current_row)]
+
+    meal_plan_routes.execute_query_async = fake_query_async
+    meal_plan_store.execute_query = lambda query, params=None: items['rows']
+
+    print(f"=== GET /meal-plan/current ({ITERATIONS} iterations) ===")
+    for days in PLAN_DAYS:
+        legacy, normalized, item_rows = plan_rows(days)
+        items['rows'] = item_rows
+        print(f"--- {days}-day plan ({len(legacy['plan_data']) / 1024:.1f} KiB) ---")
+
+        def before():
+            row = dict(legacy)
+            row['plan_data'] = json.loads(row['plan_data'])
+            return StdJSONResponse(jsonable_encoder(row)).body
+
+        def after():
+            row = dict(normalized)
+            meals, versions = meal_plan_store.load_plan_meals(row, decode=json_fragment)
+            header = loads(row.pop('plan_data'))
+            header['meals'] = meals
+            row.pop('normalized')
+            row['plan_data'] = header
+            row['meal_versions'] = versions
+            return JSONResponse(row).body
+
+        assert loads(after())['plan_data']['meals'] == loads(before())['plan_data']['meals']
+        slow = bench("serialize: json + jsonable_encoder", before)
+        fast = bench("serialize: orjson + stored fragments", after)
+        print(f"speedup: {slow / fast:.1f}x")
+
+        def request(row):
+            def call():
+                current_row.clear()
+                current_row.update(row)
+                response = client.get("/meal-plan/current", headers=headers)
+                assert response.status_code == 200
+            return call
+
+        bench("end to end: blob-only plan", request(legacy))
+        bench("end to end: normalized plan", request(normalized))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Cold-start benchmark: time to first request in a fresh interpreter.
+
+Seeds a small stand-in database once, then starts RUNS fresh Python
+processes. Each one imports the app, runs its lifespan startup and sends
+its first requests through the ASGI app, reporting how long each phase
+took; the parent also times the whole process from spawn to the first
+response. Prints p50/p95/p99 per phase.
+
+Run from the backend directory:
+  python benchmarks/bench_startup.py [--runs 20]
+      [--output startup.json] [--baseline startup.json --max-regression 0.25]
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SECRET_KEY', 'benchmark-secret-key')
+os.environ.setdefault('ALGORITHM', 'HS256')
+os.environ.setdefault('ACCESS_TOKEN_EXPIRE_MINUTES', '30')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+from benchmarks.stats import compare, print_table, summarize
+
+# The first requests a freshly started worker typically sees
+FIRST_REQUESTS = ("/tracking/today", "/meal-plan/current", "/profile/")
+
+
+def child(path, user_id, email):
+    """Body of one measured process; prints its phase timings as JSON"""
+    started = time.perf_counter()
+    from main import app
+    imported = time.perf_counter()
+
+    import httpx
+    from benchmarks.mysql_standin import install_pool
+    from utils.auth_helper import create_access_token
+
+    install_pool(path)
+    token = create_access_token({"sub": email, "uid": user_id})
+    headers = {"Authorization": f"Bearer {token}"}
+    timings = {"import": imported - started}
+
+    async def first_requests():
+        setup_started = time.perf_counter()
+        async with app.router.lifespan_context(app):
+            timings["startup"] = time.perf_counter() - setup_started
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                for url in FIRST_REQUESTS:
+                    start = time.perf_counter()
+                    response = await client.get(url, headers=headers)
+                    timings[f"first GET {url}"] = time.perf_counter() - start
+                    if response.status_code >= 400:
+                        raise RuntimeError(f"GET {url} returned {response.status_code}")
+                    if url == FIRST_REQUESTS[0]:
+                        # Only the app's own work counts; the benchmark's setup doesn't
+                        timings["import to first response"] = (
+                            timings["import"] + timings["startup"] + timings[f"first GET {url}"]
+                        )
+
+    asyncio.run(first_requests())
+    print(json.dumps(timings))
+
+
+def run(args):
+    from benchmarks import seed as seeding
+    from benchmarks.mysql_standin import create_database, install_pool
+    from database.connection import get_pool
+
+    path = create_database()
+    install_pool(path)
+    user = seeding.seed(path, users=1, log_days=30)[0]
+    get_pool().close_all()
+
+    samples = {}
+    try:
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", path, str(user["user_id"]), user["email"]],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            elapsed = time.perf_counter() - start
+            timings = json.loads(output.strip().splitlines()[-1])
+            timings["process total"] = elapsed
+            for phase, seconds in timings.items():
+                samples.setdefault(phase, []).append(seconds)
+    finally:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.unlink(path + suffix)
+    return {"cold start": {phase: summarize(values) for phase, values in samples.items()}}
+
+
+def main(argv=None):
+    if argv is None and len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(sys.argv[2], int(sys.argv[3]), sys.argv[4])
+        return 0
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    parser.add_argument("--max-regression", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    print_table(f"cold start ({args.runs} processes)", results["cold start"])
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
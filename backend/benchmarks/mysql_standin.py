@@ -0,0 +1,247 @@
+"""SQLite stand-in for MySQL, for benchmarks that need a real database.
+
+Connections mimic the slice of mysql-connector the app uses (dictionary
+cursors, start_transaction/commit/rollback, ping, with_rows, lastrowid)
+and translate each statement's MySQL dialect to SQLite on the way in, so
+database/connection.py's pool and every query above it run unchanged.
+The schema is built from "database/meal planner script.sql" the same way.
+
+SQLite serializes writers and has no network round trip, so absolute
+numbers are not MySQL's; use them to compare builds, not to size servers.
+
+    from benchmarks.mysql_standin import create_database, install_pool
+    path = create_database()
+    install_pool(path)
+"""
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+
+from mysql.connector import errors
+
+from database import connection as db_connection
+
+SCHEMA_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "database", "meal planner script.sql"
+)
+
+sqlite3.register_converter("DATE", lambda raw: date.fromisoformat(raw.decode()))
+sqlite3.register_converter("TIMESTAMP", lambda raw: datetime.fromisoformat(raw.decode()))
+sqlite3.register_converter("DECIMAL", lambda raw: Decimal(raw.decode()))
+
+
+# -- statement translation ---------------------------------------------------
+
+_DML_RULES = [
+    (re.compile(r"CURDATE\(\)\s*-\s*INTERVAL\s+%s\s+DAY", re.I), "DATE(CURDATE(), '-' || %s || ' days')"),
+    (re.compile(r"\bON\s+DUPLICATE\s+KEY\s+UPDATE\b", re.I), "ON CONFLICT DO UPDATE SET"),
+    (re.compile(r"\bVALUES\((\w+)\)", re.I), r"excluded.\1"),
+    (re.compile(r"\bFOR\s+UPDATE\b", re.I), ""),
+    (re.compile(r"\bINSERT\s+IGNORE\b", re.I), "INSERT OR IGNORE"),
+]
+
+
+@lru_cache(maxsize=1024)
+def translate(query: str) -> str:
+    """A MySQL statement as SQLite, with %s placeholders as ?"""
+    for pattern, replacement in _DML_RULES:
+        query = pattern.sub(replacement, query)
+    return query.replace("%s", "?").replace("%%", "%")
+
+
+_DDL_RULES = [
+    (re.compile(r"\bINT\s+AUTO_INCREMENT\s+PRIMARY\s+KEY\b", re.I), "INTEGER PRIMARY KEY AUTOINCREMENT"),
+    (re.compile(r"\bENUM\([^)]*\)", re.I), "TEXT"),
+    (re.compile(r"\bJSON\b", re.I), "TEXT"),
+    (re.compile(r"\bINT\s+UNSIGNED\b", re.I), "INT"),
+    (re.compile(r"\s+ON\s+UPDATE\s+CURRENT_TIMESTAMP\b", re.I), ""),
+    (re.compile(r"\bUNIQUE\s+KEY\s+(\w+)\s*\(", re.I), r"CONSTRAINT \1 UNIQUE ("),
+]
+_ADD_UNIQUE = re.compile(r"ADD\s+UNIQUE\s+KEY\s+(\w+)\s*\(([^)]*)\)", re.I)
+
+
+def _split_alter(statement: str):
+    """MySQL's multi-clause ALTER TABLE as one SQLite statement per clause"""
+    match = re.match(r"ALTER\s+TABLE\s+(\w+)\s+(.*)", statement, re.I | re.S)
+    table, clauses = match.group(1), match.group(2)
+    for clause in re.split(r",\s*(?=ADD\b)", clauses, flags=re.I):
+        clause = clause.strip()
+        unique = _ADD_UNIQUE.match(clause)
+        if unique:
+            yield f"CREATE UNIQUE INDEX {unique.group(1)} ON {table} ({unique.group(2)})"
+        else:
+            # SQLite only allows constant defaults on added columns
+            yield f"ALTER TABLE {table} " + re.sub(r"\s+DEFAULT\s+CURRENT_TIMESTAMP\b", "", clause, flags=re.I)
+
+
+def schema_statements(script: str):
+    """The schema script's statements translated to SQLite DDL"""
+    script = re.sub(r"--[^\n]*", "", script)
+    for statement in script.split(";"):
+        statement = statement.strip()
+        if not statement:
+            continue
+        parts = _split_alter(statement) if statement.upper().startswith("ALTER TABLE") else [statement]
+        for part in parts:
+            for pattern, replacement in _DDL_RULES:
+                part = pattern.sub(replacement, part)
+            yield part
+
+
+# -- connection ------------------------------------------------------------
+
+def _adapt(value):
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _as_mysql_error(e: sqlite3.Error):
+    if isinstance(e, sqlite3.IntegrityError):
+        return errors.IntegrityError(msg=str(e), errno=1062 if "UNIQUE" in str(e) else 1452)
+    if isinstance(e, sqlite3.OperationalError) and "locked" in str(e):
+        return errors.DatabaseError(msg=str(e), errno=1205)
+    return errors.DatabaseError(msg=str(e))
+
+
+class StandInCursor:
+    def __init__(self, connection, dictionary=False):
+        self._cursor = connection.cursor()
+        self._dictionary = dictionary
+
+    def execute(self, query, params=()):
+        try:
+            self._cursor.execute(translate(query), tuple(_adapt(value) for value in params or ()))
+        except sqlite3.Error as e:
+            raise _as_mysql_error(e) from e
+
+    def executemany(self, query, seq_params):
+        try:
+            self._cursor.executemany(
+                translate(query), [tuple(_adapt(value) for value in params) for params in seq_params]
+            )
+        except sqlite3.Error as e:
+            raise _as_mysql_error(e) from e
+
+    @property
+    def with_rows(self):
+        return self._cursor.description is not None
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def _row(self, row):
+        if not self._dictionary:
+            return row
+        return dict(zip((column[0] for column in self._cursor.description), row))
+
+    def fetchall(self):
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        return None if row is None else self._row(row)
+
+    def close(self):
+        self._cursor.close()
+
+
+class StandInConnection:
+    """The mysql-connector connection API the app relies on, over SQLite"""
+
+    def __init__(self, path):
+        self._db = sqlite3.connect(
+            path, isolation_level=None, check_same_thread=False,
+            detect_types=sqlite3.PARSE_DECLTYPES, timeout=30
+        )
+        self._db.execute("PRAGMA foreign_keys = ON")
+        self._db.execute("PRAGMA synchronous = NORMAL")
+        self._db.create_function("NOW", 0, lambda: datetime.now().isoformat(sep=" "))
+        self._db.create_function("CURDATE", 0, lambda: date.today().isoformat())
+        self._closed = False
+
+    def cursor(self, dictionary=False, **kwargs):
+        return StandInCursor(self._db, dictionary)
+
+    def _run(self, statement):
+        try:
+            self._db.execute(statement)
+        except sqlite3.Error as e:
+            raise _as_mysql_error(e) from e
+
+    def start_transaction(self):
+        # Take the write lock up front, like InnoDB row locks would, instead
+        # of failing on a read-to-write upgrade halfway through
+        self._run("BEGIN IMMEDIATE")
+
+    def commit(self):
+        if self._db.in_transaction:
+            self._run("COMMIT")
+
+    def rollback(self):
+        if self._db.in_transaction:
+            self._run("ROLLBACK")
+
+    def ping(self, reconnect=False):
+        if self._closed:
+            raise errors.InterfaceError(msg="Connection closed")
+
+    def is_connected(self):
+        return not self._closed
+
+    def get_server_info(self):
+        return f"sqlite {sqlite3.sqlite_version}"
+
+    def close(self):
+        self._closed = True
+        self._db.close()
+
+
+def create_database(path=None) -> str:
+    """Create a file-backed database with the app schema; returns its path"""
+    if path is None:
+        handle, path = tempfile.mkstemp(prefix="meal-planner-bench-", suffix=".sqlite3")
+        os.close(handle)
+        os.unlink(path)
+    with open(SCHEMA_PATH, encoding="utf-8") as f:
+        script = f.read()
+    db = sqlite3.connect(path)
+    db.execute("PRAGMA journal_mode = WAL")
+    for statement in schema_statements(script):
+        db.execute(statement)
+    db.commit()
+    db.close()
+    return path
+
+
+_installed_lock = threading.Lock()
+
+
+def install_pool(path, size=None) -> db_connection.ConnectionPool:
+    """Point database.connection's pool at the stand-in database"""
+    pool = db_connection.ConnectionPool(
+        size=size or db_connection.POOL_SIZE, factory=lambda: StandInConnection(path)
+    )
+    with _installed_lock:
+        previous, db_connection._pool = db_connection._pool, pool
+    if previous is not None:
+        previous.close_all()
+    return pool
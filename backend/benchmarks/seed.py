@@ -0,0 +1,106 @@
+"""Synthetic data for the stand-in database.
+
+Users share one password (hashed once) so seeding doesn't spend minutes in
+bcrypt. Logs are bulk-inserted straight into SQLite, then the daily
+rollups and current meal plans are written through the app's own
+database/rollups.py and database/meal_plan_store.py code.
+"""
+import random
+import sqlite3
+from datetime import date, timedelta
+from typing import Dict, List
+
+from ai_engine.meal_planner import generate_meal_plan
+from database import rollups
+from database.meal_plan_store import save_meal_plans, split_plan
+from utils.auth_helper import get_password_hash
+
+PASSWORD = "benchmark-password"
+MEAL_TYPES = ("breakfast", "lunch", "dinner", "snack")
+GOALS = ("lose weight", "maintain", "build muscle", "gain weight")
+ACTIVITY_LEVELS = ("low", "moderate", "high")
+ALLERGIES = ("", "", "", "peanuts", "dairy", "gluten", "shellfish")
+DIETS = ("", "", "", "vegetarian", "vegan", "pescatarian")
+FOODS = {
+    "breakfast": ("oatmeal with berries", "scrambled eggs and toast", "greek yogurt and granola"),
+    "lunch": ("chicken salad", "lentil soup", "turkey sandwich", "quinoa bowl"),
+    "dinner": ("salmon with rice", "tofu stir fry", "pasta with vegetables", "steak and potatoes"),
+    "snack": ("apple", "protein bar", "mixed nuts", "hummus and carrots"),
+}
+CALORIES = {"breakfast": (300, 550), "lunch": (450, 800), "dinner": (500, 900), "snack": (100, 300)}
+
+
+def email_for(index: int) -> str:
+    return f"bench-user-{index}@example.com"
+
+
+def _profile(rng: random.Random) -> Dict:
+    return {
+        "age": rng.randint(18, 75),
+        "weight": round(rng.uniform(50, 120), 1),
+        "height": round(rng.uniform(150, 200), 1),
+        "health_goals": rng.choice(GOALS),
+        "activity_level": rng.choice(ACTIVITY_LEVELS),
+        "dietary_preferences": rng.choice(DIETS),
+        "allergies": rng.choice(ALLERGIES),
+    }
+
+
+def _logs(rng: random.Random, user_id: int, first: date, days: int):
+    for offset in range(days):
+        # Users skip some days entirely and log 2-4 meals on the rest
+        if rng.random() < 0.2:
+            continue
+        day = first + timedelta(days=offset)
+        for meal_type in rng.sample(MEAL_TYPES, rng.randint(2, 4)):
+            low, high = CALORIES[meal_type]
+            calories = rng.randint(low, high)
+            yield (
+                user_id, day.isoformat(), meal_type, rng.choice(FOODS[meal_type]), calories,
+                round(calories * rng.uniform(0.05, 0.09), 2),
+                round(calories * rng.uniform(0.09, 0.14), 2),
+                round(calories * rng.uniform(0.02, 0.045), 2),
+            )
+
+
+def seed(path: str, users: int = 200, log_days: int = 730, plan_days: int = 7, seed: int = 42) -> List[Dict]:
+    """Fill the database at path; returns [{"user_id", "email"}] for the seeded users"""
+    rng = random.Random(seed)
+    password_hash = get_password_hash(PASSWORD)
+    today = date.today()
+    first_log_day = today - timedelta(days=log_days)
+
+    db = sqlite3.connect(path)
+    seeded, profiles = [], {}
+    with db:
+        for index in range(users):
+            cursor = db.execute(
+                "INSERT INTO users (email, password_hash) VALUES (?, ?)", (email_for(index), password_hash)
+            )
+            user_id = cursor.lastrowid
+            profile = _profile(rng)
+            db.execute(
+                "INSERT INTO user_profiles (user_id, age, weight, height, health_goals, activity_level, "
+                "dietary_preferences, allergies) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (user_id, *(profile[key] for key in (
+                    "age", "weight", "height", "health_goals", "activity_level", "dietary_preferences", "allergies"
+                )))
+            )
+            db.executemany(
+                "INSERT INTO meal_logs (user_id, meal_date, meal_type, food_items, calories, protein, carbs, fats) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                _logs(rng, user_id, first_log_day, log_days)
+            )
+            seeded.append({"user_id": user_id, "email": email_for(index)})
+            profiles[user_id] = profile
+    db.close()
+
+    rollups.rebuild([user["user_id"] for user in seeded])
+    if plan_days:
+        rows = []
+        for user_id, profile in profiles.items():
+            header, items = split_plan(generate_meal_plan(profile, plan_days, today))
+            rows.append((user_id, today, today + timedelta(days=plan_days - 1), header, items))
+        if save_meal_plans(rows) is None:
+            raise RuntimeError("Could not store seeded meal plans")
+    return seeded
@@ -0,0 +1,54 @@
+"""Latency summaries and report tables shared by the benchmark scripts"""
+import json
+from typing import Dict, List, Sequence
+
+
+def percentile(ordered: Sequence[float], q: float) -> float:
+    """q-th percentile (0-100) of already sorted samples, nearest-rank"""
+    if not ordered:
+        return 0.0
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(samples: Sequence[float], elapsed: float = None) -> Dict[str, float]:
+    """count, throughput and mean/p50/p95/p99/max in milliseconds for samples in seconds"""
+    ordered = sorted(samples)
+    summary = {
+        "count": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+    }
+    if elapsed:
+        summary["per_second"] = round(len(ordered) / elapsed, 1)
+    return summary
+
+
+def print_table(title: str, rows: Dict[str, Dict[str, float]]):
+    print(f"\n{title}")
+    print(f"  {'':<34} {'count':>7} {'errors':>6} {'req/s':>8} {'mean':>9} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for label, row in rows.items():
+        print(
+            f"  {label:<34} {row['count']:>7} {row.get('errors', 0):>6} {row.get('per_second', 0):>8.1f}"
+            f" {row['mean_ms']:>8.2f}ms {row['p50_ms']:>7.2f}ms {row['p95_ms']:>7.2f}ms {row['p99_ms']:>7.2f}ms"
+        )
+
+
+def compare(results: Dict, baseline_path: str, max_regression: float) -> List[str]:
+    """Labels whose p95 grew by more than max_regression (a fraction) over the baseline"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = []
+    for section, rows in results.items():
+        for label, row in rows.items():
+            before = baseline.get(section, {}).get(label)
+            if not before or not before.get("p95_ms"):
+                continue
+            if row["p95_ms"] > before["p95_ms"] * (1 + max_regression):
+                regressions.append(
+                    f"{section} / {label}: p95 {before['p95_ms']:.2f}ms -> {row['p95_ms']:.2f}ms"
+                )
+    return regressions
@@ -0,0 +1,197 @@
+"""Application settings, read from the environment once per process.
+
+``.env`` is loaded (without overriding variables already set) the first
+time this module is imported, then every setting is parsed into one frozen
+Settings object. Modules read their values from ``settings`` instead of
+calling os.getenv themselves, so whatever is imported first, every module
+sees the same configuration.
+"""
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import FrozenSet, Optional
+
+from dotenv import load_dotenv
+
+
+def _str(name: str, default: Optional[str] = None) -> Optional[str]:
+    return os.getenv(name, default)
+
+
+def _int(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
+
+
+def _float(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+
+def _bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.lower() in ('1', 'true', 'yes')
+
+
+@dataclass(frozen=True)
+class Settings:
+    # Database
+    database_host: str
+    database_port: int
+    database_user: str
+    database_password: Optional[str]
+    database_name: Optional[str]
+    database_pool_size: int
+    database_pool_timeout: float
+    database_pool_recycle: float
+    database_pool_idle_timeout: float
+    database_pool_ping_after: float
+    database_executor_workers: int
+    database_pool_warm: int
+
+    # Auth
+    secret_key: Optional[str]
+    algorithm: Optional[str]
+    access_token_expire_minutes: int
+    bcrypt_rounds: int
+    password_hash_executor: str
+    password_hash_workers: int
+    password_hash_max_queue: int
+    jwt_cache_size: int
+    jwt_cache_max_ttl: float
+    auth_user_cache_size: int
+    auth_user_cache_ttl: float
+    auth_trust_token_user_id: bool
+    admin_emails: FrozenSet[str]
+
+    # Caches
+    daily_totals_cache_size: int
+    daily_totals_ttl: float
+    plan_cache_size: int
+    plan_cache_max_ttl: float
+
+    # Meal catalog
+    meal_catalog_source: str
+    meal_catalog_path: Optional[str]
+    meal_catalog_reload_interval: float
+
+    # Jobs
+    plan_job_workers: int
+    plan_job_max_pending: int
+    batch_chunk_size: int
+    batch_workers: int
+    batch_active_user_days: int
+    batch_lock_path: str
+    job_poll_interval: float
+    job_retention_days: int
+
+    # API limits
+    job_max_wait_seconds: float
+    sse_keepalive_seconds: float
+    log_batch_max_items: int
+    history_max_limit: int
+    analytics_max_range_days: int
+    analytics_max_page_size: int
+
+    # Observability
+    log_level: str
+    log_levels: str
+    log_format: str
+    log_debug_sample_rate: float
+    metrics_enabled: bool
+    health_probe_interval: float
+    health_probe_timeout: float
+    health_stale_after: float
+
+    # serve.py
+    host: str
+    port: int
+    web_workers: int
+    web_backlog: int
+    web_graceful_timeout: int
+    web_worker_timeout: float
+    web_keepalive: int
+
+
+def load_settings() -> Settings:
+    """Parse every setting from the environment"""
+    pool_size = _int('DATABASE_POOL_SIZE', 10)
+    token_minutes = _int('ACCESS_TOKEN_EXPIRE_MINUTES', 30)
+    probe_interval = _float('HEALTH_PROBE_INTERVAL', 5)
+    cpus = os.cpu_count() or 1
+    return Settings(
+        database_host=_str('DATABASE_HOST', '127.0.0.1'),
+        database_port=_int('DATABASE_PORT', 3307),
+        database_user=_str('DATABASE_USER', 'root'),
+        database_password=_str('DATABASE_PASSWORD'),
+        database_name=_str('DATABASE_NAME'),
+        database_pool_size=pool_size,
+        database_pool_timeout=_float('DATABASE_POOL_TIMEOUT', 5),
+        database_pool_recycle=_float('DATABASE_POOL_RECYCLE', 1800),
+        database_pool_idle_timeout=_float('DATABASE_POOL_IDLE_TIMEOUT', 300),
+        database_pool_ping_after=_float('DATABASE_POOL_PING_AFTER', 30),
+        database_executor_workers=_int('DATABASE_EXECUTOR_WORKERS', pool_size),
+        database_pool_warm=_int('DATABASE_POOL_WARM', 1),
+
+        secret_key=_str('SECRET_KEY'),
+        algorithm=_str('ALGORITHM'),
+        access_token_expire_minutes=token_minutes,
+        bcrypt_rounds=_int('BCRYPT_ROUNDS', 12),
+        password_hash_executor=_str('PASSWORD_HASH_EXECUTOR', 'thread'),
+        password_hash_workers=_int('PASSWORD_HASH_WORKERS', cpus),
+        password_hash_max_queue=_int('PASSWORD_HASH_MAX_QUEUE', 256),
+        jwt_cache_size=_int('JWT_CACHE_SIZE', 50000),
+        jwt_cache_max_ttl=_float('JWT_CACHE_MAX_TTL', token_minutes * 60),
+        auth_user_cache_size=_int('AUTH_USER_CACHE_SIZE', 10000),
+        auth_user_cache_ttl=_float('AUTH_USER_CACHE_TTL', 300),
+        auth_trust_token_user_id=_bool('AUTH_TRUST_TOKEN_USER_ID', True),
+        admin_emails=frozenset(
+            email.strip().lower() for email in _str('ADMIN_EMAILS', '').split(',') if email.strip()
+        ),
+
+        daily_totals_cache_size=_int('DAILY_TOTALS_CACHE_SIZE', 20000),
+        daily_totals_ttl=_float('DAILY_TOTALS_TTL', 60),
+        plan_cache_size=_int('PLAN_CACHE_SIZE', 10000),
+        plan_cache_max_ttl=_float('PLAN_CACHE_MAX_TTL', 600),
+
+        meal_catalog_source=_str('MEAL_CATALOG_SOURCE', 'file'),
+        meal_catalog_path=_str('MEAL_CATALOG_PATH'),
+        meal_catalog_reload_interval=_float('MEAL_CATALOG_RELOAD_INTERVAL', 30),
+
+        plan_job_workers=_int('PLAN_JOB_WORKERS', 4),
+        plan_job_max_pending=_int('PLAN_JOB_MAX_PENDING', 256),
+        batch_chunk_size=_int('BATCH_CHUNK_SIZE', 500),
+        batch_workers=_int('BATCH_WORKERS', cpus),
+        batch_active_user_days=_int('BATCH_ACTIVE_USER_DAYS', 30),
+        batch_lock_path=_str('BATCH_LOCK_PATH', os.path.join(tempfile.gettempdir(), 'meal-planner-batch.lock')),
+        job_poll_interval=_float('JOB_POLL_INTERVAL', 0.5),
+        job_retention_days=_int('JOB_RETENTION_DAYS', 7),
+
+        job_max_wait_seconds=_float('JOB_MAX_WAIT_SECONDS', 30),
+        sse_keepalive_seconds=_float('SSE_KEEPALIVE_SECONDS', 15),
+        log_batch_max_items=_int('LOG_BATCH_MAX_ITEMS', 500),
+        history_max_limit=_int('HISTORY_MAX_LIMIT', 200),
+        analytics_max_range_days=_int('ANALYTICS_MAX_RANGE_DAYS', 731),
+        analytics_max_page_size=_int('ANALYTICS_MAX_PAGE_SIZE', 366),
+
+        log_level=_str('LOG_LEVEL', 'INFO').upper(),
+        log_levels=_str('LOG_LEVELS', ''),
+        log_format=_str('LOG_FORMAT', 'json').lower(),
+        log_debug_sample_rate=_float('LOG_DEBUG_SAMPLE_RATE', 1.0),
+        metrics_enabled=_bool('METRICS_ENABLED', True),
+        health_probe_interval=probe_interval,
+        health_probe_timeout=_float('HEALTH_PROBE_TIMEOUT', 2),
+        health_stale_after=_float('HEALTH_STALE_AFTER', probe_interval * 3),
+
+        host=_str('HOST', '0.0.0.0'),
+        port=_int('PORT', 8000),
+        web_workers=_int('WEB_WORKERS', cpus),
+        web_backlog=_int('WEB_BACKLOG', 2048),
+        web_graceful_timeout=_int('WEB_GRACEFUL_TIMEOUT', 30),
+        web_worker_timeout=_float('WEB_WORKER_TIMEOUT', 60),
+        web_keepalive=_int('WEB_KEEPALIVE', 5),
+    )
+
+
+load_dotenv()
+settings = load_settings()
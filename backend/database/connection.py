@@ -1,53 +1,448 @@
 import mysql.connector
 from mysql.connector import Error
+import asyncio
+import contextvars
+import functools
+import logging
 import os
-from dotenv import load_dotenv
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from config import settings
+from utils.metrics import db_query_duration, db_query_errors, query_label
 
-load_dotenv()
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = settings.database_pool_size
+POOL_TIMEOUT = settings.database_pool_timeout
+POOL_RECYCLE = settings.database_pool_recycle
+POOL_IDLE_TIMEOUT = settings.database_pool_idle_timeout
+POOL_PING_AFTER = settings.database_pool_ping_after
+# One executor thread per pooled connection: threads never queue on the pool.
+EXECUTOR_WORKERS = settings.database_executor_workers
+# Connections opened during app startup so early requests don't pay for them
+POOL_WARM = settings.database_pool_warm
+
+
+class PoolTimeoutError(Error):
+    """Raised when no pooled connection frees up within the checkout timeout"""
+
+
+def _connect(**overrides):
+    """Open a new MySQL connection, raising Error on failure"""
+    options = dict(
+        host=settings.database_host,
+        user=settings.database_user,
+        password=settings.database_password,
+        database=settings.database_name,
+        port=settings.database_port,
+        auth_plugin='mysql_native_password',
+        charset='utf8mb4',
+        use_unicode=True
+    )
+    options.update(overrides)
+    return mysql.connector.connect(**options)
 
 def get_db_connection():
     """Create and return a database connection"""
     try:
-        connection = mysql.connector.connect(
-            host=os.getenv('DATABASE_HOST', '127.0.0.1'),
-            user=os.getenv('DATABASE_USER', 'root'),
-            password=os.getenv('DATABASE_PASSWORD'),
-            database=os.getenv('DATABASE_NAME'),
-            port=int(os.getenv('DATABASE_PORT', 3307)),
-            auth_plugin='mysql_native_password',  
-            charset='utf8mb4',
-            use_unicode=True
-        )
+        connection = _connect()
         if connection.is_connected():
-            # Remove or comment this line to reduce console spam
-            # print(f"✅ Successfully connected to MySQL Server version {connection.get_server_info()}")
+            logger.debug("Connected to MySQL Server version %s", connection.get_server_info())
             return connection
     except Error as e:
-        print(f"❌ Error connecting to MySQL: {e}")
-        print(f"Host: {os.getenv('DATABASE_HOST')}")
-        print(f"User: {os.getenv('DATABASE_USER')}")
-        print(f"Database: {os.getenv('DATABASE_NAME')}")
+        logger.error(
+            "Error connecting to MySQL: %s", e,
+            extra={"db_host": settings.database_host, "db_user": settings.database_user,
+                   "db_name": settings.database_name}
+        )
         return None
 
+
+class _PooledConnection:
+    __slots__ = ("connection", "created_at", "last_used")
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.created_at = self.last_used = time.monotonic()
+
+
+class ConnectionPool:
+    """Bounded pool of reusable MySQL connections.
+
+    Connections are handed out most-recently-used first so a small hot set
+    stays warm while the rest age out after ``idle_timeout``. A connection
+    idle for longer than ``ping_after`` is pinged before reuse, and one older
+    than ``recycle`` seconds is replaced. When all ``size`` connections are
+    checked out, callers wait up to ``timeout`` seconds before
+    PoolTimeoutError is raised.
+    """
+
+    def __init__(self, size=POOL_SIZE, timeout=POOL_TIMEOUT, recycle=POOL_RECYCLE,
+                 idle_timeout=POOL_IDLE_TIMEOUT, ping_after=POOL_PING_AFTER, factory=None):
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.recycle = recycle
+        self.idle_timeout = idle_timeout
+        self.ping_after = ping_after
+        # Pooled connections run in autocommit mode so a reused connection
+        # never serves reads from a stale REPEATABLE READ snapshot.
+        self._factory = factory or (lambda: _connect(autocommit=True))
+        self._idle = deque()
+        self._open = 0
+        self._cond = threading.Condition()
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_seconds": 0.0,
+            "timeouts": 0,
+            "created": 0,
+            "closed": 0,
+            "recycled": 0,
+            "health_check_failures": 0,
+        }
+
+    def acquire(self):
+        """Check out a healthy connection, waiting if the pool is exhausted"""
+        deadline = None
+        waited_since = None
+        while True:
+            with self._cond:
+                while not self._idle and self._open >= self.size:
+                    if deadline is None:
+                        deadline = time.monotonic() + self.timeout
+                        waited_since = time.monotonic()
+                        self._stats["waits"] += 1
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        self._stats["wait_seconds"] += time.monotonic() - waited_since
+                        raise PoolTimeoutError(
+                            msg=f"Connection pool exhausted ({self.size} connections in use)"
+                        )
+                    self._cond.wait(remaining)
+                if waited_since is not None:
+                    self._stats["wait_seconds"] += time.monotonic() - waited_since
+                    waited_since = None
+                self._stats["checkouts"] += 1
+                pooled = self._idle.pop() if self._idle else None
+                if pooled is None:
+                    self._open += 1
+
+            if pooled is None:
+                return self._create()
+            if self._is_usable(pooled):
+                return pooled
+            self._discard(pooled)
+
+    def release(self, pooled, discard=False):
+        """Return a connection to the pool, or close it if it is no longer usable"""
+        if discard:
+            self._discard(pooled)
+            return
+        now = time.monotonic()
+        pooled.last_used = now
+        stale = []
+        with self._cond:
+            self._idle.append(pooled)
+            while self._idle and now - self._idle[0].last_used > self.idle_timeout:
+                stale.append(self._idle.popleft())
+            self._cond.notify()
+        for item in stale:
+            self._discard(item)
+
+    @contextmanager
+    def connection(self):
+        """Context manager yielding a pooled raw connection"""
+        pooled = self.acquire()
+        try:
+            yield pooled.connection
+        except Error:
+            self.release(pooled, discard=not self._still_connected(pooled))
+            raise
+        except BaseException:
+            self.release(pooled, discard=True)
+            raise
+        else:
+            self.release(pooled)
+
+    def stats(self):
+        """Snapshot of pool occupancy and checkout counters"""
+        with self._cond:
+            snapshot = dict(self._stats)
+            snapshot.update(
+                max_size=self.size,
+                open=self._open,
+                idle=len(self._idle),
+                in_use=self._open - len(self._idle),
+            )
+        return snapshot
+
+    def connect_unpooled(self):
+        """Open a connection the pool doesn't track, with the pool's settings"""
+        return self._factory()
+
+    def warm(self, count):
+        """Open connections until count are idle (capped at size); returns the idle count"""
+        held = []
+        try:
+            while len(held) < min(count, self.size):
+                held.append(self.acquire())
+        finally:
+            for pooled in held:
+                self.release(pooled)
+        return len(held)
+
+    def close_all(self):
+        """Close every idle connection; checked-out ones close on release"""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+        for pooled in idle:
+            self._discard(pooled)
+
+    def _create(self):
+        try:
+            pooled = _PooledConnection(self._factory())
+        except BaseException:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._stats["created"] += 1
+        return pooled
+
+    def _is_usable(self, pooled):
+        now = time.monotonic()
+        if now - pooled.created_at > self.recycle:
+            with self._cond:
+                self._stats["recycled"] += 1
+            return False
+        if now - pooled.last_used > self.ping_after:
+            try:
+                pooled.connection.ping(reconnect=False)
+            except Error:
+                with self._cond:
+                    self._stats["health_check_failures"] += 1
+                return False
+        return True
+
+    @staticmethod
+    def _still_connected(pooled):
+        try:
+            return pooled.connection.is_connected()
+        except Exception:
+            return False
+
+    def _discard(self, pooled):
+        try:
+            pooled.connection.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._open -= 1
+            self._stats["closed"] += 1
+            self._cond.notify()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Return the process-wide connection pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
+
 def execute_query(query, params=None):
     """Execute a query and return results"""
-    connection = get_db_connection()
-    if connection:
-        try:
+    label = query_label(query)
+    start = time.perf_counter()
+    try:
+        with get_pool().connection() as connection:
             cursor = connection.cursor(dictionary=True)
-            cursor.execute(query, params or ())
-            if query.strip().upper().startswith('SELECT'):
-                result = cursor.fetchall()
-            else:
+            try:
+                cursor.execute(query, params or ())
+                if cursor.with_rows:
+                    return cursor.fetchall()
+                return cursor.lastrowid
+            finally:
+                cursor.close()
+    except PoolTimeoutError as e:
+        db_query_errors.inc(label)
+        logger.error("Database unavailable: %s", e)
+        return None
+    except Error as e:
+        db_query_errors.inc(label)
+        logger.error("Error executing query: %s", e, extra={"query": " ".join(query.split())})
+        return None
+    finally:
+        db_query_duration.observe(time.perf_counter() - start, label)
+
+def execute_many(query, seq_params):
+    """Execute a write once per parameter tuple in a single transaction.
+
+    mysql-connector rewrites ``INSERT ... VALUES (...)`` into one multi-row
+    statement, so a whole batch costs one round trip. Returns the number of
+    affected rows, or None on error (in which case nothing is written).
+    """
+    seq_params = list(seq_params)
+    if not seq_params:
+        return 0
+    label = query_label(query)
+    start = time.perf_counter()
+    try:
+        with get_pool().connection() as connection:
+            cursor = connection.cursor()
+            try:
+                connection.start_transaction()
+                cursor.executemany(query, seq_params)
                 connection.commit()
-                result = cursor.lastrowid
-            cursor.close()
-            return result
-        except Error as e:
-            print(f"❌ Error executing query: {e}")
-            print(f"Query: {query}")
-            return None
-        finally:
-            if connection.is_connected():
+                return cursor.rowcount
+            except Error:
+                connection.rollback()
+                raise
+            finally:
+                cursor.close()
+    except PoolTimeoutError as e:
+        db_query_errors.inc(label)
+        logger.error("Database unavailable: %s", e)
+        return None
+    except Error as e:
+        db_query_errors.inc(label)
+        logger.error("Error executing batch: %s", e, extra={"query": " ".join(query.split())})
+        return None
+    finally:
+        db_query_duration.observe(time.perf_counter() - start, label)
+
+@contextmanager
+def transaction():
+    """Yield a dictionary cursor whose statements commit together.
+
+    Any exception inside the block rolls the transaction back and is
+    re-raised; database errors surface as mysql.connector Error rather
+    than the None that execute_query returns. The block's duration is
+    recorded under the "transaction" query label.
+    """
+    start = time.perf_counter()
+    try:
+        with get_pool().connection() as connection:
+            cursor = connection.cursor(dictionary=True)
+            try:
+                connection.start_transaction()
+                yield cursor
+                connection.commit()
+            except BaseException:
+                connection.rollback()
+                raise
+            finally:
+                cursor.close()
+    except Error:
+        db_query_errors.inc("transaction")
+        raise
+    finally:
+        db_query_duration.observe(time.perf_counter() - start, "transaction")
+
+_probe_connection = None
+_probe_lock = threading.Lock()
+
+def ping_database():
+    """Round-trip a SELECT 1 on a dedicated connection, raising Error on failure.
+
+    The connection lives outside the pool, so a probe neither waits behind
+    nor takes a slot from request traffic, and is kept between calls so a
+    probe costs one round trip rather than a new connection.
+    """
+    global _probe_connection
+    with _probe_lock:
+        if _probe_connection is None:
+            _probe_connection = get_pool().connect_unpooled()
+        try:
+            cursor = _probe_connection.cursor()
+            try:
+                cursor.execute("SELECT 1")
+                cursor.fetchall()
+            finally:
+                cursor.close()
+        except Exception:
+            connection, _probe_connection = _probe_connection, None
+            try:
                 connection.close()
-    return None
\ No newline at end of file
+            except Exception:
+                pass
+            raise
+
+_executor = None
+
+def get_executor():
+    """Return the thread pool that runs blocking queries off the event loop"""
+    global _executor
+    if _executor is None:
+        with _pool_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=max(1, EXECUTOR_WORKERS),
+                    thread_name_prefix="db"
+                )
+    return _executor
+
+def shutdown_database():
+    """Close the pool's idle connections, the probe connection and the executor.
+
+    Runs at app shutdown. Everything is recreated on next use, so a process
+    that starts the app again (tests, benchmarks) keeps working.
+    """
+    global _executor, _probe_connection
+    with _pool_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+    if _pool is not None:
+        _pool.close_all()
+    with _probe_lock:
+        connection, _probe_connection = _probe_connection, None
+    if connection is not None:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+# Connections a forked child inherited from its parent; see _forget_after_fork
+_inherited = []
+
+def _forget_after_fork():
+    """Start the child of a fork with no pool, probe connection or executor.
+
+    The child shares its parent's sockets, so using them would interleave
+    two processes' traffic on one MySQL session, and even closing them sends
+    COM_QUIT on the parent's behalf. They are kept referenced (never
+    finalized) and the child opens its own connections on first use.
+    """
+    global _pool, _pool_lock, _executor, _probe_connection, _probe_lock
+    _inherited.append((_pool, _probe_connection))
+    _pool, _executor, _probe_connection = None, None, None
+    _pool_lock, _probe_lock = threading.Lock(), threading.Lock()
+
+os.register_at_fork(after_in_child=_forget_after_fork)
+
+async def execute_query_async(query, params=None):
+    """Execute a query on the database executor and return results.
+
+    Same semantics as execute_query (list of dict rows for reads, lastrowid
+    for writes, None on error) but the event loop stays free while MySQL
+    works, so other requests on the worker keep being served.
+    """
+    return await run_in_db_executor(execute_query, query, params)
+
+async def run_in_db_executor(func, *args):
+    """Run a blocking database function on the database executor"""
+    loop = asyncio.get_running_loop()
+    # Carry the caller's context (request ID) into the worker thread
+    call = functools.partial(contextvars.copy_context().run, func, *args)
+    return await loop.run_in_executor(get_executor(), call)
@@ -0,0 +1,47 @@
+"""Background job rows shared by every worker.
+
+The process running a job writes its status to the ``jobs`` table as it
+goes (see jobs/registry.py), so under serve.py a status request can be
+answered by whichever worker receives it. ``job_data`` holds the job as
+the status endpoints return it; ``owner_pid`` is the process running it.
+"""
+import os
+from typing import Dict, List, Optional
+
+from database.connection import execute_query
+from utils.serialization import dumps_text
+
+SAVE_JOB_QUERY = """
+    INSERT INTO jobs (job_id, kind, status, owner_pid, job_data, created_at, updated_at)
+    VALUES (%s, %s, %s, %s, %s, NOW(), NOW())
+    ON DUPLICATE KEY UPDATE status = VALUES(status), job_data = VALUES(job_data), updated_at = NOW()
+"""
+LOAD_JOB_QUERY = "SELECT status, owner_pid, job_data FROM jobs WHERE job_id = %s"
+LIST_JOBS_QUERY = """
+    SELECT status, owner_pid, job_data FROM jobs
+    WHERE kind = %s
+    ORDER BY created_at DESC
+    LIMIT %s
+"""
+PRUNE_JOBS_QUERY = "DELETE FROM jobs WHERE created_at < CURDATE() - INTERVAL %s DAY"
+
+
+def save_job(job_id: str, kind: str, status: str, job_data: Dict) -> bool:
+    """Insert or update a job's row; returns False on error"""
+    return execute_query(SAVE_JOB_QUERY, (job_id, kind, status, os.getpid(), dumps_text(job_data))) is not None
+
+
+def load_job(job_id: str) -> Optional[Dict]:
+    """The job's row (status, owner_pid, job_data), or None if missing or on error"""
+    rows = execute_query(LOAD_JOB_QUERY, (job_id,))
+    return rows[0] if rows else None
+
+
+def list_jobs(kind: str, limit: int) -> Optional[List[Dict]]:
+    """The newest rows of one kind of job, or None on error"""
+    return execute_query(LIST_JOBS_QUERY, (kind, limit))
+
+
+def prune_jobs(retention_days: int):
+    """Forget jobs created more than retention_days ago"""
+    execute_query(PRUNE_JOBS_QUERY, (retention_days,))
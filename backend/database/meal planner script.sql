@@ -63,3 +63,88 @@ ON meal_logs(user_id, meal_date);
 CREATE INDEX idx_progress_user_date
 ON progress_tracking(user_id, date);
 
+
+CREATE TABLE meals (
+    meal_id INT AUTO_INCREMENT PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    meal_type ENUM('breakfast', 'lunch', 'dinner', 'snack') NOT NULL,
+    calories DECIMAL(7,2) NOT NULL,
+    protein DECIMAL(6,2) DEFAULT 0,
+    carbs DECIMAL(6,2) DEFAULT 0,
+    fats DECIMAL(6,2) DEFAULT 0,
+    tags VARCHAR(255),     -- comma-separated dietary tags, e.g. 'vegetarian,gluten_free'
+    allergens VARCHAR(255), -- comma-separated allergens, see ai_engine/dietary.py
+    active BOOLEAN NOT NULL DEFAULT TRUE,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_meals_type_calories
+ON meals(meal_type, calories);
+
+-- Bitmasks normalized from allergies / dietary_preferences on profile update;
+-- NULL until the profile is next saved, in which case plans parse the text
+ALTER TABLE user_profiles
+    ADD COLUMN allergen_mask INT UNSIGNED NULL,
+    ADD COLUMN diet_mask INT UNSIGNED NULL;
+
+-- Negated diets ("non-vegetarian", "not vegan") used to be stored as required;
+-- clear masks that require a diet so they are parsed again
+UPDATE user_profiles SET allergen_mask = NULL, diet_mask = NULL WHERE diet_mask <> 0;
+
+-- Daily targets computed on profile update, and the digest of the profile
+-- fields they were computed from (see ai_engine/nutrition.py)
+ALTER TABLE user_profiles
+    ADD COLUMN nutrition_targets JSON NULL,
+    ADD COLUMN targets_fingerprint CHAR(16) NULL;
+
+-- One row per planned meal; meal_plans.plan_data then only holds plan-level
+-- fields (see database/meal_plan_store.py)
+CREATE TABLE meal_plan_items (
+    item_id INT AUTO_INCREMENT PRIMARY KEY,
+    plan_id INT NOT NULL,
+    meal_date DATE NOT NULL,
+    meal_type ENUM('breakfast', 'lunch', 'dinner', 'snack') NOT NULL,
+    meal_id INT NULL,       -- catalog meal, NULL for custom meals
+    meal_data JSON NOT NULL, -- the meal as served, including user changes
+    version INT NOT NULL DEFAULT 1,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+
+    FOREIGN KEY (plan_id) REFERENCES meal_plans(plan_id)
+        ON DELETE CASCADE,
+
+    UNIQUE KEY uq_plan_items_slot (plan_id, meal_date, meal_type)
+);
+
+-- FALSE for plans whose meals are still only inside plan_data
+ALTER TABLE meal_plans
+    ADD COLUMN normalized BOOLEAN NOT NULL DEFAULT FALSE;
+
+-- Per-day totals maintained by meal logging (see database/rollups.py);
+-- backfill existing logs with: python -m database.rollups rebuild
+ALTER TABLE progress_tracking
+    ADD COLUMN total_protein DECIMAL(9,2) NOT NULL DEFAULT 0,
+    ADD COLUMN total_carbs DECIMAL(9,2) NOT NULL DEFAULT 0,
+    ADD COLUMN total_fats DECIMAL(9,2) NOT NULL DEFAULT 0,
+    ADD COLUMN meal_count INT NOT NULL DEFAULT 0,
+    ADD COLUMN updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP;
+
+-- Client-generated key of logs sent through /tracking/log/batch, so
+-- replayed offline syncs don't log a meal twice
+ALTER TABLE meal_logs
+    ADD COLUMN client_log_id VARCHAR(64) NULL,
+    ADD UNIQUE KEY uq_meal_logs_client (user_id, client_log_id);
+
+-- Background jobs (see jobs/registry.py). The worker running a job keeps
+-- its row current, so any serve.py worker can report on it
+CREATE TABLE jobs (
+    job_id CHAR(32) PRIMARY KEY,
+    kind VARCHAR(32) NOT NULL,
+    status VARCHAR(16) NOT NULL,
+    owner_pid INT NOT NULL,  -- process running the job
+    job_data JSON NOT NULL,  -- the job as the status endpoints return it
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_jobs_kind_created
+ON jobs(kind, created_at);
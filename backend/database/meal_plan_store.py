@@ -0,0 +1,201 @@
+"""Meal plan persistence.
+
+A plan is a meal_plans row plus one meal_plan_items row per
+(date, meal_type). The row's plan_data keeps only plan-level fields such
+as nutritional_target, so changing one meal is a single-row UPDATE
+guarded by that item's version, and a date window is an index range scan.
+
+Plans saved before items existed (normalized = FALSE) still keep every
+meal inside plan_data. They are read from the blob and converted to items
+the first time one of their meals is changed.
+
+Every successful write drops the user's cached /meal-plan/current
+response (utils/plan_cache.py).
+"""
+import logging
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from mysql.connector import Error
+
+from database.connection import execute_query, transaction
+from utils.plan_cache import current_plan_cache
+from utils.serialization import dumps_text, loads
+
+logger = logging.getLogger(__name__)
+
+INSERT_PLAN_QUERY = """
+    INSERT INTO meal_plans (user_id, created_at, start_date, end_date, plan_data, normalized)
+    VALUES (%s, NOW(), %s, %s, %s, TRUE)
+"""
+INSERT_ITEM_QUERY = """
+    INSERT INTO meal_plan_items (plan_id, meal_date, meal_type, meal_id, meal_data)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+# Write a slot whatever its version; affected rows is 1 or 2
+UPSERT_ITEM_QUERY = INSERT_ITEM_QUERY + """
+    ON DUPLICATE KEY UPDATE meal_id = VALUES(meal_id), meal_data = VALUES(meal_data), version = version + 1
+"""
+# Fill a slot only if it is empty; affected rows is 0 if it already exists
+FILL_ITEM_QUERY = INSERT_ITEM_QUERY + """
+    ON DUPLICATE KEY UPDATE plan_id = plan_id
+"""
+UPDATE_ITEM_QUERY = """
+    UPDATE meal_plan_items
+    SET meal_id = %s, meal_data = %s, version = version + 1
+    WHERE plan_id = %s AND meal_date = %s AND meal_type = %s AND version = %s
+"""
+
+# (meal_date, meal_type, meal_id, meal_data_json)
+ItemRow = Tuple[str, str, Optional[int], str]
+
+
+def _date_key(value) -> str:
+    return value.strftime("%Y-%m-%d") if isinstance(value, (date, datetime)) else str(value)
+
+
+def split_plan(plan_data: Dict[str, Any]) -> Tuple[str, List[ItemRow]]:
+    """Split a generated plan into its plan_data header JSON and item rows"""
+    header = {key: value for key, value in plan_data.items() if key != "meals"}
+    items = [
+        (meal_date, meal_type, meal.get('meal_id'), dumps_text(meal))
+        for meal_date, day in plan_data.get("meals", {}).items()
+        for meal_type, meal in day.items()
+    ]
+    return dumps_text(header), items
+
+
+def _insert_plan(cursor, user_id, start_date, end_date, header: str, items: List[ItemRow]) -> int:
+    cursor.execute(INSERT_PLAN_QUERY, (user_id, start_date, end_date, header))
+    plan_id = cursor.lastrowid
+    if items:
+        cursor.executemany(INSERT_ITEM_QUERY, [(plan_id,) + item for item in items])
+    return plan_id
+
+
+def save_meal_plan(user_id: int, start_date, end_date, plan_data: Dict[str, Any]) -> Optional[int]:
+    """Store one generated plan and return its plan_id"""
+    header, items = split_plan(plan_data)
+    try:
+        with transaction() as cursor:
+            plan_id = _insert_plan(cursor, user_id, start_date, end_date, header, items)
+    except Error as e:
+        logger.error("Error saving meal plan: %s", e)
+        return None
+    current_plan_cache.invalidate(user_id)
+    return plan_id
+
+
+def save_meal_plans(rows: Iterable[Tuple[int, Any, Any, str, List[ItemRow]]]) -> Optional[int]:
+    """Store many plans in one transaction.
+
+    rows are (user_id, start_date, end_date, header_json, items) tuples as
+    produced with split_plan. Returns the number of plans written, or None
+    if the batch failed (in which case nothing is written).
+    """
+    rows = list(rows)
+    try:
+        with transaction() as cursor:
+            for user_id, start_date, end_date, header, items in rows:
+                _insert_plan(cursor, user_id, start_date, end_date, header, items)
+    except Error as e:
+        logger.error("Error saving meal plan batch: %s", e)
+        return None
+    for row in rows:
+        current_plan_cache.invalidate(row[0])
+    return len(rows)
+
+
+def load_plan_meals(plan: Dict[str, Any], start_date=None, end_date=None,
+                    decode: Callable[[Any], Any] = loads) -> Tuple[Dict, Dict]:
+    """Meals of a plan row between start_date and end_date (inclusive).
+
+    plan must carry plan_id, normalized and plan_data (as loaded from
+    meal_plans). Returns ({date: {meal_type: meal}}, {date: {meal_type: version}});
+    meals of blob-only plans are at version 1, as they will be once converted.
+    Stored meal JSON is passed through decode, so callers that only re-send
+    it can pass utils.serialization.json_fragment and skip parsing.
+    Returns (None, None) if the items could not be read.
+    """
+    start_key = _date_key(start_date) if start_date else None
+    end_key = _date_key(end_date) if end_date else None
+
+    if not plan.get('normalized'):
+        meals = loads(plan['plan_data']).get("meals", {})
+        window = {
+            day: dict(day_meals) for day, day_meals in meals.items()
+            if (start_key is None or day >= start_key) and (end_key is None or day <= end_key)
+        }
+        return window, {day: {meal_type: 1 for meal_type in day_meals} for day, day_meals in window.items()}
+
+    query = "SELECT meal_date, meal_type, meal_data, version FROM meal_plan_items WHERE plan_id = %s"
+    params = [plan['plan_id']]
+    if start_date:
+        query += " AND meal_date >= %s"
+        params.append(start_date)
+    if end_date:
+        query += " AND meal_date <= %s"
+        params.append(end_date)
+    rows = execute_query(query + " ORDER BY meal_date", tuple(params))
+    if rows is None:
+        return None, None
+
+    meals, versions = {}, {}
+    for row in rows:
+        day = _date_key(row['meal_date'])
+        meals.setdefault(day, {})[row['meal_type']] = decode(row['meal_data'])
+        versions.setdefault(day, {})[row['meal_type']] = row['version']
+    return meals, versions
+
+
+def _normalize_legacy_plan(cursor, plan: Dict[str, Any]):
+    """Move a blob-only plan's meals into item rows (no-op if already done)"""
+    plan_data = loads(plan['plan_data'])
+    header, items = split_plan(plan_data)
+    cursor.execute(
+        "UPDATE meal_plans SET plan_data = %s, normalized = TRUE WHERE plan_id = %s AND normalized = FALSE",
+        (header, plan['plan_id'])
+    )
+    if cursor.rowcount and items:
+        cursor.executemany(INSERT_ITEM_QUERY, [(plan['plan_id'],) + item for item in items])
+
+
+def update_plan_meal(plan: Dict[str, Any], meal_date, meal_type: str, meal: Dict[str, Any],
+                     expected_version: Optional[int] = None) -> Tuple[str, Optional[int]]:
+    """Replace one meal of a plan (a meal_plans row with plan_id, user_id,
+    normalized and plan_data).
+
+    With expected_version the write only happens if the stored item is
+    still at that version (0 = only if the slot is empty); without it the
+    meal is overwritten unconditionally. Returns (outcome, version) where
+    outcome is "updated", "conflict" (version is then the current one) or
+    "error".
+    """
+    meal_json = dumps_text(meal)
+    key = (plan['plan_id'], meal_date, meal_type)
+    try:
+        with transaction() as cursor:
+            if not plan.get('normalized'):
+                _normalize_legacy_plan(cursor, plan)
+
+            values = key + (meal.get('meal_id'), meal_json)
+            if expected_version is None:
+                cursor.execute(UPSERT_ITEM_QUERY, values)
+            elif expected_version == 0:
+                cursor.execute(FILL_ITEM_QUERY, values)
+            else:
+                cursor.execute(UPDATE_ITEM_QUERY, (meal.get('meal_id'), meal_json) + key + (expected_version,))
+            changed = cursor.rowcount > 0
+
+            cursor.execute(
+                "SELECT version FROM meal_plan_items WHERE plan_id = %s AND meal_date = %s AND meal_type = %s",
+                key
+            )
+            row = cursor.fetchone()
+            version = row['version'] if row else 0
+    except Error as e:
+        logger.error("Error updating plan meal: %s", e)
+        return "error", None
+    if changed:
+        current_plan_cache.invalidate(plan['user_id'])
+    return ("updated" if changed else "conflict"), version
@@ -0,0 +1,313 @@
+"""Per-day nutrition totals kept in progress_tracking.
+
+Logging a meal inserts the meal_logs row and adds it to that day's
+progress_tracking row in the same transaction, so progress views read one
+pre-aggregated row per day instead of summing raw logs. Committed logs
+are also added to the in-memory totals in utils/daily_totals.py.
+
+Usage:
+  python -m database.rollups rebuild [user_id ...]   recompute from meal_logs
+  python -m database.rollups check [--fix] [user_id ...]
+                                                     compare against meal_logs
+"""
+import logging
+import sys
+import time
+from collections import defaultdict
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from mysql.connector import Error, errorcode
+
+from database.connection import execute_query, transaction
+from utils.daily_totals import as_totals, daily_totals, empty_totals
+
+logger = logging.getLogger(__name__)
+
+USER_CHUNK_SIZE = 500
+ROLLUP_FIELDS = ("total_calories", "total_protein", "total_carbs", "total_fats", "meal_count")
+
+INSERT_LOG_QUERY = """
+    INSERT INTO meal_logs (user_id, meal_date, meal_type, food_items, calories, protein, carbs, fats)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+"""
+# Columns round each value to their own precision on insert, same as the
+# meal_logs columns do, so running totals match SUMs over meal_logs exactly
+UPSERT_DAY_QUERY = """
+    INSERT INTO progress_tracking
+        (user_id, date, total_calories, total_protein, total_carbs, total_fats, meal_count)
+    VALUES (%s, %s, %s, COALESCE(%s, 0), COALESCE(%s, 0), COALESCE(%s, 0), %s)
+    ON DUPLICATE KEY UPDATE
+        total_calories = total_calories + VALUES(total_calories),
+        total_protein = total_protein + VALUES(total_protein),
+        total_carbs = total_carbs + VALUES(total_carbs),
+        total_fats = total_fats + VALUES(total_fats),
+        meal_count = meal_count + VALUES(meal_count)
+"""
+DAY_TOTALS_QUERY = """
+    SELECT total_calories AS calories, total_protein AS protein, total_carbs AS carbs,
+           total_fats AS fats, meal_count
+    FROM progress_tracking
+    WHERE user_id = %s AND date = %s
+"""
+DAILY_ROLLUPS_QUERY = """
+    SELECT date AS meal_date, total_calories, total_protein, total_carbs, total_fats, meal_count
+    FROM progress_tracking
+    WHERE user_id = %s AND date BETWEEN %s AND %s AND meal_count > 0
+    ORDER BY date
+"""
+_AGGREGATE_LOGS = """
+    SELECT user_id, meal_date,
+           COALESCE(SUM(calories), 0) AS total_calories,
+           COALESCE(SUM(protein), 0) AS total_protein,
+           COALESCE(SUM(carbs), 0) AS total_carbs,
+           COALESCE(SUM(fats), 0) AS total_fats,
+           COUNT(*) AS meal_count
+    FROM meal_logs
+    WHERE user_id IN ({users})
+    GROUP BY user_id, meal_date
+"""
+
+
+def insert_meal_log(user_id: int, meal_date, meal_type: str, food_items: str,
+                    calories, protein, carbs, fats) -> Optional[int]:
+    """Insert a meal log and add it to the day's totals; returns log_id (None on error)"""
+    try:
+        with transaction() as cursor:
+            cursor.execute(
+                INSERT_LOG_QUERY,
+                (user_id, meal_date, meal_type, food_items, calories, protein, carbs, fats)
+            )
+            log_id = cursor.lastrowid
+            cursor.execute(UPSERT_DAY_QUERY, (user_id, meal_date, calories, protein, carbs, fats, 1))
+    except Error as e:
+        logger.error("Error logging meal: %s", e)
+        return None
+    daily_totals.add(user_id, meal_date, {
+        "calories": _column_value(calories, "1"),
+        "protein": _column_value(protein, "0.01"),
+        "carbs": _column_value(carbs, "0.01"),
+        "fats": _column_value(fats, "0.01"),
+        "meal_count": 1,
+    })
+    return log_id
+
+
+def _column_value(value, places: str):
+    """value rounded the way a meal_logs INT/DECIMAL(.., 2) column stores it"""
+    if value is None:
+        return None
+    return Decimal(str(value)).quantize(Decimal(places), rounding=ROUND_HALF_UP)
+
+
+def insert_meal_logs(user_id: int, logs: Sequence[Dict]) -> Optional[Dict[str, Tuple[str, int]]]:
+    """Insert many meal logs idempotently and add them to the daily totals.
+
+    logs are dicts with client_log_id, meal_date, meal_type, food_items,
+    calories, protein, carbs and fats. Logs whose client_log_id the user
+    already has are skipped; everything else is written with one multi-row
+    INSERT, all in a single transaction. Returns {client_log_id: (status,
+    log_id)} with status "created" or "duplicate", or None on error.
+    """
+    if not logs:
+        return {}
+    keys = [log['client_log_id'] for log in logs]
+    key_placeholders = ", ".join(["%s"] * len(keys))
+    lookup = (
+        f"SELECT client_log_id, log_id FROM meal_logs "
+        f"WHERE user_id = %s AND client_log_id IN ({key_placeholders})"
+    )
+    for attempt in range(2):
+        try:
+            with transaction() as cursor:
+                # Locks the rows of keys already logged. Keys not logged yet
+                # only get gap locks, which don't keep a concurrent replay of
+                # the same logs out: one of the two then fails with a
+                # deadlock or duplicate key error and is retried below
+                cursor.execute(lookup + " FOR UPDATE", (user_id, *keys))
+                existing = {row['client_log_id']: row['log_id'] for row in cursor.fetchall()}
+                results = {key: ("duplicate", log_id) for key, log_id in existing.items()}
+
+                new_logs = [log for log in logs if log['client_log_id'] not in existing]
+                if new_logs:
+                    rows, days = [], defaultdict(lambda: [0, 0, 0, 0, 0])
+                    for log in new_logs:
+                        values = (
+                            _column_value(log['calories'], "1"),
+                            _column_value(log.get('protein'), "0.01"),
+                            _column_value(log.get('carbs'), "0.01"),
+                            _column_value(log.get('fats'), "0.01"),
+                        )
+                        rows.append((
+                            user_id, log['meal_date'], log['meal_type'], log['food_items'], *values,
+                            log['client_log_id']
+                        ))
+                        day = days[log['meal_date']]
+                        for i, value in enumerate(values):
+                            day[i] += value or 0
+                        day[4] += 1
+
+                    cursor.execute(
+                        "INSERT INTO meal_logs (user_id, meal_date, meal_type, food_items, "
+                        "calories, protein, carbs, fats, client_log_id) VALUES "
+                        + ", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s, %s)"] * len(rows)),
+                        tuple(value for row in rows for value in row)
+                    )
+                    cursor.executemany(
+                        UPSERT_DAY_QUERY,
+                        [(user_id, meal_date, *totals) for meal_date, totals in days.items()]
+                    )
+                    cursor.execute(lookup, (user_id, *keys))
+                    results.update(
+                        (row['client_log_id'], ("created", row['log_id']))
+                        for row in cursor.fetchall() if row['client_log_id'] not in existing
+                    )
+            break
+        except Error as e:
+            if attempt == 0 and e.errno in (errorcode.ER_LOCK_DEADLOCK, errorcode.ER_DUP_ENTRY):
+                # The other replay has committed (or is about to, holding the
+                # locks this waits on); looking again finds its logs, which
+                # are then reported as duplicates
+                logger.info("Retrying meal batch after concurrent replay: %s", e)
+                continue
+            logger.error("Error logging meal batch: %s", e)
+            return None
+    if new_logs:
+        for meal_date, (calories, protein, carbs, fats, meal_count) in days.items():
+            daily_totals.add(user_id, meal_date, {
+                "calories": calories, "protein": protein, "carbs": carbs, "fats": fats,
+                "meal_count": meal_count,
+            })
+    return results
+
+
+def day_totals(user_id: int, day) -> Optional[Dict]:
+    """Running totals for one day, served from memory when cached"""
+    totals = daily_totals.get(user_id, day)
+    if totals is not None:
+        return totals
+    read_started = time.monotonic()
+    generation = daily_totals.generation(user_id)
+    rows = execute_query(DAY_TOTALS_QUERY, (user_id, day))
+    if rows is None:
+        return None
+    totals = rows[0] if rows else empty_totals()
+    daily_totals.set(user_id, day, totals, read_started, generation)
+    return as_totals(totals)
+
+
+def daily_rollups(user_id: int, start_date, end_date) -> Optional[List[Dict]]:
+    """One row per day with logged meals between start_date and end_date"""
+    return execute_query(DAILY_ROLLUPS_QUERY, (user_id, start_date, end_date))
+
+
+def _user_chunks(user_ids: Optional[Sequence[int]]) -> Iterator[List[int]]:
+    if user_ids:
+        user_ids = sorted(set(user_ids))
+        for i in range(0, len(user_ids), USER_CHUNK_SIZE):
+            yield user_ids[i:i + USER_CHUNK_SIZE]
+        return
+    last_user_id = 0
+    while True:
+        rows = execute_query(
+            "SELECT user_id FROM users WHERE user_id > %s ORDER BY user_id LIMIT %s",
+            (last_user_id, USER_CHUNK_SIZE)
+        )
+        if rows is None:
+            raise RuntimeError("Could not list users")
+        if not rows:
+            return
+        yield [row['user_id'] for row in rows]
+        last_user_id = rows[-1]['user_id']
+
+
+def rebuild(user_ids: Optional[Sequence[int]] = None) -> int:
+    """Recompute progress_tracking from meal_logs; returns the number of day rows written"""
+    written = 0
+    for chunk in _user_chunks(user_ids):
+        placeholders = ", ".join(["%s"] * len(chunk))
+        with transaction() as cursor:
+            cursor.execute(f"DELETE FROM progress_tracking WHERE user_id IN ({placeholders})", tuple(chunk))
+            cursor.execute(
+                f"""
+                INSERT INTO progress_tracking
+                    (user_id, date, total_calories, total_protein, total_carbs, total_fats, meal_count)
+                SELECT user_id, meal_date, total_calories, total_protein, total_carbs, total_fats, meal_count
+                FROM ({_AGGREGATE_LOGS.format(users=placeholders)}) AS daily
+                """,
+                tuple(chunk)
+            )
+            written += cursor.rowcount
+        logger.info("Rebuilt rollups", extra={"users": len(chunk), "first_user_id": chunk[0]})
+    return written
+
+
+def _as_number(value):
+    return float(value) if value is not None else 0.0
+
+
+def check(user_ids: Optional[Sequence[int]] = None) -> List[Dict]:
+    """Days whose progress_tracking row disagrees with meal_logs"""
+    mismatches = []
+    for chunk in _user_chunks(user_ids):
+        placeholders = ", ".join(["%s"] * len(chunk))
+        expected = execute_query(_AGGREGATE_LOGS.format(users=placeholders), tuple(chunk))
+        actual = execute_query(
+            f"SELECT user_id, date AS meal_date, {', '.join(ROLLUP_FIELDS)} "
+            f"FROM progress_tracking WHERE user_id IN ({placeholders}) AND meal_count > 0",
+            tuple(chunk)
+        )
+        if expected is None or actual is None:
+            raise RuntimeError("Could not read meal_logs or progress_tracking")
+
+        stored = {(row['user_id'], row['meal_date']): row for row in actual}
+        for row in expected:
+            key = (row['user_id'], row['meal_date'])
+            rollup = stored.pop(key, None)
+            differs = rollup is None or any(
+                abs(_as_number(row[field]) - _as_number(rollup[field])) > 0.005 for field in ROLLUP_FIELDS
+            )
+            if differs:
+                mismatches.append({
+                    "user_id": key[0], "date": str(key[1]),
+                    "expected": {field: _as_number(row[field]) for field in ROLLUP_FIELDS},
+                    "stored": {field: _as_number(rollup[field]) for field in ROLLUP_FIELDS} if rollup else None,
+                })
+        for (user_id, day), rollup in stored.items():
+            mismatches.append({
+                "user_id": user_id, "date": str(day), "expected": None,
+                "stored": {field: _as_number(rollup[field]) for field in ROLLUP_FIELDS},
+            })
+    return mismatches
+
+
+def main(argv):
+    if len(argv) < 2 or argv[1] not in ("rebuild", "check"):
+        print(__doc__)
+        return 1
+    args = argv[2:]
+    fix = "--fix" in args
+    try:
+        user_ids = [int(arg) for arg in args if arg != "--fix"]
+    except ValueError:
+        print(__doc__)
+        return 1
+
+    if argv[1] == "rebuild":
+        print(f"Wrote {rebuild(user_ids)} daily rollup rows")
+        return 0
+
+    mismatches = check(user_ids)
+    for mismatch in mismatches:
+        print(f"user {mismatch['user_id']} {mismatch['date']}: "
+              f"expected {mismatch['expected']}, stored {mismatch['stored']}")
+    print(f"{len(mismatches)} mismatched day(s)")
+    if mismatches and fix:
+        users = sorted({mismatch['user_id'] for mismatch in mismatches})
+        print(f"Rebuilt {rebuild(users)} daily rollup rows for {len(users)} user(s)")
+        return 0
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
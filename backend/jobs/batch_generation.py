@@ -0,0 +1,232 @@
+"""Bulk meal-plan generation for many users at once.
+
+Profiles are streamed from user_profiles in user_id order, one chunk per
+query (keyset pagination, so memory stays flat). Each chunk is generated on
+a process pool while the next one is being read, and finished chunks are
+stored in one transaction with a multi-row INSERT of their meal items.
+
+Pool processes come from a forkserver rather than a fork of this
+(threaded) process, so they inherit no database connections, locks or
+catalog reload thread; each loads the catalog once and keeps that
+snapshot for the whole job.
+
+Only one batch runs at a time on a host: the runner holds an exclusive
+lock on BATCH_LOCK_PATH for the whole run, so batches submitted to
+different serve.py workers queue behind each other instead of competing
+for the same CPUs. The kernel drops the lock if the worker dies.
+"""
+import fcntl
+import logging
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from ai_engine import catalog
+from ai_engine.meal_planner import generate_meal_plan
+from config import settings
+from database.connection import execute_query
+from database.meal_plan_store import save_meal_plans, split_plan
+from jobs.registry import Job, registry
+
+logger = logging.getLogger(__name__)
+
+BATCH_JOB_KIND = "batch_generation"
+BATCH_CHUNK_SIZE = settings.batch_chunk_size
+BATCH_WORKERS = settings.batch_workers
+# A user counts as active if they logged a meal or had a plan running
+# within this many days
+BATCH_ACTIVE_USER_DAYS = settings.batch_active_user_days
+BATCH_LOCK_PATH = settings.batch_lock_path
+
+_PROFILE_COLUMNS = """
+    p.user_id, p.age, p.weight, p.height, p.dietary_preferences, p.allergies,
+    p.health_goals, p.activity_level, p.allergen_mask, p.diet_mask, p.nutrition_targets,
+    p.targets_fingerprint
+"""
+_ACTIVE_FILTER = """
+    (EXISTS (SELECT 1 FROM meal_logs l
+             WHERE l.user_id = p.user_id AND l.meal_date >= CURDATE() - INTERVAL %s DAY)
+     OR EXISTS (SELECT 1 FROM meal_plans m
+                WHERE m.user_id = p.user_id AND m.end_date >= CURDATE() - INTERVAL %s DAY))
+"""
+ACTIVE_PROFILES_QUERY = f"""
+    SELECT {_PROFILE_COLUMNS}
+    FROM user_profiles p
+    WHERE p.user_id > %s AND {_ACTIVE_FILTER}
+    ORDER BY p.user_id
+    LIMIT %s
+"""
+ACTIVE_COUNT_QUERY = f"SELECT COUNT(*) AS total FROM user_profiles p WHERE {_ACTIVE_FILTER}"
+
+# One batch at a time per worker; later submissions wait in this
+# executor's queue, then for the host-wide lock
+_runner = ThreadPoolExecutor(max_workers=1, thread_name_prefix="batch-job")
+
+
+@contextmanager
+def _batch_lock():
+    """Hold the host-wide batch lock, waiting for any other worker's batch"""
+    with open(BATCH_LOCK_PATH, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _query(query, params):
+    rows = execute_query(query, params)
+    if rows is None:
+        raise RuntimeError("Database query failed while streaming profiles")
+    return rows
+
+
+def _profile_chunks(user_ids: Optional[List[int]], chunk_size: int) -> Iterator[Tuple[list, List[int]]]:
+    """Yield (profile rows in user_id order, requested user_ids without a profile)"""
+    if user_ids is not None:
+        for i in range(0, len(user_ids), chunk_size):
+            chunk = user_ids[i:i + chunk_size]
+            placeholders = ", ".join(["%s"] * len(chunk))
+            rows = _query(
+                f"SELECT {_PROFILE_COLUMNS} FROM user_profiles p "
+                f"WHERE p.user_id IN ({placeholders}) ORDER BY p.user_id",
+                tuple(chunk)
+            )
+            found = {row['user_id'] for row in rows}
+            yield rows, [user_id for user_id in chunk if user_id not in found]
+        return
+
+    last_user_id = 0
+    while True:
+        rows = _query(
+            ACTIVE_PROFILES_QUERY,
+            (last_user_id, BATCH_ACTIVE_USER_DAYS, BATCH_ACTIVE_USER_DAYS, chunk_size)
+        )
+        if rows:
+            yield rows, []
+            last_user_id = rows[-1]['user_id']
+        if len(rows) < chunk_size:
+            return
+
+
+def _init_worker():
+    """Pool process setup: a fixed catalog snapshot, no reload thread"""
+    catalog.RELOAD_INTERVAL = 0
+    catalog.get_catalog()
+
+
+def _generate_chunk(profiles: list, start_date: date, duration_days: int):
+    """Generate plans for one chunk (runs in a worker process).
+
+    Returns (rows ready for save_meal_plans, [(user_id, error), ...]).
+    Plans are split into JSON-encoded rows here so the parent process only
+    does I/O.
+    """
+    end_date = start_date + timedelta(days=duration_days - 1)
+    rows, failures = [], []
+    for profile in profiles:
+        try:
+            plan = generate_meal_plan(profile, duration_days, start_date)
+            rows.append((profile['user_id'], start_date, end_date) + split_plan(plan))
+        except Exception as e:
+            failures.append((profile['user_id'], f"{type(e).__name__}: {e}"))
+    return rows, failures
+
+
+def _new_pool(workers: int) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("forkserver"),
+        initializer=_init_worker,
+    )
+
+
+def _store_results(job: Job, chunks: Dict[Future, list]):
+    """Store finished chunks' plans; chunks maps each future to its profiles"""
+    for future, chunk in chunks.items():
+        try:
+            rows, failures = future.result()
+        except Exception as e:
+            # The chunk never came back (a pool process died, a result that
+            # couldn't be pickled, ...); the other chunks still count
+            job.failed += len(chunk)
+            job.record_error(
+                f"Failed to generate plans for users {chunk[0]['user_id']}..{chunk[-1]['user_id']}: "
+                f"{type(e).__name__}: {e}"
+            )
+            continue
+        if rows:
+            written = save_meal_plans(rows)
+            if written is None:
+                job.failed += len(rows)
+                job.record_error(f"Failed to store plans for users {rows[0][0]}..{rows[-1][0]}")
+            else:
+                job.done += len(rows)
+        for user_id, error in failures:
+            job.failed += 1
+            job.record_error(f"user {user_id}: {error}")
+    job.save()
+
+
+def run_batch_job(job: Job, user_ids: Optional[List[int]], start_date: date, duration_days: int):
+    """Generate and store plans for user_ids (None = all active users)"""
+    try:
+        with _batch_lock():
+            job.start()
+            logger.info("Batch generation started", extra={"job_id": job.job_id})
+            if user_ids is not None:
+                user_ids = sorted(set(user_ids))
+                job.total = len(user_ids)
+            else:
+                job.total = _query(ACTIVE_COUNT_QUERY, (BATCH_ACTIVE_USER_DAYS, BATCH_ACTIVE_USER_DAYS))[0]['total']
+            job.save()
+
+            workers = max(1, BATCH_WORKERS)
+            pool = _new_pool(workers)
+            try:
+                pending = {}
+                for chunk, missing in _profile_chunks(user_ids, BATCH_CHUNK_SIZE):
+                    for user_id in missing:
+                        job.failed += 1
+                        job.record_error(f"user {user_id}: no profile")
+                    if not chunk:
+                        continue
+                    try:
+                        future = pool.submit(_generate_chunk, chunk, start_date, duration_days)
+                    except BrokenProcessPool:
+                        # A pool process died; the chunks it took down fail
+                        # in _store_results, the rest go to a fresh pool
+                        pool.shutdown(wait=False)
+                        pool = _new_pool(workers)
+                        future = pool.submit(_generate_chunk, chunk, start_date, duration_days)
+                    pending[future] = chunk
+                    # Bound read-ahead so a huge user base doesn't pile up in memory
+                    if len(pending) >= workers * 2:
+                        finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        _store_results(job, {future: pending.pop(future) for future in finished})
+                wait(pending)
+                _store_results(job, pending)
+            finally:
+                pool.shutdown()
+
+            job.succeed({"plans_created": job.done, "failures": job.failed})
+        logger.info("Batch generation finished", extra={"job": job.to_dict(include_result=False)})
+    except Exception as e:
+        logger.exception("Batch generation failed", extra={"job_id": job.job_id})
+        job.fail(f"{type(e).__name__}: {e}")
+
+
+def submit_batch_job(user_ids: Optional[List[int]], start_date: date, duration_days: int) -> Job:
+    """Queue a batch generation job and return its handle immediately"""
+    job = registry.create(
+        BATCH_JOB_KIND,
+        user_count=len(user_ids) if user_ids is not None else None,
+        all_active_users=user_ids is None,
+        start_date=start_date.isoformat(),
+        duration_days=duration_days,
+    )
+    _runner.submit(run_batch_job, job, user_ids, start_date, duration_days)
+    return job
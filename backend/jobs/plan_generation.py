@@ -0,0 +1,115 @@
+"""Single-user meal plan generation, inline or as a background job.
+
+``generate_and_store_plan`` is the blocking unit of work (profile lookup,
+generation, insert). The /meal-plan/generate route either runs it on the
+database executor and awaits the result, or hands it to this module's
+worker pool and returns a job id straight away.
+"""
+import contextvars
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import Any, Dict
+
+from ai_engine.meal_planner import generate_meal_plan
+from config import settings
+from database.connection import execute_query
+from database.meal_plan_store import save_meal_plan
+from jobs.registry import Job, registry
+
+logger = logging.getLogger(__name__)
+
+PLAN_JOB_KIND = "plan_generation"
+PLAN_JOB_WORKERS = settings.plan_job_workers
+# Jobs allowed to be queued or running at once before new ones are refused
+PLAN_JOB_MAX_PENDING = settings.plan_job_max_pending
+
+PROFILE_QUERY = """
+    SELECT age, weight, height, dietary_preferences,
+           allergies, health_goals, activity_level,
+           allergen_mask, diet_mask, nutrition_targets, targets_fingerprint
+    FROM user_profiles
+    WHERE user_id = %s
+"""
+
+
+class PlanGenerationError(Exception):
+    """Generation failed for a reason the client should see"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class PlanQueueFull(Exception):
+    """Raised when too many plan jobs are already pending"""
+
+
+def generate_and_store_plan(user_id: int, start_date: date, duration_days: int) -> Dict[str, Any]:
+    """Generate a plan for user_id and save it; returns plan_id and meal_plan"""
+    profile = execute_query(PROFILE_QUERY, (user_id,))
+    if not profile:
+        raise PlanGenerationError(404, "Profile not found. Please complete your profile first.")
+
+    try:
+        meal_plan_data = generate_meal_plan(profile[0], duration_days, start_date)
+    except ValueError as e:
+        raise PlanGenerationError(422, str(e))
+
+    end_date = start_date + timedelta(days=duration_days - 1)
+    plan_id = save_meal_plan(user_id, start_date, end_date, meal_plan_data)
+    if not plan_id:
+        raise PlanGenerationError(500, "Failed to create meal plan")
+
+    return {"plan_id": plan_id, "meal_plan": meal_plan_data}
+
+
+_executor = ThreadPoolExecutor(max_workers=max(1, PLAN_JOB_WORKERS), thread_name_prefix="plan-job")
+_pending = 0
+_pending_lock = threading.Lock()
+
+
+def _run_plan_job(job: Job, user_id: int, start_date: date, duration_days: int):
+    global _pending
+    job.start()
+    try:
+        result = generate_and_store_plan(user_id, start_date, duration_days)
+        job.done = 1
+        job.succeed(result)
+    except PlanGenerationError as e:
+        job.failed = 1
+        job.fail(e.detail)
+    except Exception:
+        logger.exception("Plan generation job failed", extra={"job_id": job.job_id})
+        job.failed = 1
+        job.fail("Failed to create meal plan")
+    finally:
+        with _pending_lock:
+            _pending -= 1
+
+
+def submit_plan_job(user_id: int, start_date: date, duration_days: int) -> Job:
+    """Queue plan generation for user_id and return the job handle"""
+    global _pending
+    with _pending_lock:
+        if _pending >= PLAN_JOB_MAX_PENDING:
+            raise PlanQueueFull()
+        _pending += 1
+    job = registry.create(
+        PLAN_JOB_KIND,
+        user_id=user_id,
+        start_date=start_date.isoformat(),
+        duration_days=duration_days,
+    )
+    job.total = 1
+    # Keep the submitting request's ID on the job's log lines
+    context = contextvars.copy_context()
+    _executor.submit(context.run, _run_plan_job, job, user_id, start_date, duration_days)
+    return job
+
+
+def pending_jobs() -> int:
+    """Plan jobs currently queued or running"""
+    return _pending
@@ -0,0 +1,295 @@
+"""Background jobs: progress and outcome, visible from every worker.
+
+A job runs in the process that accepted it, which keeps the Job object and
+wakes its own waiters directly. Each state change is also written to the
+jobs table (database/job_store.py), so under serve.py any worker can
+answer for it: jobs this process doesn't hold are loaded from there, and
+waiting on them polls the row every JOB_POLL_INTERVAL seconds. A job whose
+worker has exited (under serve.py) is reported as failed.
+
+Registry calls that touch the table block; from the event loop use
+get_job and list_jobs.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from config import settings
+from database.connection import run_in_db_executor
+from database.job_store import list_jobs as list_job_rows, load_job, prune_jobs, save_job
+from utils import worker_stats
+from utils.serialization import loads
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+# How often a waiter re-reads a job another worker is running
+JOB_POLL_INTERVAL = settings.job_poll_interval
+# Days a job's row is kept after it was created
+JOB_RETENTION_DAYS = settings.job_retention_days
+# Jobs returned when listing a kind
+JOB_LIST_LIMIT = 100
+
+
+@dataclass
+class Job:
+    """Progress and outcome of one background job"""
+    job_id: str
+    kind: str
+    params: Dict[str, Any] = field(default_factory=dict)
+    status: str = QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    total: int = 0
+    done: int = 0
+    failed: int = 0
+    errors: List[str] = field(default_factory=list)
+    result: Any = None
+    error: Optional[str] = None
+    # True for a copy loaded from the jobs table; another process runs it
+    remote: bool = field(default=False, repr=False, compare=False)
+    _store: Optional[Callable[["Job"], None]] = field(default=None, repr=False, compare=False)
+    _callbacks: List[Callable] = field(default_factory=list, repr=False, compare=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    MAX_ERRORS = 20
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Job":
+        """Read-only copy of a job from its to_dict()"""
+        progress = data["progress"]
+        return cls(
+            job_id=data["job_id"], kind=data["kind"], params=data["params"], status=data["status"],
+            created_at=data["created_at"], started_at=data["started_at"], finished_at=data["finished_at"],
+            total=progress["total"], done=progress["done"], failed=progress["failed"],
+            errors=data["errors"], result=data.get("result"), error=data["error"], remote=True,
+        )
+
+    def save(self):
+        """Publish the job's current state to the other workers"""
+        if self._store is not None:
+            self._store(self)
+
+    def start(self):
+        self.status = RUNNING
+        self.started_at = time.time()
+        self.save()
+
+    def succeed(self, result=None):
+        self.result = result
+        self._finish(SUCCEEDED)
+
+    def fail(self, error: str):
+        self.error = error
+        self._finish(FAILED)
+
+    def _finish(self, status: str):
+        with self._lock:
+            self.finished_at = time.time()
+            self.status = status
+            callbacks, self._callbacks = self._callbacks, []
+        self.save()
+        for callback in callbacks:
+            callback(self)
+
+    def add_done_callback(self, callback: Callable[["Job"], None]):
+        """Call callback(job) once the job finishes (immediately if it already has)"""
+        with self._lock:
+            if not self.finished:
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def record_error(self, message: str):
+        """Keep a sample of per-item failures for the status endpoint"""
+        if len(self.errors) < self.MAX_ERRORS:
+            self.errors.append(message)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+        data = {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "status": self.status,
+            "params": self.params,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "progress": {
+                "total": self.total,
+                "done": self.done,
+                "failed": self.failed,
+                "percent": round(100 * (self.done + self.failed) / self.total, 1) if self.total else None,
+            },
+            "metrics": {
+                "elapsed_seconds": round(elapsed, 3) if elapsed is not None else None,
+                "items_per_second": round(self.done / elapsed, 1) if elapsed else None,
+            },
+            "errors": list(self.errors),
+            "error": self.error,
+        }
+        if include_result:
+            data["result"] = self.result
+        return data
+
+
+class JobRegistry:
+    """This process's jobs, backed by the shared jobs table.
+
+    In memory, the oldest finished jobs are forgotten first; their rows
+    stay readable for JOB_RETENTION_DAYS.
+    """
+
+    def __init__(self, max_jobs: int = 1000):
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._pruned_at = None
+
+    def create(self, kind: str, **params) -> Job:
+        """Register a job run by this process, storing its row"""
+        job = Job(job_id=uuid.uuid4().hex, kind=kind, params=params, _store=self._save)
+        self._save(job)
+        self._prune()
+        with self._lock:
+            self._jobs[job.job_id] = job
+            if len(self._jobs) > self.max_jobs:
+                for job_id, old in list(self._jobs.items()):
+                    if len(self._jobs) <= self.max_jobs:
+                        break
+                    if old.finished:
+                        del self._jobs[job_id]
+        return job
+
+    def local(self, job_id: str) -> Optional[Job]:
+        """The job if this process runs it (or ran it recently)"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """The job from memory or, failing that, the jobs table"""
+        job = self.local(job_id)
+        if job is not None:
+            return job
+        row = load_job(job_id)
+        return self._from_row(row) if row else None
+
+    def refresh(self, job: Job):
+        """Update a remote job in place from its row"""
+        row = load_job(job.job_id)
+        if not row:
+            return
+        fresh = self._from_row(row)
+        for name in ("status", "started_at", "finished_at", "total", "done", "failed", "errors", "result", "error"):
+            setattr(job, name, getattr(fresh, name))
+
+    def list(self, kind: str) -> List[Job]:
+        """The newest jobs of a kind across all workers, newest first"""
+        rows = list_job_rows(kind, JOB_LIST_LIMIT)
+        with self._lock:
+            local = {job_id: job for job_id, job in self._jobs.items() if job.kind == kind}
+        if rows is None:
+            return list(reversed(local.values()))
+        jobs = []
+        for row in rows:
+            job = self._from_row(row)
+            jobs.append(local.get(job.job_id, job))
+        # Rows only order by the second; the jobs themselves know better
+        jobs.sort(key=lambda job: job.created_at, reverse=True)
+        return jobs
+
+    def _save(self, job: Job):
+        if not save_job(job.job_id, job.kind, job.status, job.to_dict()):
+            logger.warning("Failed to store job state", extra={"job_id": job.job_id})
+
+    def _prune(self):
+        now = time.monotonic()
+        if self._pruned_at is None or now - self._pruned_at > 3600:
+            self._pruned_at = now
+            prune_jobs(JOB_RETENTION_DAYS)
+
+    @staticmethod
+    def _from_row(row: Dict) -> Job:
+        job = Job.from_dict(loads(row['job_data']))
+        if not job.finished and not _owner_alive(row['owner_pid']):
+            job.status = FAILED
+            job.error = "The worker running this job exited before it finished"
+        return job
+
+
+def _owner_alive(pid: int) -> bool:
+    """Whether the process that ran a job is still serving (True when unknown)"""
+    if pid == os.getpid() or worker_stats.table is None:
+        return True
+    return any(worker["pid"] == pid for worker in worker_stats.table.snapshot())
+
+
+async def wait_for_job(job: Job, timeout: Optional[float] = None) -> bool:
+    """Wait without blocking the event loop until job finishes or timeout passes.
+
+    Returns whether the job has finished.
+    """
+    if job.finished:
+        return True
+    if job.remote:
+        return await _poll_job(job, timeout)
+    loop = asyncio.get_running_loop()
+    done = loop.create_future()
+
+    def wake(_job):
+        try:
+            loop.call_soon_threadsafe(lambda: done.done() or done.set_result(None))
+        except RuntimeError:
+            pass  # loop already closed
+
+    job.add_done_callback(wake)
+    try:
+        await asyncio.wait_for(done, timeout)
+    except asyncio.TimeoutError:
+        pass
+    return job.finished
+
+
+async def _poll_job(job: Job, timeout: Optional[float]) -> bool:
+    loop = asyncio.get_running_loop()
+    deadline = None if timeout is None else loop.time() + timeout
+    while not job.finished:
+        delay = JOB_POLL_INTERVAL if deadline is None else min(JOB_POLL_INTERVAL, deadline - loop.time())
+        if delay <= 0:
+            break
+        await asyncio.sleep(delay)
+        await run_in_db_executor(registry.refresh, job)
+    return job.finished
+
+
+async def get_job(job_id: str) -> Optional[Job]:
+    """registry.get without blocking the event loop"""
+    job = registry.local(job_id)
+    if job is not None:
+        return job
+    return await run_in_db_executor(registry.get, job_id)
+
+
+async def list_jobs(kind: str) -> List[Job]:
+    """registry.list without blocking the event loop"""
+    return await run_in_db_executor(registry.list, kind)
+
+
+registry = JobRegistry()
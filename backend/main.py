@@ -1,12 +1,86 @@
-from fastapi import FastAPI, Header
-from fastapi.middleware.cors import CORSMiddleware
-from routes import auth, profile, meal_plan, tracking
+import gc
+
+# Importing the app creates tens of thousands of long-lived objects (mostly
+# FastAPI/pydantic models); collections while they are being created only
+# rescan survivors, so the collector is held off until they are imported,
+# and turned back on even if an import fails
+_gc_was_enabled = gc.isenabled()
+gc.disable()
+
+try:
+    from utils.startup import startup_report
+
+    with startup_report.importing("config"):
+        # Loads .env; must stay ahead of setup_logging() and anything else that
+        # reads LOG_*, METRICS_ENABLED, ... from settings
+        from config import settings
+    with startup_report.importing("fastapi"):
+        from fastapi import Depends, FastAPI, Header, Request
+        from fastapi.responses import Response
+        from fastapi.middleware.cors import CORSMiddleware
+    from utils.logging_config import setup_logging, request_id_var, new_request_id
+
+    setup_logging()
+
+    with startup_report.importing("database"):
+        from database.connection import POOL_WARM, get_pool, shutdown_database
+    with startup_report.importing("utils.auth_helper"):
+        from utils.auth_helper import password_hash_pool
+    with startup_report.importing("ai_engine"):
+        from ai_engine.catalog import get_catalog
+    with startup_report.importing("routes.auth"):
+        from routes import auth
+    with startup_report.importing("routes.profile"):
+        from routes import profile
+    with startup_report.importing("routes.meal_plan"):
+        from routes import meal_plan
+    with startup_report.importing("routes.tracking"):
+        from routes import tracking
+    with startup_report.importing("observability"):
+        from utils.serialization import JSONResponse
+        from utils import metrics, worker_stats
+        from utils.health import health_monitor
+finally:
+    if _gc_was_enabled:
+        gc.enable()
+
+from contextlib import asynccontextmanager
 from typing import Optional
+import anyio
+import asyncio
+import os
+
+from utils.validation import require_admin
+
+def _warm_pool():
+    return get_pool().warm(POOL_WARM)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create subsystems before the first request instead of during it;
+    # the steps are independent, so they overlap
+    startup_report.begin_init()
+    with startup_report.step("anyio backend"):
+        # Starlette's middleware runs on anyio, which imports its asyncio
+        # backend the first time it is used
+        await anyio.sleep(0)
+    steps = [startup_report.run_step("meal catalog", get_catalog)]
+    if POOL_WARM > 0:
+        steps.append(startup_report.run_step("database pool", _warm_pool))
+    await asyncio.gather(*steps)
+    health_monitor.start()
+    startup_report.mark_ready()
+    yield
+    await health_monitor.stop()
+    await asyncio.to_thread(shutdown_database)
+    await asyncio.to_thread(password_hash_pool.shutdown)
 
 app = FastAPI(
     title="AI Meal Planner API",
     description="Backend API for AI-powered meal planning application",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=JSONResponse,
+    lifespan=lifespan
 )
 
 # CORS middleware for Flutter app
@@ -18,6 +92,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if metrics.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+# Counts requests into the shared per-worker table under serve.py; no-op otherwise
+app.add_middleware(worker_stats.WorkerStatsMiddleware)
+
+@app.middleware("http")
+async def correlation_id_middleware(request: Request, call_next):
+    """Tag every log line emitted while handling a request with its ID"""
+    request_id = request.headers.get("x-request-id") or new_request_id()
+    token = request_id_var.set(request_id)
+    try:
+        response = await call_next(request)
+    finally:
+        request_id_var.reset(token)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(profile.router)
@@ -32,9 +123,45 @@ async def root():
         "status": "running"
     }
 
+@app.get("/health/live")
+async def liveness():
+    """The worker's event loop is serving requests"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness():
+    """Latest background probe result; 503 while dependencies are unavailable"""
+    result = health_monitor.readiness()
+    return JSONResponse(result, status_code=200 if result["ready"] else 503)
+
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    return await readiness()
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    """Prometheus scrape target for this worker"""
+    if not metrics.METRICS_ENABLED:
+        return Response(status_code=404)
+    return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/server/workers")
+async def server_workers(current_user: dict = Depends(require_admin)):
+    """Worker processes of the serve.py master and their counters"""
+    table = worker_stats.table
+    if table is None:
+        return JSONResponse({"detail": "Not running under serve.py"}, status_code=404)
+    return {
+        "master_pid": table.master_pid,
+        "worker_pid": os.getpid(),
+        "configured_workers": worker_stats.configured_workers,
+        "workers": table.snapshot(),
+    }
+
+@app.get("/server/startup")
+async def server_startup(current_user: dict = Depends(require_admin)):
+    """Import and initialization timings of this process"""
+    return startup_report.as_dict()
 
 @app.get("/debug/token")
 async def debug_token(authorization: Optional[str] = Header(None)):
@@ -54,5 +181,6 @@ async def debug_token(authorization: Optional[str] = Header(None)):
         return {"error": "Invalid header format", "received": authorization}
 
 if __name__ == "__main__":
+    # Single-process development server; serve.py runs production workers
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run(app, host=settings.host, port=settings.port)
\ No newline at end of file
@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import date
-from typing import Optional
+from typing import List, Optional
 
 class MealLog(BaseModel):
     meal_date: date
@@ -13,4 +13,11 @@ class MealLog(BaseModel):
 
 class ProgressQuery(BaseModel):
     start_date: date
-    end_date: date
\ No newline at end of file
+    end_date: date
+
+class MealLogBatchItem(MealLog):
+    # Generated by the client once per log, so replaying it is harmless
+    client_log_id: str = Field(min_length=1, max_length=64)
+
+class MealLogBatch(BaseModel):
+    logs: List[MealLogBatchItem]
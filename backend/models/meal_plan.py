@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import date
 
 class MealPlanGenerate(BaseModel):
@@ -17,4 +17,13 @@ class MealPlanResponse(BaseModel):
 class MealUpdate(BaseModel):
     meal_date: date
     meal_type: str  # breakfast, lunch, dinner, snack
-    new_meal_data: Dict[str, Any]
\ No newline at end of file
+    new_meal_data: Dict[str, Any]
+    # Version of the meal being replaced, as returned by /current; if it has
+    # changed since, the update is rejected with 409
+    expected_version: Optional[int] = None
+
+class BatchGenerateRequest(BaseModel):
+    start_date: date
+    duration_days: int = 7
+    user_ids: Optional[List[int]] = None
+    all_active_users: bool = False
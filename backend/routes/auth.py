@@ -1,7 +1,11 @@
 from fastapi import APIRouter, HTTPException
 from models.user import UserRegister, UserLogin, Token
-from utils.auth_helper import get_password_hash, verify_password, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
-from database.connection import execute_query
+from utils.auth_helper import (
+    get_password_hash_async, verify_password_async, create_access_token,
+    PasswordHasherBusy, ACCESS_TOKEN_EXPIRE_MINUTES
+)
+from database.connection import execute_query_async
+from utils.validation import invalidate_cached_user
 from datetime import timedelta
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
@@ -11,27 +15,33 @@ async def register(user: UserRegister):
     """F001: User Registration"""
     # Check if user already exists
     check_query = "SELECT user_id FROM users WHERE email = %s"
-    existing_user = execute_query(check_query, (user.email,))
+    existing_user = await execute_query_async(check_query, (user.email,))
     
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Hash password
-    hashed_password = get_password_hash(user.password)
+    try:
+        hashed_password = await get_password_hash_async(user.password)
+    except PasswordHasherBusy:
+        raise HTTPException(status_code=503, detail="Server busy, please retry")
     
     # Insert new user
     insert_query = """
         INSERT INTO users (email, password_hash, created_at) 
         VALUES (%s, %s, NOW())
     """
-    user_id = execute_query(insert_query, (user.email, hashed_password))
+    user_id = await execute_query_async(insert_query, (user.email, hashed_password))
     
     if not user_id:
         raise HTTPException(status_code=500, detail="Failed to create user")
     
+    # Drop any stale entry left by a deleted account with the same email
+    invalidate_cached_user(user.email)
+    
     # Create profile entry
     profile_query = "INSERT INTO user_profiles (user_id) VALUES (%s)"
-    execute_query(profile_query, (user_id,))
+    await execute_query_async(profile_query, (user_id,))
     
     return {
         "message": "User registered successfully",
@@ -44,7 +54,7 @@ async def login(user: UserLogin):
     """F002: User Login"""
     # Get user from database
     query = "SELECT user_id, email, password_hash FROM users WHERE email = %s"
-    db_user = execute_query(query, (user.email,))
+    db_user = await execute_query_async(query, (user.email,))
     
     if not db_user:
         raise HTTPException(status_code=401, detail="Invalid email or password")
@@ -52,13 +62,17 @@ async def login(user: UserLogin):
     db_user = db_user[0]
     
     # Verify password
-    if not verify_password(user.password, db_user['password_hash']):
+    try:
+        password_ok = await verify_password_async(user.password, db_user['password_hash'])
+    except PasswordHasherBusy:
+        raise HTTPException(status_code=503, detail="Server busy, please retry")
+    if not password_ok:
         raise HTTPException(status_code=401, detail="Invalid email or password")
     
     # Create access token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": db_user['email']}, 
+        data={"sub": db_user['email'], "uid": db_user['user_id']}, 
         expires_delta=access_token_expires
     )
     
@@ -1,77 +1,193 @@
-from fastapi import APIRouter, Depends, HTTPException
-from models.meal_plan import MealPlanGenerate, MealPlanResponse, MealUpdate
-from database.connection import execute_query
-from utils.validation import get_current_user
-from ai_engine.meal_planner import generate_meal_plan
-import json
-from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from models.meal_plan import MealPlanGenerate, MealPlanResponse, MealUpdate, BatchGenerateRequest
+from database.connection import execute_query_async, run_in_db_executor
+from database.meal_plan_store import load_plan_meals, update_plan_meal
+from utils.plan_cache import current_plan_cache, etag_matches
+from utils.serialization import JSONResponse, dumps, dumps_text, json_fragment, loads
+from utils.validation import get_current_user, require_admin
+from jobs.batch_generation import BATCH_JOB_KIND, submit_batch_job
+from jobs.plan_generation import (
+    PLAN_JOB_KIND, PlanGenerationError, PlanQueueFull, generate_and_store_plan, submit_plan_job
+)
+from jobs.registry import get_job, list_jobs, wait_for_job
+from ai_engine.optimizer import MEAL_TYPES
+from config import settings
+import time
+from datetime import date, datetime, timedelta
+from typing import Optional
 
 router = APIRouter(prefix="/meal-plan", tags=["Meal Plan"])
 
+# Longest a status request may long-poll, and the SSE keepalive interval
+JOB_MAX_WAIT_SECONDS = settings.job_max_wait_seconds
+SSE_KEEPALIVE_SECONDS = settings.sse_keepalive_seconds
+
 @router.post("/generate", response_model=dict)
 async def create_meal_plan(
     plan_request: MealPlanGenerate,
+    response: Response,
+    background: bool = False,
     current_user: dict = Depends(get_current_user)
 ):
-    """F004: Generate AI meal plan"""
-    
-    # Get user profile
-    profile_query = """
-        SELECT age, weight, height, dietary_preferences, 
-               allergies, health_goals, activity_level
-        FROM user_profiles 
-        WHERE user_id = %s
-    """
-    profile = execute_query(profile_query, (current_user['user_id'],))
-    
-    if not profile:
-        raise HTTPException(status_code=404, detail="Profile not found. Please complete your profile first.")
-    
-    # Generate meal plan
-    meal_plan_data = generate_meal_plan(profile[0], plan_request.duration_days)
-    
-    # Calculate end date
-    end_date = plan_request.start_date + timedelta(days=plan_request.duration_days - 1)
-    
-    # Save to database
-    insert_query = """
-        INSERT INTO meal_plans (user_id, created_at, start_date, end_date, plan_data)
-        VALUES (%s, NOW(), %s, %s, %s)
+    """F004: Generate AI meal plan.
+
+    With ?background=true the plan is generated by a worker and a job id is
+    returned immediately (202); follow it via /meal-plan/jobs/{job_id}.
     """
-    plan_id = execute_query(
-        insert_query,
-        (current_user['user_id'], plan_request.start_date, end_date, json.dumps(meal_plan_data))
-    )
-    
-    if not plan_id:
-        raise HTTPException(status_code=500, detail="Failed to create meal plan")
-    
-    return {
+    if background:
+        try:
+            job = await run_in_db_executor(
+                submit_plan_job, current_user['user_id'], plan_request.start_date, plan_request.duration_days
+            )
+        except PlanQueueFull:
+            raise HTTPException(status_code=503, detail="Server busy, please retry")
+        response.status_code = 202
+        return {
+            "message": "Meal plan generation queued",
+            "job_id": job.job_id,
+            "status_url": f"{router.prefix}/jobs/{job.job_id}",
+            "events_url": f"{router.prefix}/jobs/{job.job_id}/events",
+        }
+    
+    # Generate and save off the event loop
+    try:
+        result = await run_in_db_executor(
+            generate_and_store_plan, current_user['user_id'], plan_request.start_date, plan_request.duration_days
+        )
+    except PlanGenerationError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    
+    # Returned as a response object so the plan is encoded once, by orjson
+    return JSONResponse({
         "message": "Meal plan generated successfully",
-        "plan_id": plan_id,
-        "meal_plan": meal_plan_data
-    }
+        "plan_id": result['plan_id'],
+        "meal_plan": result['meal_plan']
+    })
+
+async def _user_plan_job(job_id: str, current_user: dict):
+    job = await get_job(job_id)
+    if job is None or job.kind != PLAN_JOB_KIND or job.params.get('user_id') != current_user['user_id']:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/jobs/{job_id}", response_model=dict)
+async def get_plan_job(
+    job_id: str,
+    wait: float = Query(0, ge=0, le=JOB_MAX_WAIT_SECONDS),
+    current_user: dict = Depends(get_current_user)
+):
+    """Status of a background plan generation; ?wait=N long-polls up to N seconds"""
+    job = await _user_plan_job(job_id, current_user)
+    if wait:
+        await wait_for_job(job, wait)
+    return job.to_dict()
+
+@router.get("/jobs/{job_id}/events")
+async def stream_plan_job(job_id: str, current_user: dict = Depends(get_current_user)):
+    """Server-sent events: the job's status now and once more when it finishes"""
+    job = await _user_plan_job(job_id, current_user)
+    
+    async def events():
+        yield _sse("status", job.to_dict(include_result=False))
+        while not await wait_for_job(job, SSE_KEEPALIVE_SECONDS):
+            yield ": keepalive\n\n"
+        yield _sse("complete", job.to_dict())
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {dumps_text(data)}\n\n"
+
+@router.post("/batch", response_model=dict, status_code=202)
+async def create_batch_meal_plans(
+    batch_request: BatchGenerateRequest,
+    current_user: dict = Depends(require_admin)
+):
+    """Queue meal plan generation for many users; poll the returned job"""
+    if batch_request.user_ids is None and not batch_request.all_active_users:
+        raise HTTPException(status_code=400, detail="Provide user_ids or set all_active_users")
+    if batch_request.duration_days < 1:
+        raise HTTPException(status_code=400, detail="duration_days must be at least 1")
+    
+    user_ids = None if batch_request.all_active_users else batch_request.user_ids
+    job = await run_in_db_executor(submit_batch_job, user_ids, batch_request.start_date, batch_request.duration_days)
+    return {"message": "Batch generation queued", "job": job.to_dict()}
+
+@router.get("/batch", response_model=dict)
+async def list_batch_jobs(current_user: dict = Depends(require_admin)):
+    """Recent batch generation jobs, newest first"""
+    return {"jobs": [job.to_dict(include_result=False) for job in await list_jobs(BATCH_JOB_KIND)]}
+
+@router.get("/batch/{job_id}", response_model=dict)
+async def get_batch_job(job_id: str, current_user: dict = Depends(require_admin)):
+    """Status and progress of a batch generation job"""
+    job = await get_job(job_id)
+    if job is None or job.kind != BATCH_JOB_KIND:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
 
 @router.get("/current", response_model=dict)
-async def get_current_meal_plan(current_user: dict = Depends(get_current_user)):
-    """Get user's current active meal plan"""
+async def get_current_meal_plan(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    if_none_match: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user)
+):
+    """Get user's current active meal plan, optionally only the days from start to end.
+
+    Whole-plan responses are cached per user and carry an ETag; a matching
+    If-None-Match gets 304 without a database round trip.
+    """
+    user_id = current_user['user_id']
+    whole_plan = start is None and end is None
+    if whole_plan:
+        cached = current_plan_cache.get(user_id)
+        if cached is not None:
+            return _plan_response(*cached, if_none_match)
+    
+    read_started = time.monotonic()
+    generation = current_plan_cache.generation(user_id)
     query = """
-        SELECT plan_id, created_at, start_date, end_date, plan_data
+        SELECT plan_id, created_at, start_date, end_date, plan_data, normalized
         FROM meal_plans
         WHERE user_id = %s
         AND end_date >= CURDATE()
         ORDER BY created_at DESC
         LIMIT 1
     """
-    plan = execute_query(query, (current_user['user_id'],))
+    plan = await execute_query_async(query, (user_id,))
     
     if not plan:
         raise HTTPException(status_code=404, detail="No active meal plan found")
     
     plan_data = plan[0]
-    plan_data['plan_data'] = json.loads(plan_data['plan_data'])
-    
-    return plan_data
+    # Stored meal JSON is embedded in the response as-is, never parsed
+    meals, versions = await run_in_db_executor(load_plan_meals, plan_data, start, end, json_fragment)
+    if meals is None:
+        raise HTTPException(status_code=500, detail="Failed to load meal plan")
+    
+    header = loads(plan_data.pop('plan_data'))
+    header['meals'] = meals
+    plan_data.pop('normalized')
+    plan_data['plan_data'] = header
+    plan_data['meal_versions'] = versions
+    
+    if not whole_plan:
+        return JSONResponse(plan_data)
+    body = dumps(plan_data)
+    etag = current_plan_cache.set(user_id, body, plan_data['end_date'], read_started, generation)
+    return _plan_response(etag, body, if_none_match)
+
+def _plan_response(etag: str, body: bytes, if_none_match: Optional[str]) -> Response:
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 @router.put("/customize", response_model=dict)
 async def customize_meal(
@@ -79,10 +195,12 @@ async def customize_meal(
     current_user: dict = Depends(get_current_user)
 ):
     """F005: Customize meal in plan"""
+    if meal_update.meal_type not in MEAL_TYPES:
+        raise HTTPException(status_code=422, detail=f"meal_type must be one of {', '.join(MEAL_TYPES)}")
     
     # Get current plan
     query = """
-        SELECT plan_id, plan_data
+        SELECT plan_id, user_id, plan_data, normalized
         FROM meal_plans
         WHERE user_id = %s
         AND start_date <= %s
@@ -90,26 +208,42 @@ async def customize_meal(
         ORDER BY created_at DESC
         LIMIT 1
     """
-    plan = execute_query(query, (current_user['user_id'], meal_update.meal_date, meal_update.meal_date))
+    plan = await execute_query_async(query, (current_user['user_id'], meal_update.meal_date, meal_update.meal_date))
     
     if not plan:
         raise HTTPException(status_code=404, detail="No meal plan found for this date")
     
-    plan_data = json.loads(plan[0]['plan_data'])
-    date_str = meal_update.meal_date.strftime("%Y-%m-%d")
-    
-    # Update specific meal
-    if date_str in plan_data['meals']:
-        plan_data['meals'][date_str][meal_update.meal_type] = meal_update.new_meal_data
-    else:
-        raise HTTPException(status_code=404, detail="Date not found in meal plan")
-    
-    # Save updated plan
-    update_query = """
-        UPDATE meal_plans
-        SET plan_data = %s
-        WHERE plan_id = %s
-    """
-    execute_query(update_query, (json.dumps(plan_data), plan[0]['plan_id']))
-    
-    return {"message": "Meal updated successfully", "updated_plan": plan_data}
\ No newline at end of file
+    # Update just this meal; a stale expected_version loses instead of
+    # overwriting someone else's change
+    outcome, version = await run_in_db_executor(
+        update_plan_meal, plan[0], meal_update.meal_date, meal_update.meal_type,
+        meal_update.new_meal_data, meal_update.expected_version
+    )
+    if outcome == "error":
+        raise HTTPException(status_code=500, detail="Failed to update meal")
+    if outcome == "conflict":
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "Meal was changed by another request", "current_version": version}
+        )
+    
+    # The whole plan as it now stands; update_plan_meal has moved a
+    # blob-only plan's meals into item rows, so read those
+    meals, versions = await run_in_db_executor(
+        load_plan_meals, dict(plan[0], normalized=True), None, None, json_fragment
+    )
+    if meals is None:
+        raise HTTPException(status_code=500, detail="Failed to load meal plan")
+    updated_plan = loads(plan[0]['plan_data'])
+    updated_plan['meals'] = meals
+    
+    return JSONResponse({
+        "message": "Meal updated successfully",
+        "plan_id": plan[0]['plan_id'],
+        "meal_date": meal_update.meal_date.strftime("%Y-%m-%d"),
+        "meal_type": meal_update.meal_type,
+        "meal": meal_update.new_meal_data,
+        "version": version,
+        "updated_plan": updated_plan,
+        "meal_versions": versions
+    })
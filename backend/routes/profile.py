@@ -1,27 +1,44 @@
 from fastapi import APIRouter, Depends, HTTPException
 from models.user import UserProfile, UserProfileUpdate
-from database.connection import execute_query
+from database.connection import execute_query_async
 from utils.validation import get_current_user
+from ai_engine.dietary import profile_masks
+from ai_engine.nutrition import nutrition_targets, profile_fingerprint, profile_targets
+import json
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/profile", tags=["Profile"])
 
+PROFILE_FIELDS = (
+    'age', 'weight', 'height', 'dietary_preferences',
+    'allergies', 'health_goals', 'activity_level'
+)
+# Fields the stored nutrition targets are derived from
+TARGET_FIELDS = ('age', 'weight', 'height', 'health_goals', 'activity_level')
+
 @router.get("/")
 async def get_profile(current_user: dict = Depends(get_current_user)):
     """F003: Get user profile"""
-    print(f"Getting profile for user: {current_user}")  # Debug
+    logger.debug("Getting profile for user_id=%s", current_user['user_id'])
     
     query = """
         SELECT age, weight, height, dietary_preferences, 
-               allergies, health_goals, activity_level
+               allergies, health_goals, activity_level,
+               nutrition_targets, targets_fingerprint
         FROM user_profiles 
         WHERE user_id = %s
     """
-    profile = execute_query(query, (current_user['user_id'],))
+    profile = await execute_query_async(query, (current_user['user_id'],))
     
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
     
-    return profile[0]
+    profile = profile[0]
+    profile['nutrition_targets'] = profile_targets(profile)
+    profile.pop('targets_fingerprint')
+    return profile
 
 @router.put("/")
 async def update_profile(
@@ -29,20 +46,44 @@ async def update_profile(
     current_user: dict = Depends(get_current_user)
 ):
     """F003: Update user profile"""
-    print(f"Updating profile for user: {current_user}")  # Debug
+    logger.debug("Updating profile for user_id=%s", current_user['user_id'])
     
     # Build dynamic update query
     update_fields = []
     params = []
+    updates = {
+        field: value
+        for field, value in profile_data.dict(exclude_unset=True).items()
+        if value is not None
+    }
     
-    for field, value in profile_data.dict(exclude_unset=True).items():
-        if value is not None:
-            update_fields.append(f"{field} = %s")
-            params.append(value)
+    for field, value in updates.items():
+        update_fields.append(f"{field} = %s")
+        params.append(value)
     
     if not update_fields:
         raise HTTPException(status_code=400, detail="No fields to update")
     
+    # Derive everything plan generation needs once, here, rather than on
+    # every request: dietary bitmasks and nutrition targets
+    current = await execute_query_async(
+        f"SELECT {', '.join(PROFILE_FIELDS)} FROM user_profiles WHERE user_id = %s",
+        (current_user['user_id'],)
+    )
+    profile = dict(current[0]) if current else dict.fromkeys(PROFILE_FIELDS)
+    profile.update(updates)
+    
+    if 'allergies' in updates or 'dietary_preferences' in updates:
+        allergen_mask, diet_mask = profile_masks(
+            profile['dietary_preferences'], profile['allergies']
+        )
+        update_fields += ["allergen_mask = %s", "diet_mask = %s"]
+        params += [allergen_mask, diet_mask]
+    
+    if any(field in updates for field in TARGET_FIELDS):
+        update_fields += ["nutrition_targets = %s", "targets_fingerprint = %s"]
+        params += [json.dumps(nutrition_targets(profile)), profile_fingerprint(profile)]
+    
     params.append(current_user['user_id'])
     
     query = f"""
@@ -51,6 +92,6 @@ async def update_profile(
         WHERE user_id = %s
     """
     
-    result = execute_query(query, tuple(params))
+    result = await execute_query_async(query, tuple(params))
     
     return {"message": "Profile updated successfully"}
\ No newline at end of file
@@ -1,25 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException
-from models.meal_log import MealLog, ProgressQuery
-from database.connection import execute_query
+from fastapi import APIRouter, Depends, HTTPException, Query
+from models.meal_log import MealLog, MealLogBatch, ProgressQuery
+from database.connection import execute_query_async, run_in_db_executor
+from database.rollups import daily_rollups, day_totals, insert_meal_log, insert_meal_logs
 from utils.validation import get_current_user
-from datetime import datetime, timedelta
+from ai_engine.nutrition import profile_targets
+from ai_engine.optimizer import MEAL_TYPES
+from utils.progress_analytics import ROLLING_WINDOWS, analyze, paginate, target_series
+from utils.pagination import InvalidCursor, decode_date_cursor, encode_date_cursor
+from utils.serialization import loads
+from config import settings
+from datetime import date, datetime, timedelta
+import asyncio
+from typing import Optional
 
 router = APIRouter(prefix="/tracking", tags=["Meal Tracking"])
 
+# Most logs accepted by one /tracking/log/batch request
+LOG_BATCH_MAX_ITEMS = settings.log_batch_max_items
+# Page size limits and selectable columns for /tracking/history
+HISTORY_DEFAULT_LIMIT = 50
+HISTORY_MAX_LIMIT = settings.history_max_limit
+HISTORY_FIELDS = (
+    "log_id", "meal_date", "meal_type", "food_items", "calories", "protein", "carbs", "fats", "client_log_id"
+)
+# Longest period /tracking/analytics will cover, and its largest page
+ANALYTICS_MAX_RANGE_DAYS = settings.analytics_max_range_days
+ANALYTICS_MAX_PAGE_SIZE = settings.analytics_max_page_size
+
 @router.post("/log", response_model=dict)
 async def log_meal(
     meal: MealLog,
     current_user: dict = Depends(get_current_user)
 ):
     """F006: Log daily meals"""
-    query = """
-        INSERT INTO meal_logs (user_id, meal_date, meal_type, food_items, calories, protein, carbs, fats)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-    """
-    log_id = execute_query(
-        query,
-        (current_user['user_id'], meal.meal_date, meal.meal_type, meal.food_items,
-         meal.calories, meal.protein, meal.carbs, meal.fats)
+    # Inserts the log and updates the day's progress_tracking totals together
+    log_id = await run_in_db_executor(
+        insert_meal_log,
+        current_user['user_id'], meal.meal_date, meal.meal_type, meal.food_items,
+        meal.calories, meal.protein, meal.carbs, meal.fats
     )
     
     if not log_id:
@@ -30,26 +48,148 @@ async def log_meal(
         "log_id": log_id
     }
 
-@router.get("/today", response_model=dict)
-async def get_today_logs(current_user: dict = Depends(get_current_user)):
-    """Get today's meal logs"""
-    query = """
-        SELECT log_id, meal_date, meal_type, food_items, calories, protein, carbs, fats
-        FROM meal_logs
-        WHERE user_id = %s AND meal_date = CURDATE()
-        ORDER BY log_id DESC
+def _invalid_log_reason(meal) -> str:
+    if meal.meal_type not in MEAL_TYPES:
+        return f"meal_type must be one of {', '.join(MEAL_TYPES)}"
+    for field in ("calories", "protein", "carbs", "fats"):
+        value = getattr(meal, field)
+        if value is not None and value < 0:
+            return f"{field} must not be negative"
+    return None
+
+@router.post("/log/batch", response_model=dict)
+async def log_meals_batch(
+    batch: MealLogBatch,
+    current_user: dict = Depends(get_current_user)
+):
+    """Log many meals at once (offline sync).
+
+    Each log carries a client_log_id; logs already stored under that id
+    are reported as duplicates instead of being inserted again, so a sync
+    can safely be retried. Results are returned in request order.
     """
-    logs = execute_query(query, (current_user['user_id'],))
+    if len(batch.logs) > LOG_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {LOG_BATCH_MAX_ITEMS} logs per batch")
     
-    if not logs:
-        return {"message": "No meals logged today", "logs": [], "total_calories": 0}
+    results = [None] * len(batch.logs)
+    valid, positions = [], {}
+    for i, meal in enumerate(batch.logs):
+        reason = _invalid_log_reason(meal)
+        if reason is None and meal.client_log_id in positions:
+            reason = "client_log_id repeated in this batch"
+        if reason is not None:
+            results[i] = {"client_log_id": meal.client_log_id, "status": "invalid", "error": reason}
+            continue
+        positions[meal.client_log_id] = i
+        valid.append(meal.model_dump())
     
-    total_calories = sum(log['calories'] for log in logs)
+    stored = await run_in_db_executor(insert_meal_logs, current_user['user_id'], valid)
+    if stored is None:
+        raise HTTPException(status_code=500, detail="Failed to log meals")
     
-    return {
-        "logs": logs,
-        "total_calories": total_calories
+    for client_log_id, (status, log_id) in stored.items():
+        results[positions[client_log_id]] = {"client_log_id": client_log_id, "status": status, "log_id": log_id}
+    
+    counts = {status: 0 for status in ("created", "duplicate", "invalid")}
+    for result in results:
+        counts[result['status']] += 1
+    return {"results": results, **counts}
+
+@router.get("/today", response_model=dict)
+async def get_today_logs(
+    include_logs: bool = False,
+    current_user: dict = Depends(get_current_user)
+):
+    """Today's nutrition totals (from memory); ?include_logs=true also returns the log rows"""
+    user_id = current_user['user_id']
+    today = date.today()
+    totals = await run_in_db_executor(day_totals, user_id, today)
+    if totals is None:
+        raise HTTPException(status_code=500, detail="Failed to load today's totals")
+    
+    response = {
+        "date": today.isoformat(),
+        "totals": {field: totals[field] for field in ("calories", "protein", "carbs", "fats")},
+        "meal_count": totals['meal_count'],
+        "total_calories": totals['calories']
     }
+    if not totals['meal_count']:
+        response["message"] = "No meals logged today"
+    
+    if include_logs:
+        query = """
+            SELECT log_id, meal_date, meal_type, food_items, calories, protein, carbs, fats
+            FROM meal_logs
+            WHERE user_id = %s AND meal_date = %s
+            ORDER BY log_id DESC
+        """
+        response["logs"] = await execute_query_async(query, (user_id, today)) or []
+    
+    return response
+
+@router.get("/history", response_model=dict)
+async def get_log_history(
+    limit: int = Query(HISTORY_DEFAULT_LIMIT, ge=1, le=HISTORY_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    meal_type: Optional[str] = None,
+    fields: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Meal logs, newest first, one page at a time.
+
+    Pass the returned next_cursor to get the following page. fields is a
+    comma-separated subset of the log columns (log_id and meal_date are
+    always included).
+    """
+    columns = ["log_id", "meal_date"]
+    if fields:
+        requested = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = [field for field in requested if field not in HISTORY_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        columns += [field for field in requested if field not in columns]
+    else:
+        columns = list(HISTORY_FIELDS)
+    if meal_type is not None and meal_type not in MEAL_TYPES:
+        raise HTTPException(status_code=400, detail=f"meal_type must be one of {', '.join(MEAL_TYPES)}")
+    try:
+        after = decode_date_cursor(cursor)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    # Walks idx_meal_logs_user_date backwards; InnoDB secondary indexes end
+    # with the primary key, so (meal_date, log_id) order comes for free
+    conditions, params = ["user_id = %s"], [current_user['user_id']]
+    if start_date:
+        conditions.append("meal_date >= %s")
+        params.append(start_date)
+    if end_date:
+        conditions.append("meal_date <= %s")
+        params.append(end_date)
+    if meal_type:
+        conditions.append("meal_type = %s")
+        params.append(meal_type)
+    if after:
+        conditions.append("(meal_date < %s OR (meal_date = %s AND log_id < %s))")
+        params += [after[0], after[0], after[1]]
+    query = f"""
+        SELECT {', '.join(columns)}
+        FROM meal_logs
+        WHERE {' AND '.join(conditions)}
+        ORDER BY meal_date DESC, log_id DESC
+        LIMIT %s
+    """
+    rows = await execute_query_async(query, tuple(params) + (limit + 1,))
+    if rows is None:
+        raise HTTPException(status_code=500, detail="Failed to load meal history")
+    
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_date_cursor(rows[-1]['meal_date'], rows[-1]['log_id']) if has_more else None
+    
+    return {"logs": rows, "next_cursor": next_cursor, "has_more": has_more}
 
 @router.get("/progress", response_model=dict)
 async def get_progress(
@@ -57,34 +197,89 @@ async def get_progress(
     end_date: str,
     current_user: dict = Depends(get_current_user)
 ):
-    """F007: View progress insights"""
-    query = """
-        SELECT 
-            meal_date,
-            SUM(calories) as total_calories,
-            SUM(protein) as total_protein,
-            SUM(carbs) as total_carbs,
-            SUM(fats) as total_fats,
-            COUNT(*) as meal_count
-        FROM meal_logs
+    """F007: View progress insights (from the daily rollups in progress_tracking)"""
+    profile_query = """
+        SELECT age, weight, height, health_goals, activity_level,
+               nutrition_targets, targets_fingerprint
+        FROM user_profiles
         WHERE user_id = %s
-        AND meal_date BETWEEN %s AND %s
-        GROUP BY meal_date
-        ORDER BY meal_date
     """
-    progress_data = execute_query(query, (current_user['user_id'], start_date, end_date))
+    progress_data, profile = await asyncio.gather(
+        run_in_db_executor(daily_rollups, current_user['user_id'], start_date, end_date),
+        execute_query_async(profile_query, (current_user['user_id'],))
+    )
     
     if not progress_data:
         return {"message": "No data found for this period", "data": []}
     
     # Calculate statistics
     avg_calories = sum(day['total_calories'] for day in progress_data) / len(progress_data)
+    targets = profile_targets(profile[0]) if profile else None
     
     return {
         "daily_data": progress_data,
         "summary": {
             "average_calories": round(avg_calories, 2),
+            "daily_calorie_target": targets['daily_calories'] if targets else None,
             "days_tracked": len(progress_data),
             "period": f"{start_date} to {end_date}"
         }
-    }
\ No newline at end of file
+    }
+
+@router.get("/analytics", response_model=dict)
+async def get_progress_analytics(
+    start_date: date,
+    end_date: date,
+    resolution: str = Query("week", pattern="^(day|week|month)$"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(53, ge=1, le=ANALYTICS_MAX_PAGE_SIZE),
+    current_user: dict = Depends(get_current_user)
+):
+    """Daily, weekly or monthly progress with rolling averages, macro ratios and adherence"""
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    if (end_date - start_date).days + 1 > ANALYTICS_MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=400, detail=f"Date range is limited to {ANALYTICS_MAX_RANGE_DAYS} days"
+        )
+    
+    user_id = current_user['user_id']
+    # Earlier days only feed the trailing averages at the start of the range
+    warmup_start = start_date - timedelta(days=max(ROLLING_WINDOWS) - 1)
+    plans_query = """
+        SELECT start_date, end_date, JSON_EXTRACT(plan_data, '$.nutritional_target') AS target
+        FROM meal_plans
+        WHERE user_id = %s AND start_date <= %s AND end_date >= %s
+        ORDER BY created_at
+    """
+    profile_query = """
+        SELECT age, weight, height, health_goals, activity_level,
+               nutrition_targets, targets_fingerprint
+        FROM user_profiles
+        WHERE user_id = %s
+    """
+    rollups, plans, profile = await asyncio.gather(
+        run_in_db_executor(daily_rollups, user_id, warmup_start, end_date),
+        execute_query_async(plans_query, (user_id, end_date, warmup_start)),
+        execute_query_async(profile_query, (user_id,))
+    )
+    if rollups is None or plans is None:
+        raise HTTPException(status_code=500, detail="Failed to load progress data")
+    
+    # Days without a plan are measured against the profile's own targets
+    for plan in plans:
+        plan['target'] = loads(plan['target']) if plan['target'] else None
+    default_target = profile_targets(profile[0]) if profile else None
+    days = (end_date - warmup_start).days + 1
+    targets = target_series(plans, default_target, warmup_start, days)
+    
+    result = analyze(rollups, targets, start_date, end_date, warmup_start, resolution)
+    buckets = paginate(result['buckets'], page, page_size)
+    
+    return {
+        "resolution": resolution,
+        "period": {"start_date": start_date.isoformat(), "end_date": end_date.isoformat()},
+        "buckets": buckets['items'],
+        "pagination": buckets['pagination'],
+        "summary": result['summary']
+    }
@@ -0,0 +1,308 @@
+"""Pre-fork production server: one master, WEB_WORKERS uvicorn workers.
+
+The master imports the app, loads the meal catalog and settles the heap
+before binding the listening socket and forking, so every worker starts
+with the code, config and catalog already in memory and shares those
+pages copy-on-write. Each worker runs its own uvicorn.Server (and event
+loop, DB pool and caches) on the shared socket; the kernel spreads
+connections across them. Writes bump per-user generations in memory
+shared by all workers (utils/generations.py), so no worker keeps serving
+a cached plan or daily total another worker has changed. Background jobs
+run in the worker that accepted them and publish their status to the
+jobs table, so a status request can land on any worker; batch runs take
+a host-wide lock, so only one runs at a time (jobs/batch_generation.py).
+
+Signals to the master:
+  SIGHUP           rolling reload: reload the meal catalog, then replace
+                   workers one at a time, starting each new worker before
+                   draining the old one so capacity never drops
+  SIGTERM/SIGINT   graceful stop: workers stop accepting, finish in-flight
+                   requests (up to WEB_GRACEFUL_TIMEOUT) and exit
+
+Code changes need a full restart, since workers are forked from the
+master's already-imported modules. Workers that die are replaced; workers
+whose event loop stops heartbeating for WEB_WORKER_TIMEOUT are killed and
+replaced. Per-worker stats are served to admins on GET /server/workers.
+
+Usage (from the backend directory):  python serve.py
+"""
+import asyncio
+import gc
+import logging
+import os
+import select
+import signal
+import socket
+import sys
+import time
+
+import uvicorn
+
+from config import settings
+from database.connection import shutdown_database
+from utils import generations, worker_stats
+from utils.logging_config import shutdown_logging
+from utils.generations import GenerationTable
+from utils.worker_stats import DRAINING, SERVING, WorkerStatsTable
+
+HOST = settings.host
+PORT = settings.port
+WEB_WORKERS = settings.web_workers
+WEB_BACKLOG = settings.web_backlog
+# Seconds a stopping worker gets to finish in-flight requests
+WEB_GRACEFUL_TIMEOUT = settings.web_graceful_timeout
+# Seconds without a heartbeat before a worker is considered hung
+WEB_WORKER_TIMEOUT = settings.web_worker_timeout
+WEB_KEEPALIVE = settings.web_keepalive
+
+HEARTBEAT_INTERVAL = 1.0
+
+logger = logging.getLogger("serve")
+
+
+def preload():
+    """Import and warm everything workers share; returns the ASGI app"""
+    from main import app
+    from ai_engine.catalog import get_catalog
+
+    get_catalog()
+    # Workers must not inherit the master's database connections (the db
+    # catalog source queries MySQL); each worker opens its own
+    shutdown_database()
+    # Move everything allocated so far out of the collector's reach, so
+    # collections in the workers don't touch (and un-share) these pages
+    gc.collect()
+    gc.freeze()
+    return app
+
+
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+async def _serve(server: uvicorn.Server, sock: socket.socket, slot):
+    async def heartbeat():
+        while True:
+            slot.heartbeat(serving=server.started)
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+
+    beat = asyncio.create_task(heartbeat())
+    try:
+        await server.serve(sockets=[sock])
+    finally:
+        beat.cancel()
+
+
+def run_worker(app, sock: socket.socket, table, cache_generations, index: int, generation: int) -> int:
+    """Worker process body; returns the exit code"""
+    for sig in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+        signal.signal(sig, signal.SIG_DFL)
+    signal.set_wakeup_fd(-1)
+    table.claim(index, os.getpid(), generation)
+    worker_stats.attach(table, index, WEB_WORKERS)
+    generations.attach(cache_generations, index)
+
+    config = uvicorn.Config(
+        app,
+        lifespan="on",
+        log_config=None,
+        access_log=False,
+        proxy_headers=True,
+        timeout_keep_alive=WEB_KEEPALIVE,
+        timeout_graceful_shutdown=WEB_GRACEFUL_TIMEOUT,
+    )
+    server = uvicorn.Server(config)
+    try:
+        asyncio.run(_serve(server, sock, worker_stats.current_slot))
+    except Exception:
+        logger.exception("Worker crashed")
+        return 1
+    return 0 if server.started else 3
+
+
+class Master:
+    """Forks, watches and replaces the worker processes"""
+
+    def __init__(self, app, sock: socket.socket, workers: int):
+        self.app = app
+        self.sock = sock
+        self.workers = workers
+        # Room for a full second set of workers during a rolling reload
+        self.table = WorkerStatsTable(workers * 2)
+        # Cache invalidations between workers, one row per worker slot
+        self.generations = GenerationTable(workers * 2)
+        self.generation = 0
+        self.children = {}  # pid -> (slot index, generation)
+        self.draining = set()
+        self.stopping = False
+        self._signals = []
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        os.set_blocking(self._wakeup_r, False)
+        os.set_blocking(self._wakeup_w, False)
+
+    def spawn(self) -> int:
+        index = self.table.free_slot()
+        if index is None:
+            raise RuntimeError("No free worker slot")
+        # Reserved before forking; from then on only the worker writes it
+        self.table.claim(index, 0, self.generation)
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                os.close(self._wakeup_r)
+                os.close(self._wakeup_w)
+                code = run_worker(self.app, self.sock, self.table, self.generations, index, self.generation)
+            finally:
+                shutdown_logging()
+                os._exit(code)
+        self.children[pid] = (index, self.generation)
+        logger.info("Started worker", extra={"pid": pid, "slot": index, "generation": self.generation})
+        return pid
+
+    def _handle_signal(self, signum, frame):
+        self._signals.append(signum)
+        try:
+            os.write(self._wakeup_w, b"\0")
+        except BlockingIOError:
+            pass
+
+    def _sleep(self, timeout: float):
+        ready, _, _ = select.select([self._wakeup_r], [], [], timeout)
+        if ready:
+            try:
+                while os.read(self._wakeup_r, 512):
+                    pass
+            except BlockingIOError:
+                pass
+
+    def reap(self):
+        """Collect exited workers; replace them unless stopping"""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            child = self.children.pop(pid, None)
+            if child is None:
+                continue
+            self.table.release(child[0])
+            code = os.waitstatus_to_exitcode(status)
+            if self.stopping or pid in self.draining:
+                self.draining.discard(pid)
+                logger.info("Worker exited", extra={"pid": pid, "exit_code": code})
+                continue
+            logger.warning("Worker died, replacing it", extra={"pid": pid, "exit_code": code})
+            if code == 3:
+                # Failed during startup (bad config, port, ...); don't spin
+                time.sleep(1)
+            self.spawn()
+
+    def kill_hung(self):
+        for pid, (index, _) in list(self.children.items()):
+            if self.table.state(index) == SERVING and self.table.heartbeat_age(index) > WEB_WORKER_TIMEOUT:
+                logger.error("Worker stopped heartbeating, killing it", extra={"pid": pid})
+                os.kill(pid, signal.SIGKILL)
+
+    def drain(self, pid: int):
+        """Ask a worker to finish its in-flight requests and exit"""
+        self.draining.add(pid)
+        if pid in self.children:
+            self.table.set_state(self.children[pid][0], DRAINING)
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+    def _wait_serving(self, pid: int, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            self.reap()
+            if pid not in self.children:
+                return False
+            if self.table.state(self.children[pid][0]) == SERVING:
+                return True
+            self._sleep(0.1)
+        return False
+
+    def reload(self):
+        from ai_engine.catalog import reload_catalog
+
+        logger.info("Reloading workers")
+        try:
+            reload_catalog()
+        except Exception:
+            logger.exception("Catalog reload failed; new workers keep the current one")
+        finally:
+            # Don't hand the reload's database connection to the new workers
+            shutdown_database()
+        gc.collect()
+        gc.freeze()
+        self.generation += 1
+        old = [pid for pid, (_, generation) in self.children.items() if generation < self.generation]
+        for pid in old:
+            if pid not in self.children:
+                # Died meanwhile; reap() has already replaced it
+                continue
+            new_pid = self.spawn()
+            if not self._wait_serving(new_pid, WEB_GRACEFUL_TIMEOUT):
+                logger.error("Replacement worker didn't start; keeping the old one", extra={"pid": new_pid})
+                continue
+            self.drain(pid)
+
+    def stop(self):
+        self.stopping = True
+        for pid in list(self.children):
+            self.drain(pid)
+        deadline = time.monotonic() + WEB_GRACEFUL_TIMEOUT + 5
+        while self.children and time.monotonic() < deadline:
+            self.reap()
+            self._sleep(0.1)
+        for pid in list(self.children):
+            logger.warning("Worker didn't stop in time, killing it", extra={"pid": pid})
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        while self.children:
+            self.reap()
+            self._sleep(0.05)
+
+    def run(self):
+        for sig in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+            signal.signal(sig, self._handle_signal)
+        for _ in range(self.workers):
+            self.spawn()
+        logger.info("Serving", extra={"host": HOST, "port": PORT, "workers": self.workers, "pid": os.getpid()})
+
+        while True:
+            self._sleep(HEARTBEAT_INTERVAL)
+            signals, self._signals = self._signals, []
+            if signal.SIGTERM in signals or signal.SIGINT in signals:
+                logger.info("Stopping")
+                self.stop()
+                return
+            if signal.SIGHUP in signals:
+                self.reload()
+            self.reap()
+            self.kill_hung()
+
+
+def main():
+    app = preload()
+    sock = bind_socket(HOST, PORT, WEB_BACKLOG)
+    Master(app, sock, max(1, WEB_WORKERS)).run()
+    sock.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,40 @@
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import asyncio
 import bcrypt
-import os
-from dotenv import load_dotenv
+import hashlib
+import logging
+import threading
+import time
+from config import settings
+from utils.cache import TTLCache
+from utils.metrics import jwt_decode_duration, password_hash_duration
 
-load_dotenv()
+SECRET_KEY = settings.secret_key
+ALGORITHM = settings.algorithm
+ACCESS_TOKEN_EXPIRE_MINUTES = settings.access_token_expire_minutes
 
-SECRET_KEY = os.getenv('SECRET_KEY')
-ALGORITHM = os.getenv('ALGORITHM')
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv('ACCESS_TOKEN_EXPIRE_MINUTES'))
+# bcrypt work factor; each +1 doubles hashing cost
+BCRYPT_ROUNDS = settings.bcrypt_rounds
+# "thread" (bcrypt releases the GIL) or "process"
+PASSWORD_HASH_EXECUTOR = settings.password_hash_executor
+PASSWORD_HASH_WORKERS = settings.password_hash_workers
+# Jobs allowed to wait for a worker before new ones are rejected (0 = unbounded)
+PASSWORD_HASH_MAX_QUEUE = settings.password_hash_max_queue
 
-print(f"Loaded SECRET_KEY: {SECRET_KEY[:20] if SECRET_KEY else 'None'}...")  # Debug
-print(f"Loaded ALGORITHM: {ALGORITHM}")  # Debug
+# sha256(token) -> verified claims, each entry kept until the token's exp
+token_cache = TTLCache(
+    maxsize=settings.jwt_cache_size,
+    ttl=settings.jwt_cache_max_ttl,
+    name="jwt_claims"
+)
+
+logger = logging.getLogger(__name__)
+
+if not SECRET_KEY:
+    logger.warning("SECRET_KEY is not set; tokens cannot be signed or verified")
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a hash"""
@@ -23,10 +45,100 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     """Hash a password"""
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed.decode('utf-8')
 
+class PasswordHasherBusy(Exception):
+    """Raised when the password hashing queue is full"""
+
+
+class PasswordHashPool:
+    """Bounded worker pool that keeps bcrypt off the event loop.
+
+    At most ``workers`` hashes run at once; up to ``max_queue`` more wait for
+    a free worker and anything beyond that is rejected with
+    PasswordHasherBusy so a login storm degrades auth instead of the whole API.
+    """
+
+    def __init__(self, kind=PASSWORD_HASH_EXECUTOR, workers=PASSWORD_HASH_WORKERS,
+                 max_queue=PASSWORD_HASH_MAX_QUEUE):
+        self.kind = kind
+        self.workers = max(1, workers)
+        self.max_queue = max_queue
+        self._executor = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._stats = {"completed": 0, "rejected": 0, "busy_seconds": 0.0, "max_queue_depth": 0}
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.kind == 'process':
+                        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                    else:
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=self.workers, thread_name_prefix="bcrypt"
+                        )
+        return self._executor
+
+    async def run(self, func, *args):
+        """Run func(*args) on a hashing worker and return its result"""
+        with self._lock:
+            queue_depth = self._in_flight - self.workers + 1
+            if self.max_queue and queue_depth > self.max_queue:
+                self._stats["rejected"] += 1
+                raise PasswordHasherBusy("Too many concurrent password operations")
+            self._in_flight += 1
+            self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], queue_depth)
+        try:
+            loop = asyncio.get_running_loop()
+            result, elapsed = await loop.run_in_executor(self._get_executor(), _timed, func, *args)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+        with self._lock:
+            self._stats["completed"] += 1
+            self._stats["busy_seconds"] += elapsed
+        password_hash_duration.observe(elapsed, func.__name__)
+        return result
+
+    def shutdown(self):
+        """Stop the workers; the next job starts a fresh executor"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def stats(self):
+        """Snapshot of worker occupancy and queue depth"""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot.update(
+                executor=self.kind,
+                workers=self.workers,
+                in_flight=self._in_flight,
+                queue_depth=max(0, self._in_flight - self.workers),
+            )
+        return snapshot
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+password_hash_pool = PasswordHashPool()
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against a hash on the hashing pool"""
+    return await password_hash_pool.run(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the hashing pool"""
+    return await password_hash_pool.run(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT token"""
     to_encode = data.copy()
@@ -36,30 +148,51 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
         expire = datetime.utcnow() + timedelta(minutes=15)
     to_encode.update({"exp": expire})
     
-    print(f"Creating token with data: {data}")  # Debug
-    print(f"Token will expire at: {expire}")  # Debug
+    logger.debug("Creating token for %s expiring at %s", data.get("sub"), expire)
     
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def decode_token(token: str):
-    """Decode and verify a JWT token"""
+def decode_token_claims(token: str) -> Optional[dict]:
+    """Decode and verify a JWT token, returning its claims.
+
+    Verified claims are cached by token digest until the token expires, so
+    repeat requests with the same token skip signature verification. The
+    returned dict is shared with the cache and must not be mutated.
+    """
+    digest = hashlib.sha256(token.encode('utf-8')).digest()
+    payload = token_cache.get(digest)
+    if payload is not None:
+        return payload
+    
+    start = time.perf_counter()
     try:
-        print(f"Attempting to decode token: {token[:20]}...")  # Debug
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        print(f"Decoded payload: {payload}")  # Debug
-        
-        email: str = payload.get("sub")
-        if email is None:
-            print("No 'sub' field in payload")  # Debug
-            return None
+        jwt_decode_duration.observe(time.perf_counter() - start, "valid")
+        logger.debug("Verified token for %s", payload.get("sub"))
         
-        print(f"Extracted email: {email}")  # Debug
-        return email
+        exp = payload.get("exp")
+        if exp is not None:
+            token_cache.set(digest, payload, ttl=min(exp - time.time(), token_cache.ttl))
+        return payload
         
     except JWTError as e:
-        print(f"JWT decode error: {type(e).__name__} - {str(e)}")  # Debug
+        jwt_decode_duration.observe(time.perf_counter() - start, "rejected")
+        logger.info("JWT rejected: %s - %s", type(e).__name__, e)
         return None
     except Exception as e:
-        print(f"Unexpected decode error: {type(e).__name__} - {str(e)}")  # Debug
-        return None
\ No newline at end of file
+        logger.warning("Unexpected JWT decode error: %s - %s", type(e).__name__, e)
+        return None
+
+def decode_token(token: str):
+    """Decode and verify a JWT token"""
+    payload = decode_token_claims(token)
+    if payload is None:
+        return None
+    
+    email: str = payload.get("sub")
+    if email is None:
+        logger.info("Token has no 'sub' claim")
+        return None
+    
+    return email
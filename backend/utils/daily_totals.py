@@ -0,0 +1,100 @@
+"""Per-user running nutrition totals for a day, kept in memory.
+
+Entries are keyed by (user_id, date), so a new day simply starts a new
+key, and expire at the end of their day (capped at DAILY_TOTALS_TTL).
+Meal logging adds each committed log to the cached entry if there is one;
+otherwise the next read loads the day's progress_tracking row.
+
+The cache is per process. Under serve.py each log also bumps the user's
+shared generation (utils/generations.py), so entries in the other workers
+are reloaded on their next read instead of missing the log.
+"""
+import threading
+import time
+from datetime import date
+from typing import Dict, Optional
+
+from config import settings
+from utils import generations
+from utils.cache import TTLCache, seconds_until_end_of
+
+DAILY_TOTALS_SIZE = settings.daily_totals_cache_size
+DAILY_TOTALS_TTL = settings.daily_totals_ttl
+
+TOTAL_FIELDS = ("calories", "protein", "carbs", "fats", "meal_count")
+
+
+def empty_totals() -> Dict[str, float]:
+    return {field: 0 for field in TOTAL_FIELDS}
+
+
+def as_totals(totals: Dict) -> Dict[str, float]:
+    """Totals as plain floats (meal_count as int), missing fields as 0"""
+    values = {field: round(float(totals.get(field) or 0), 2) for field in TOTAL_FIELDS}
+    values["meal_count"] = int(values["meal_count"])
+    return values
+
+
+class DailyTotalsCache:
+    """(user_id, date) -> {"calories", "protein", "carbs", "fats", "meal_count"}"""
+
+    def __init__(self, maxsize: int, max_ttl: float):
+        self.max_ttl = max_ttl
+        self._entries = TTLCache(maxsize, max_ttl, name="daily_totals")
+        # key -> time of the last write, so a load that raced a log can't
+        # cache totals that miss it
+        self._writes = TTLCache(maxsize, max_ttl, name="daily_total_writes")
+        self._lock = threading.Lock()
+
+    def _ttl(self, day: date) -> float:
+        return min(self.max_ttl, seconds_until_end_of(day))
+
+    def get(self, user_id: int, day: date) -> Optional[Dict[str, float]]:
+        with self._lock:
+            entry = self._entries.get((user_id, day))
+            if entry is None or entry[0] != generations.current(generations.DAILY_TOTALS, user_id):
+                return None
+            return dict(entry[1])
+
+    def generation(self, user_id: int) -> int:
+        """Pass to set(); read it before loading the totals"""
+        return generations.current(generations.DAILY_TOTALS, user_id)
+
+    def set(self, user_id: int, day: date, totals: Dict[str, float], read_started: float, generation: int):
+        """Cache totals loaded from the database unless a log landed since read_started"""
+        key = (user_id, day)
+        with self._lock:
+            written_at = self._writes.get(key)
+            if written_at is None or written_at < read_started:
+                self._entries.set(key, [generation, as_totals(totals)], ttl=self._ttl(day))
+
+    def add(self, user_id: int, day: date, delta: Dict[str, float]):
+        """Apply a committed log (or batch of logs) to the cached day, if cached"""
+        key = (user_id, day)
+        with self._lock:
+            self._writes.set(key, time.monotonic())
+            generation = generations.bump(generations.DAILY_TOTALS, user_id)
+            entry = self._entries.get(key)
+            if entry is not None:
+                # Still current if nothing but this log moved the generation
+                if generation is not None and entry[0] == generation - 1:
+                    entry[0] = generation
+                totals = entry[1]
+                # Stored values have at most 2 decimals; keep float sums exact to that
+                for field, value in as_totals(delta).items():
+                    totals[field] = round(totals[field] + value, 2)
+
+    def invalidate(self, user_id: int, day: date):
+        with self._lock:
+            self._writes.set((user_id, day), time.monotonic())
+            self._entries.invalidate((user_id, day))
+        generations.bump(generations.DAILY_TOTALS, user_id)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        return self._entries.stats()
+
+
+daily_totals = DailyTotalsCache(DAILY_TOTALS_SIZE, DAILY_TOTALS_TTL)
@@ -0,0 +1,77 @@
+"""Per-user write counters shared between the serve.py workers.
+
+The plan and daily-totals caches are per process, so a write handled by
+one worker must also retire the other workers' copies. Each write bumps a
+counter for the user; cache entries remember the counter's value from
+before their data was read and are treated as missing once it has moved.
+
+The master maps the counters before forking: one row of BUCKETS counters
+per worker slot and namespace, users hashed into buckets (a collision
+only costs the other user a cache miss). A worker only ever increments
+its own row, so no cross-process locking is needed, and a user's
+generation is the sum of their bucket across all rows. Rows are never
+reset, so the sum only grows and an old value can't come back.
+
+Outside serve.py nothing is attached: generations stay 0 and caches
+behave as before.
+"""
+import mmap
+import threading
+from typing import Optional
+
+PLANS, DAILY_TOTALS = 0, 1
+NAMESPACES = 2
+BUCKETS = 8192
+
+
+class GenerationTable:
+    """uint64 counters in MAP_SHARED memory, one row per slot and namespace"""
+
+    def __init__(self, slots: int, buckets: int = BUCKETS):
+        self.slots = slots
+        self.buckets = buckets
+        self._memory = mmap.mmap(-1, 8 * slots * NAMESPACES * buckets)
+        self._counters = memoryview(self._memory).cast("Q")
+        self._stride = NAMESPACES * buckets
+
+    def current(self, namespace: int, user_id: int) -> int:
+        start = namespace * self.buckets + user_id % self.buckets
+        return sum(self._counters[start::self._stride])
+
+    def bump(self, slot: int, namespace: int, user_id: int):
+        index = slot * self._stride + namespace * self.buckets + user_id % self.buckets
+        self._counters[index] += 1
+
+
+# Set in each worker by serve.py before it starts serving
+table: Optional[GenerationTable] = None
+slot = 0
+_bump_lock = threading.Lock()
+
+
+def attach(generation_table: GenerationTable, index: int):
+    global table, slot
+    table, slot = generation_table, index
+
+
+def current(namespace: int, user_id: int) -> int:
+    """The user's generation; read it before loading data to cache"""
+    if table is None:
+        return 0
+    return table.current(namespace, user_id)
+
+
+def bump(namespace: int, user_id: int) -> Optional[int]:
+    """Record a committed write for user_id.
+
+    Returns the generation the write moved the user to, provided no other
+    write landed concurrently (None otherwise, or outside serve.py), so the
+    writer can keep its own entry current instead of dropping it.
+    """
+    if table is None:
+        return None
+    with _bump_lock:
+        before = table.current(namespace, user_id)
+        table.bump(slot, namespace, user_id)
+        after = table.current(namespace, user_id)
+    return after if after == before + 1 else None
@@ -0,0 +1,113 @@
+"""Readiness state refreshed by a background probe.
+
+A task started in the app lifespan checks MySQL (a SELECT 1 on a dedicated
+connection) and the connection pool every HEALTH_PROBE_INTERVAL seconds and
+stores the outcome; /health/ready serves that stored result without
+touching the database, so load balancer checks cost nothing however often
+they arrive. A worker reports not ready when:
+
+- the last probe failed or timed out,
+- requests timed out waiting for a pooled connection since the previous
+  probe (the pool is saturated), or
+- no probe has finished within HEALTH_STALE_AFTER seconds (the probe loop
+  or the event loop is stuck).
+"""
+import asyncio
+import logging
+import time
+from typing import Dict
+
+from config import settings
+from database.connection import get_pool, ping_database
+
+logger = logging.getLogger(__name__)
+
+HEALTH_PROBE_INTERVAL = settings.health_probe_interval
+HEALTH_PROBE_TIMEOUT = settings.health_probe_timeout
+HEALTH_STALE_AFTER = settings.health_stale_after
+
+
+class HealthMonitor:
+    """Runs the dependency probes and keeps the latest readiness result"""
+
+    def __init__(self, interval=HEALTH_PROBE_INTERVAL, timeout=HEALTH_PROBE_TIMEOUT,
+                 stale_after=HEALTH_STALE_AFTER):
+        self.interval = interval
+        self.timeout = timeout
+        self.stale_after = stale_after
+        self._task = None
+        self._probe = None
+        self._last_pool_timeouts = None
+        self._checked_at = None
+        self._result = {"status": "starting", "ready": False, "checks": {}}
+
+    async def _check_database(self) -> Dict:
+        # A probe stuck past its timeout keeps its thread; don't pile more on
+        if self._probe is None or self._probe.done():
+            self._probe = asyncio.ensure_future(asyncio.to_thread(ping_database))
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._probe), self.timeout)
+        except asyncio.TimeoutError:
+            return {"ok": False, "error": f"no response within {self.timeout:g}s"}
+        except Exception as e:
+            return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        return {"ok": True, "latency_ms": round((time.perf_counter() - start) * 1000, 2)}
+
+    def _check_pool(self) -> Dict:
+        stats = get_pool().stats()
+        previous = stats["timeouts"] if self._last_pool_timeouts is None else self._last_pool_timeouts
+        timeouts = stats["timeouts"] - previous
+        self._last_pool_timeouts = stats["timeouts"]
+        return {
+            "ok": timeouts == 0,
+            "in_use": stats["in_use"],
+            "max_size": stats["max_size"],
+            "checkout_timeouts": timeouts,
+        }
+
+    async def probe(self) -> Dict:
+        """Run every check now and store the result"""
+        checks = {"database": await self._check_database(), "pool": self._check_pool()}
+        ready = all(check["ok"] for check in checks.values())
+        if ready != self._result["ready"]:
+            log = logger.info if ready else logger.warning
+            log("Readiness changed", extra={"ready": ready, "checks": checks})
+        self._checked_at = time.monotonic()
+        self._result = {"status": "ready" if ready else "unavailable", "ready": ready, "checks": checks}
+        return self._result
+
+    def readiness(self) -> Dict:
+        """The stored result, marked not ready once it is too old to trust"""
+        if self._checked_at is None:
+            return self._result
+        age = time.monotonic() - self._checked_at
+        result = dict(self._result, checked_seconds_ago=round(age, 1))
+        if age > self.stale_after:
+            result.update(status="stale", ready=False)
+        return result
+
+    async def _run(self):
+        while True:
+            try:
+                await self.probe()
+            except Exception:
+                logger.exception("Health probe failed")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Start probing on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+health_monitor = HealthMonitor()
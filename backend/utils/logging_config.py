@@ -0,0 +1,158 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import uuid
+from contextvars import ContextVar
+
+from config import settings
+
+# Correlation ID of the request being handled in the current context
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+# Attributes every LogRecord has; anything else was passed via ``extra``
+_STANDARD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+
+_listener = None
+
+
+def new_request_id() -> str:
+    """Generate a fresh correlation ID"""
+    return uuid.uuid4().hex
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp each record with the current request's correlation ID.
+
+    Runs in the emitting thread, before the record is handed to the queue,
+    so the context variable is still the caller's.
+    """
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class DebugSamplingFilter(logging.Filter):
+    """Keep only a random fraction of DEBUG records"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.rate >= 1.0:
+            return True
+        return random.random() < self.rate
+
+
+class StructuredFormatter(logging.Formatter):
+    """One JSON object per line; ``extra`` fields become top-level keys"""
+
+    def format(self, record):
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class _DeferredFormatQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread.
+
+    Only the message arguments are merged (they may be mutated after the
+    call returns) and tracebacks rendered, since exc_info can't outlive the
+    except block that produced it.
+    """
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s [%(name)s] [%(request_id)s] %(message)s")
+
+
+def _parse_module_levels(spec: str):
+    """Parse "utils.auth_helper=DEBUG,database=WARNING" into (logger, level) pairs"""
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = item.partition("=")
+        yield name.strip(), level.strip().upper()
+
+
+def setup_logging():
+    """Route all logging through a queue drained by a background thread.
+
+    Configured from the environment:
+      LOG_LEVEL               root level (default INFO)
+      LOG_LEVELS              per-module overrides, e.g. "utils.validation=DEBUG"
+      LOG_FORMAT              "json" (default) or "text"
+      LOG_DEBUG_SAMPLE_RATE   fraction of DEBUG records kept (default 1.0)
+
+    Request handlers only pay for a queue put; formatting and the stdout
+    write happen on the listener thread. Safe to call more than once.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    if settings.log_format == 'text':
+        stream_handler.setFormatter(TextFormatter())
+    else:
+        stream_handler.setFormatter(StructuredFormatter())
+
+    queue_handler = _DeferredFormatQueueHandler(queue.SimpleQueue())
+    queue_handler.addFilter(RequestIdFilter())
+    queue_handler.addFilter(DebugSamplingFilter(settings.log_debug_sample_rate))
+
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(settings.log_level)
+    for name, level in _parse_module_levels(settings.log_levels):
+        logging.getLogger(name).setLevel(level)
+
+    _listener = logging.handlers.QueueListener(
+        queue_handler.queue, stream_handler, respect_handler_level=True
+    )
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def _restart_after_fork():
+    # The listener thread doesn't survive fork; give the child its own
+    global _listener
+    if _listener is not None:
+        _listener = None
+        setup_logging()
+
+
+os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
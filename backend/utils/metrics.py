@@ -0,0 +1,290 @@
+"""In-process metrics exposed in Prometheus text format on /metrics.
+
+Histograms and counters are plain dicts of per-label counts behind one
+lock each, so recording a sample costs a perf_counter call, a bisect and a
+few additions. Gauges (cache hit rates, pool occupancy, queue depths) are
+read from the subsystems' own stats() when /metrics is scraped.
+
+Metrics are per process; with several workers, each one is a separate
+scrape target.
+"""
+import bisect
+import re
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from config import settings
+
+METRICS_ENABLED = settings.metrics_enabled
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Seconds; requests and queries span sub-millisecond cache hits to
+# multi-second plan generation
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# bcrypt at the default work factor takes a few hundred milliseconds
+HASH_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0, 5.0)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic count per label set"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in values]
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count per label set"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last is +Inf), sum]
+        self._series: Dict[Tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, *label_values):
+        """Observe the duration of the with-block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *label_values)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            series = sorted((key, list(counts), total) for key, (counts, total) in self._series.items())
+        lines = []
+        names = self.labels + ("le",)
+        for key, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(names, key + (_format_value(float(bound)),))} {cumulative}"
+                )
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics plus collectors that report gauges at scrape time"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors: List[Callable[[], List[Tuple[str, str, str, Dict[str, str], float]]]] = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def add_collector(self, collector: Callable):
+        """Register collector() -> [(name, kind, help, labels, value)] samples"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Every metric in Prometheus text exposition format"""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+
+        collected: Dict[str, Tuple[str, str, list]] = {}
+        for collector in self._collectors:
+            for name, kind, help, labels, value in collector():
+                collected.setdefault(name, (kind, help, []))[2].append((labels, value))
+        for name, (kind, help, samples) in collected.items():
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(tuple(labels), tuple(labels.values()))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+request_duration = registry.histogram(
+    "http_request_duration_seconds", "Time to produce a response, by route template",
+    labels=("method", "route")
+)
+requests_total = registry.counter(
+    "http_requests_total", "Responses sent, by route template and status code",
+    labels=("method", "route", "status")
+)
+db_query_duration = registry.histogram(
+    "db_query_duration_seconds", "Time spent executing database statements, by verb:table",
+    labels=("query",)
+)
+db_query_errors = registry.counter(
+    "db_query_errors_total", "Database statements that raised, by verb:table",
+    labels=("query",)
+)
+password_hash_duration = registry.histogram(
+    "password_hash_duration_seconds", "bcrypt time per operation, excluding queueing",
+    labels=("operation",), buckets=HASH_BUCKETS
+)
+jwt_decode_duration = registry.histogram(
+    "jwt_decode_duration_seconds", "JWT signature verification time on token cache misses",
+    labels=("result",)
+)
+
+
+_TABLE_AFTER = {
+    "select": re.compile(r"\bfrom\s+`?(\w+)", re.IGNORECASE),
+    "delete": re.compile(r"\bfrom\s+`?(\w+)", re.IGNORECASE),
+    "insert": re.compile(r"\binto\s+`?(\w+)", re.IGNORECASE),
+    "replace": re.compile(r"\binto\s+`?(\w+)", re.IGNORECASE),
+    "update": re.compile(r"^\s*update\s+`?(\w+)", re.IGNORECASE),
+}
+
+
+@lru_cache(maxsize=1024)
+def query_label(query: str) -> str:
+    """'verb:table' for a SQL statement, e.g. 'select:meal_plans'"""
+    words = query.split(None, 1)
+    verb = words[0].lower() if words else "unknown"
+    pattern = _TABLE_AFTER.get(verb)
+    match = pattern.search(query) if pattern else None
+    return f"{verb}:{match.group(1).lower() if match else '-'}"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and status per route template.
+
+    Routes are labelled by their path template ("/meal-plan/jobs/{job_id}")
+    so label cardinality stays bounded; unmatched paths share one label.
+    Duration runs until the last body chunk is sent, so streamed responses
+    count in full.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            request_duration.observe(time.perf_counter() - start, method, path)
+            requests_total.inc(method, path, str(status))
+
+
+# stats() keys that only ever grow; exported as counters, the rest as gauges
+_CUMULATIVE_STATS = {
+    "hits", "misses", "evictions", "expirations", "checkouts", "waits", "wait_seconds", "timeouts",
+    "created", "closed", "recycled", "health_check_failures", "completed", "rejected", "busy_seconds",
+}
+
+
+def _stats_samples(stats: Dict, prefix: str, help_prefix: str, labels: Dict[str, str]):
+    samples = []
+    for key, value in stats.items():
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            continue
+        help = f"{help_prefix} {key.replace('_', ' ')}"
+        if key in _CUMULATIVE_STATS:
+            samples.append((f"{prefix}_{key}_total", "counter", help, labels, value))
+        else:
+            samples.append((f"{prefix}_{key}", "gauge", help, labels, value))
+    return samples
+
+
+def _collect_runtime():
+    # Imported here: these modules record into this one
+    from database.connection import get_pool
+    from jobs.plan_generation import pending_jobs
+    from utils.auth_helper import password_hash_pool, token_cache
+    from utils.daily_totals import daily_totals
+    from utils.plan_cache import current_plan_cache
+    from utils.validation import user_cache
+
+    samples = []
+    caches = {
+        "jwt_claims": token_cache.stats(),
+        "auth_users": user_cache.stats(),
+        "current_plans": current_plan_cache.stats(),
+        "daily_totals": daily_totals.stats(),
+    }
+    for cache, stats in caches.items():
+        samples.extend(_stats_samples(stats, "cache", "Cache", {"cache": cache}))
+    samples.extend(_stats_samples(get_pool().stats(), "db_pool", "Connection pool", {}))
+    samples.extend(_stats_samples(password_hash_pool.stats(), "password_hash_pool", "Password hash pool", {}))
+    samples.append(("plan_jobs_pending", "gauge", "Background plan generations queued or running", {}, pending_jobs()))
+    return samples
+
+
+registry.add_collector(_collect_runtime)
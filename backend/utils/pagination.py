@@ -0,0 +1,31 @@
+"""Opaque cursors for keyset pagination.
+
+A cursor encodes the sort key of the last row on a page; the next page
+continues strictly after it, so every page costs one index range scan no
+matter how deep the client has scrolled.
+"""
+import base64
+from datetime import date
+from typing import Optional, Tuple
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor can't be decoded"""
+
+
+def encode_date_cursor(day: date, row_id: int) -> str:
+    """Cursor for a row sorted by (day, row_id)"""
+    raw = f"{day.isoformat()}:{row_id}".encode("ascii")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_date_cursor(cursor: Optional[str]) -> Optional[Tuple[date, int]]:
+    """(day, row_id) from encode_date_cursor, None for no cursor"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("ascii")
+        day, row_id = raw.split(":")
+        return date.fromisoformat(day), int(row_id)
+    except ValueError as e:
+        raise InvalidCursor("Invalid cursor") from e
@@ -0,0 +1,82 @@
+"""Per-user cache of the encoded GET /meal-plan/current response.
+
+Entries live until the plan's end_date is over (capped at
+PLAN_CACHE_MAX_TTL) and are dropped by meal_plan_store whenever one of the
+user's plans is written. The cache is per process; under serve.py every
+write also bumps the user's shared generation (utils/generations.py), so
+the other workers stop serving their copy on its next read.
+"""
+import hashlib
+import threading
+import time
+from datetime import date
+from typing import Optional, Tuple
+
+from config import settings
+from utils import generations
+from utils.cache import TTLCache, seconds_until_end_of
+
+PLAN_CACHE_SIZE = settings.plan_cache_size
+PLAN_CACHE_MAX_TTL = settings.plan_cache_max_ttl
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header value matches etag (weak comparison)"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class CurrentPlanCache:
+    """user_id -> (etag, encoded body) of the user's current plan"""
+
+    def __init__(self, maxsize: int, max_ttl: float):
+        self.max_ttl = max_ttl
+        self._entries = TTLCache(maxsize, max_ttl, name="current_plans")
+        # user_id -> time of the last invalidation, so a read that started
+        # before a write can't cache what it read
+        self._invalidated = TTLCache(maxsize, max_ttl, name="current_plan_writes")
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[Tuple[str, bytes]]:
+        entry = self._entries.get(user_id)
+        if entry is None or entry[2] != generations.current(generations.PLANS, user_id):
+            return None
+        return entry[0], entry[1]
+
+    def generation(self, user_id: int) -> int:
+        """Pass to set(); read it before reading the plan"""
+        return generations.current(generations.PLANS, user_id)
+
+    def set(self, user_id: int, body: bytes, end_date: date, read_started: float, generation: int) -> str:
+        """Cache body unless the user's plans changed since read_started; returns its ETag"""
+        etag = make_etag(body)
+        ttl = min(self.max_ttl, seconds_until_end_of(end_date))
+        with self._lock:
+            invalidated_at = self._invalidated.get(user_id)
+            if invalidated_at is None or invalidated_at < read_started:
+                self._entries.set(user_id, (etag, body, generation), ttl=ttl)
+        return etag
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._invalidated.set(user_id, time.monotonic())
+            self._entries.invalidate(user_id)
+        generations.bump(generations.PLANS, user_id)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        return self._entries.stats()
+
+
+current_plan_cache = CurrentPlanCache(PLAN_CACHE_SIZE, PLAN_CACHE_MAX_TTL)
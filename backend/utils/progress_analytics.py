@@ -0,0 +1,191 @@
+"""Progress analytics over the daily rollups in progress_tracking.
+
+Daily totals are laid out on a dense calendar (one row per day, untracked
+days masked out) and every statistic is computed with NumPy over that
+array in one pass: per-bucket sums via np.add.reduceat, trailing 7/30-day
+averages via cumulative sums, macro ratios and adherence against the
+calorie target that applied on each day.
+"""
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+NUTRIENTS = ("calories", "protein", "carbs", "fats")
+ROLLUP_COLUMNS = ("total_calories", "total_protein", "total_carbs", "total_fats")
+TARGET_KEYS = ("daily_calories", "protein_g", "carbs_g", "fats_g")
+CALORIES_PER_GRAM = np.array([4.0, 4.0, 9.0])  # protein, carbs, fats
+
+RESOLUTIONS = ("day", "week", "month")
+ROLLING_WINDOWS = (7, 30)
+# A day counts as on target when calories are within this share of target
+ADHERENCE_TOLERANCE = 0.10
+
+
+def _round(value, digits=1):
+    return None if value is None or not np.isfinite(value) else round(float(value), digits)
+
+
+def _day_index(day: date) -> int:
+    return (day - date(1970, 1, 1)).days
+
+
+def _daily_series(rows: Sequence[Dict], first: date, days: int):
+    """(n_days, 4) nutrient totals, tracked-day mask and meal counts"""
+    totals = np.zeros((days, len(NUTRIENTS)))
+    meals = np.zeros(days)
+    if rows:
+        offsets = np.array([_day_index(row['meal_date']) for row in rows]) - _day_index(first)
+        keep = (offsets >= 0) & (offsets < days)
+        values = np.array([[float(row[column] or 0) for column in ROLLUP_COLUMNS] for row in rows])
+        counts = np.array([float(row['meal_count']) for row in rows])
+        totals[offsets[keep]] = values[keep]
+        meals[offsets[keep]] = counts[keep]
+    return totals, meals > 0, meals
+
+
+def target_series(plans: Sequence[Dict], default: Optional[Dict], first: date, days: int) -> np.ndarray:
+    """(n_days, 4) targets: each plan's nutritional_target over its dates
+    (later plans win), default where no plan applies, NaN if neither"""
+    targets = np.full((days, len(TARGET_KEYS)), np.nan)
+    if default:
+        targets[:] = [float(default.get(key) or np.nan) for key in TARGET_KEYS]
+    for plan in plans:
+        target = plan.get('target')
+        if not target:
+            continue
+        low = max(0, (plan['start_date'] - first).days)
+        high = min(days, (plan['end_date'] - first).days + 1)
+        if low < high:
+            targets[low:high] = [float(target.get(key) or np.nan) for key in TARGET_KEYS]
+    return targets
+
+
+def _bucket_starts(first: date, days: int, resolution: str) -> np.ndarray:
+    calendar = np.datetime64(first, 'D') + np.arange(days)
+    if resolution == "week":
+        # 1970-01-01 was a Thursday; shift so buckets start on Monday
+        keys = calendar - ((calendar.astype(np.int64) + 3) % 7)
+    elif resolution == "month":
+        keys = calendar.astype('datetime64[M]').astype('datetime64[D]')
+    else:
+        keys = calendar
+    return keys
+
+
+def _trailing_mean(values: np.ndarray, tracked: np.ndarray, window: int) -> np.ndarray:
+    """Mean over tracked days in the trailing window ending on each day"""
+    sums = np.cumsum(np.where(tracked, values, 0.0))
+    counts = np.cumsum(tracked.astype(np.float64))
+    sums[window:] = sums[window:] - sums[:-window]
+    counts[window:] = counts[window:] - counts[:-window]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+def _macro_ratios(grams: np.ndarray) -> np.ndarray:
+    """Share of macro calories from protein/carbs/fats for (..., 3) gram totals"""
+    calories = grams * CALORIES_PER_GRAM
+    total = calories.sum(axis=-1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(total > 0, calories / total, np.nan)
+
+
+def analyze(rows: Sequence[Dict], targets: np.ndarray, start: date, end: date,
+            warmup_start: date, resolution: str = "week") -> Dict:
+    """Buckets and summary for start..end.
+
+    rows are daily rollups from warmup_start to end (days before start only
+    feed the trailing averages) and targets the matching target_series.
+    """
+    days = (end - warmup_start).days + 1
+    offset = (start - warmup_start).days
+    totals, tracked, meals = _daily_series(rows, warmup_start, days)
+    rolling = {
+        window: _trailing_mean(totals[:, 0], tracked, window)[offset:] for window in ROLLING_WINDOWS
+    }
+    totals, tracked, meals, targets = totals[offset:], tracked[offset:], meals[offset:], targets[offset:]
+    n = len(tracked)
+
+    calorie_target = targets[:, 0]
+    has_target = tracked & np.isfinite(calorie_target) & (calorie_target > 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        deviation = np.abs(totals[:, 0] - calorie_target) / calorie_target
+    on_target = has_target & (deviation <= ADHERENCE_TOLERANCE)
+    score = np.where(has_target, np.clip(1.0 - deviation, 0.0, 1.0), 0.0)
+
+    keys = _bucket_starts(start, n, resolution)
+    boundaries = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[boundaries[1:], n] - 1
+
+    def per_bucket(values):
+        return np.add.reduceat(values, boundaries, axis=0)
+
+    tracked_days = per_bucket(tracked.astype(np.float64))
+    target_days = per_bucket(has_target.astype(np.float64))
+    sums = per_bucket(np.where(tracked[:, None], totals, 0.0))
+    target_sums = per_bucket(np.where(has_target, calorie_target, 0.0))
+    on_target_days = per_bucket(on_target.astype(np.float64))
+    score_sums = per_bucket(score)
+    meal_counts = per_bucket(meals)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        averages = sums / tracked_days[:, None]
+        target_averages = target_sums / target_days
+        adherence = on_target_days / target_days
+        scores = score_sums / target_days
+    ratios = _macro_ratios(sums[:, 1:])
+
+    buckets = []
+    for i, (low, high) in enumerate(zip(boundaries, ends)):
+        buckets.append({
+            "period_start": (start + timedelta(days=int(low))).isoformat(),
+            "period_end": (start + timedelta(days=int(high))).isoformat(),
+            "days_tracked": int(tracked_days[i]),
+            "meals_logged": int(meal_counts[i]),
+            "average_daily": {
+                nutrient: _round(averages[i, j]) for j, nutrient in enumerate(NUTRIENTS)
+            },
+            "macro_ratio": {
+                nutrient: _round(ratios[i, j], 3) for j, nutrient in enumerate(NUTRIENTS[1:])
+            },
+            "calorie_target": _round(target_averages[i], 0),
+            "adherence_rate": _round(adherence[i], 3),
+            "adherence_score": _round(scores[i], 3),
+            **{
+                f"rolling_{window}d_average_calories": _round(rolling[window][high])
+                for window in ROLLING_WINDOWS
+            },
+        })
+
+    total_tracked = int(tracked.sum())
+    total_targeted = int(has_target.sum())
+    overall = totals[tracked].sum(axis=0)
+    summary = {
+        "days_in_range": n,
+        "days_tracked": total_tracked,
+        "meals_logged": int(meals.sum()),
+        "average_daily": {
+            nutrient: _round(overall[j] / total_tracked) if total_tracked else None
+            for j, nutrient in enumerate(NUTRIENTS)
+        },
+        "macro_ratio": {
+            nutrient: _round(value, 3) for nutrient, value in zip(NUTRIENTS[1:], _macro_ratios(overall[1:]))
+        },
+        "adherence_rate": _round(on_target.sum() / total_targeted, 3) if total_targeted else None,
+        "adherence_score": _round(score.sum() / total_targeted, 3) if total_targeted else None,
+        **{
+            f"rolling_{window}d_average_calories": _round(rolling[window][-1]) if n else None
+            for window in ROLLING_WINDOWS
+        },
+    }
+    return {"buckets": buckets, "summary": summary}
+
+
+def paginate(items: List, page: int, page_size: int) -> Dict:
+    """Slice of items for a 1-based page plus paging metadata"""
+    total = len(items)
+    pages = max(1, -(-total // page_size))
+    return {
+        "items": items[(page - 1) * page_size:page * page_size],
+        "pagination": {"page": page, "page_size": page_size, "total_items": total, "total_pages": pages},
+    }
@@ -0,0 +1,46 @@
+"""JSON encoding for API responses and stored JSON columns (orjson based).
+
+``JSONResponse`` is the app-wide default response class. Routes that
+return it directly also skip FastAPI's jsonable_encoder pass, and any
+``json_fragment`` inside the content is copied into the output as-is, so
+JSON read from the database never has to be parsed just to be re-sent.
+"""
+from decimal import Decimal
+from typing import Any, Union
+
+import orjson
+from fastapi.responses import ORJSONResponse
+
+OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+loads = orjson.loads
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value: Any) -> bytes:
+    """Encode value as UTF-8 JSON bytes"""
+    return orjson.dumps(value, default=_default, option=OPTIONS)
+
+
+def dumps_text(value: Any) -> str:
+    """Encode value as a JSON string, e.g. for a MySQL JSON column parameter"""
+    return dumps(value).decode("utf-8")
+
+
+def json_fragment(raw: Union[str, bytes, bytearray]) -> orjson.Fragment:
+    """Wrap already-encoded JSON so dumps() embeds it without re-parsing"""
+    return orjson.Fragment(bytes(raw) if isinstance(raw, bytearray) else raw)
+
+
+class JSONResponse(ORJSONResponse):
+    """ORJSONResponse that also encodes Decimal (MySQL DECIMAL columns)"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
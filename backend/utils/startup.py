@@ -0,0 +1,91 @@
+"""Where a cold start spends its time.
+
+main.py times its imports in groups (the framework, the database layer,
+each router, ...) and the lifespan times each initialization step
+(opening pool connections, loading the meal catalog). Once the app is
+ready the report is logged, and GET /server/startup serves it to admins.
+
+Import groups run one after another, so their times add up to the whole
+import; a group's time includes any modules it is the first to import.
+Initialization steps run concurrently, so init_seconds is the wall time
+of all of them together rather than their sum.
+
+Under serve.py the imports happen once in the master; each worker reports
+those alongside its own initialization.
+"""
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StartupReport:
+    """Import and initialization timings for this process"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.imports: List[Dict] = []
+        self.init: List[Dict] = []
+        self.init_started: Optional[float] = None
+        self.ready_at: Optional[float] = None
+
+    @contextmanager
+    def importing(self, name: str):
+        """Time the imports made inside the block under name"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.imports.append({"name": name, "seconds": round(time.perf_counter() - start, 4)})
+
+    def begin_init(self):
+        self.init = []
+        self.init_started = time.perf_counter()
+        self.ready_at = None
+
+    @contextmanager
+    def step(self, name: str):
+        """Time an init step.
+
+        A failure is logged and recorded but doesn't stop startup; the
+        subsystem is initialized on first use instead.
+        """
+        start = time.perf_counter()
+        ok = True
+        try:
+            yield
+        except Exception as e:
+            ok = False
+            logger.warning("Startup step failed: %s", name, extra={"error": str(e)})
+        finally:
+            self.init.append({"name": name, "seconds": round(time.perf_counter() - start, 4), "ok": ok})
+
+    async def run_step(self, name: str, func, *args):
+        """Run a blocking init step in a thread and time it"""
+        with self.step(name):
+            await asyncio.to_thread(func, *args)
+
+    def mark_ready(self):
+        self.ready_at = time.perf_counter()
+        logger.info("Startup complete", extra=self.as_dict())
+
+    def as_dict(self) -> Dict:
+        import_seconds = sum(step["seconds"] for step in self.imports)
+        report = {
+            "import_seconds": round(import_seconds, 4),
+            "init_seconds": None,
+            "ready_seconds": None,
+            "imports": sorted(self.imports, key=lambda step: step["seconds"], reverse=True),
+            "init": list(self.init),
+        }
+        if self.ready_at is not None:
+            if self.init_started is not None:
+                report["init_seconds"] = round(self.ready_at - self.init_started, 4)
+            report["ready_seconds"] = round(self.ready_at - self.started, 4)
+        return report
+
+
+startup_report = StartupReport()
@@ -1,50 +1,91 @@
 from fastapi import HTTPException, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from utils.auth_helper import decode_token
-from database.connection import execute_query
+from utils.auth_helper import decode_token_claims
+from utils.cache import TTLCache
+from database.connection import execute_query_async
+from config import settings
+import logging
+
+logger = logging.getLogger(__name__)
 
 security = HTTPBearer()
 
+# email -> {"user_id", "email"} for recently authenticated users. Each
+# worker process has its own copy, so invalidate_cached_user only reaches
+# the worker that calls it
+user_cache = TTLCache(
+    maxsize=settings.auth_user_cache_size,
+    ttl=settings.auth_user_cache_ttl,
+    name="auth_users"
+)
+# Trust the signed "uid" claim instead of looking the user up. Deleted
+# accounts then stay authenticated until their token expires.
+TRUST_TOKEN_USER_ID = settings.auth_trust_token_user_id
+
+# Accounts allowed to call admin-only endpoints (comma-separated emails)
+ADMIN_EMAILS = settings.admin_emails
+
+def invalidate_cached_user(email: str):
+    """Forget the cached user record for email (call on registration/deletion).
+
+    Only clears this process's cache; other serve.py workers keep their
+    entry for up to AUTH_USER_CACHE_TTL seconds.
+    """
+    user_cache.invalidate(email)
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Validate token and return current user"""
     try:
         token = credentials.credentials
-        print(f"Received token: {token[:20]}...")  # Debug
         
         # Decode token
-        email = decode_token(token)
-        print(f"Decoded email: {email}")  # Debug
+        claims = decode_token_claims(token)
+        email = claims.get("sub") if claims else None
         
         if email is None:
-            print("Token decode returned None")  # Debug
+            logger.debug("Rejecting request: token could not be decoded")
             raise HTTPException(
                 status_code=401, 
                 detail="Invalid token: Could not decode"
             )
         
-        # Get user from database
-        query = "SELECT user_id, email FROM users WHERE email = %s"
-        user = execute_query(query, (email,))
-        print(f"User from DB: {user}")  # Debug
+        # A token for an earlier account with the same email carries a
+        # different uid, and must not be served this one's cached record
+        uid = claims.get("uid")
+        user = user_cache.get(email)
+        if user is not None and (uid is None or user["user_id"] == uid):
+            return dict(user)
         
-        if not user:
-            print(f"User not found for email: {email}")  # Debug
-            raise HTTPException(
-                status_code=401, 
-                detail="User not found in database"
-            )
+        if TRUST_TOKEN_USER_ID and uid is not None:
+            user = {"user_id": uid, "email": email}
+        else:
+            # Get user from database
+            query = "SELECT user_id, email FROM users WHERE email = %s"
+            rows = await execute_query_async(query, (email,))
+            
+            if not rows:
+                logger.info("Token subject not found in users table: %s", email)
+                raise HTTPException(
+                    status_code=401, 
+                    detail="User not found in database"
+                )
+            user = rows[0]
         
-        print(f"Successfully authenticated user: {user[0]}")  # Debug
-        return user[0]
+        user_cache.set(email, user)
+        logger.debug("Authenticated user_id=%s", user["user_id"])
+        return dict(user)
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Auth error - Exception type: {type(e).__name__}")  # Debug
-        print(f"Auth error - Details: {str(e)}")  # Debug
-        import traceback
-        print(f"Traceback: {traceback.format_exc()}")  # Debug
+        logger.exception("Authentication failed: %s", type(e).__name__)
         raise HTTPException(
             status_code=401,
             detail=f"Authentication failed: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+async def require_admin(current_user: dict = Depends(get_current_user)):
+    """Allow only users listed in ADMIN_EMAILS"""
+    if current_user['email'].lower() not in ADMIN_EMAILS:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return current_user
@@ -0,0 +1,170 @@
+"""Per-worker counters in memory shared between the serve.py master and its workers.
+
+The master maps an anonymous shared region before forking, with one
+fixed-size slot per worker. Each worker only ever writes its own slot
+(request counts, in-flight requests, a heartbeat), so no locking is
+needed; readers may see one request's update half applied, which is fine
+for monitoring. The master reads the heartbeats to find hung workers, and
+any worker can report every slot on /server/workers.
+
+Outside serve.py (plain uvicorn, tests) no table is attached and the
+middleware does nothing.
+"""
+import mmap
+import os
+import struct
+import time
+from typing import Dict, List, Optional
+
+from utils.metrics import registry
+
+EMPTY, STARTING, SERVING, DRAINING = 0, 1, 2, 3
+STATE_NAMES = {EMPTY: "empty", STARTING: "starting", SERVING: "serving", DRAINING: "draining"}
+
+# pid, generation, state, requests, in_flight, server_errors,
+# started_at, heartbeat, busy_seconds
+_SLOT = struct.Struct("<qqqqqqddd")
+_PID, _GENERATION, _STATE, _REQUESTS, _IN_FLIGHT, _ERRORS, _STARTED, _HEARTBEAT, _BUSY = range(9)
+
+
+class WorkerStatsTable:
+    """Fixed array of worker slots in MAP_SHARED anonymous memory"""
+
+    def __init__(self, slots: int):
+        self.slots = slots
+        self.master_pid = os.getpid()
+        self._memory = mmap.mmap(-1, _SLOT.size * slots)
+
+    def read(self, index: int) -> tuple:
+        return _SLOT.unpack_from(self._memory, index * _SLOT.size)
+
+    def write(self, index: int, values):
+        _SLOT.pack_into(self._memory, index * _SLOT.size, *values)
+
+    def set_state(self, index: int, state: int):
+        values = list(self.read(index))
+        values[_STATE] = state
+        self.write(index, values)
+
+    def claim(self, index: int, pid: int, generation: int):
+        now = time.time()
+        self.write(index, (pid, generation, STARTING, 0, 0, 0, now, now, 0.0))
+
+    def release(self, index: int):
+        self.write(index, (0, 0, EMPTY, 0, 0, 0, 0.0, 0.0, 0.0))
+
+    def free_slot(self) -> Optional[int]:
+        for index in range(self.slots):
+            if self.read(index)[_STATE] == EMPTY:
+                return index
+        return None
+
+    def state(self, index: int) -> int:
+        return self.read(index)[_STATE]
+
+    def heartbeat_age(self, index: int) -> float:
+        return time.time() - self.read(index)[_HEARTBEAT]
+
+    def snapshot(self) -> List[Dict]:
+        """Every occupied slot as a dict"""
+        now = time.time()
+        workers = []
+        for index in range(self.slots):
+            pid, generation, state, requests, in_flight, errors, started, heartbeat, busy = self.read(index)
+            if state == EMPTY:
+                continue
+            workers.append({
+                "slot": index,
+                "pid": pid,
+                "generation": generation,
+                "state": STATE_NAMES.get(state, str(state)),
+                "uptime_seconds": round(now - started, 1),
+                "heartbeat_age_seconds": round(now - heartbeat, 1),
+                "requests": requests,
+                "in_flight": in_flight,
+                "server_errors": errors,
+                "busy_seconds": round(busy, 3),
+            })
+        return workers
+
+
+class WorkerSlot:
+    """The current worker's slot; only this process writes it"""
+
+    def __init__(self, table: WorkerStatsTable, index: int):
+        self.table = table
+        self.index = index
+
+    def request_started(self):
+        values = list(self.table.read(self.index))
+        values[_IN_FLIGHT] += 1
+        self.table.write(self.index, values)
+
+    def request_finished(self, duration: float, status: int):
+        values = list(self.table.read(self.index))
+        values[_IN_FLIGHT] -= 1
+        values[_REQUESTS] += 1
+        values[_BUSY] += duration
+        if status >= 500:
+            values[_ERRORS] += 1
+        self.table.write(self.index, values)
+
+    def heartbeat(self, serving: bool):
+        values = list(self.table.read(self.index))
+        values[_HEARTBEAT] = time.time()
+        if serving and values[_STATE] == STARTING:
+            values[_STATE] = SERVING
+        self.table.write(self.index, values)
+
+
+# Set in each worker by serve.py before it starts serving
+table: Optional[WorkerStatsTable] = None
+current_slot: Optional[WorkerSlot] = None
+configured_workers = 0
+
+
+def attach(stats_table: WorkerStatsTable, index: int, workers: int):
+    global table, current_slot, configured_workers
+    table, current_slot, configured_workers = stats_table, WorkerSlot(stats_table, index), workers
+
+
+class WorkerStatsMiddleware:
+    """ASGI middleware counting requests into the worker's shared slot"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        slot = current_slot
+        if slot is None or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        slot.request_started()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            slot.request_finished(time.perf_counter() - start, status)
+
+
+def _collect_workers():
+    if table is None:
+        return []
+    samples = []
+    for worker in table.snapshot():
+        labels = {"slot": str(worker["slot"]), "pid": str(worker["pid"])}
+        samples.append(("server_worker_requests_total", "counter", "Requests served by each worker", labels, worker["requests"]))
+        samples.append(("server_worker_in_flight", "gauge", "Requests in progress on each worker", labels, worker["in_flight"]))
+    samples.append(("server_workers", "gauge", "Worker processes configured", {}, configured_workers))
+    return samples
+
+
+registry.add_collector(_collect_workers)